@@ -0,0 +1,35 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+
+def benchmark_branch_creation_setup(dataset_name, num_samples):
+    schema = {"image": Tensor((256, 256), dtype="uint8", chunks=1)}
+    ds = hub.Dataset(dataset_name, shape=(num_samples,), schema=schema, mode="w")
+    for i in range(num_samples):
+        ds["image", i] = np.ones((256, 256), dtype="uint8")
+    ds.flush()
+    return ds
+
+
+def benchmark_branch_creation_run(ds):
+    ds.checkout(f"branch-{time()}", create=True)
+
+
+if __name__ == "__main__":
+    for num_samples in (10, 100, 1000):
+        ds = benchmark_branch_creation_setup(
+            f"./data/benchmarks/branch_creation_{num_samples}", num_samples
+        )
+        t0 = time()
+        benchmark_branch_creation_run(ds)
+        print(f"Branch creation with {num_samples} chunks dt: {time() - t0}")
@@ -0,0 +1,38 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+
+def benchmark_dataset_startup_setup(dataset_name, num_keys, num_samples=100):
+    schema = {f"col_{i}": Tensor((16,), dtype="float32") for i in range(num_keys)}
+    ds = hub.Dataset(dataset_name, shape=(num_samples,), schema=schema, mode="w")
+    ds["col_0", :] = np.ones((num_samples, 16), dtype="float32")
+    ds.close()
+    return dataset_name
+
+
+def benchmark_dataset_startup_run(dataset_name):
+    """Opens the dataset and reads one column, as each DataLoader worker does"""
+    ds = hub.Dataset(dataset_name, mode="r")
+    column = ds["col_0", :].compute()
+    ds.close()
+    return column
+
+
+if __name__ == "__main__":
+    for num_keys in (10, 100, 500):
+        dataset_name = f"./data/benchmarks/dataset_startup_{num_keys}"
+        benchmark_dataset_startup_setup(dataset_name, num_keys)
+        t0 = time()
+        benchmark_dataset_startup_run(dataset_name)
+        dt = time() - t0
+        print(f"Open dataset with {num_keys} keys and read one column dt: {dt:.3f}")
@@ -0,0 +1,44 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+
+def benchmark_local_mmap_setup(dataset_name, compressor, num_samples=500):
+    schema = {
+        "image": Tensor((256, 256, 3), dtype="uint8", chunks=1, compressor=compressor)
+    }
+    ds = hub.Dataset(dataset_name, shape=(num_samples,), schema=schema, mode="w")
+    image = np.random.randint(0, 256, (256, 256, 3), dtype="uint8")
+    for i in range(num_samples):
+        ds["image", i] = image
+    ds.close()
+    return dataset_name
+
+
+def benchmark_local_mmap_run(dataset_name):
+    ds = hub.Dataset(dataset_name, mode="r")
+    total = 0
+    for i in range(ds.shape[0]):
+        total += int(ds["image", i].compute()[0, 0, 0])
+    ds.close()
+    return total
+
+
+if __name__ == "__main__":
+    for compressor in ("lz4", None):
+        dataset_name = f"./data/benchmarks/local_mmap_{compressor}"
+        benchmark_local_mmap_setup(dataset_name, compressor)
+        t0 = time()
+        benchmark_local_mmap_run(dataset_name)
+        dt = time() - t0
+        size = 500 * 256 * 256 * 3 / 2 ** 20
+        print(f"Read {size:.0f} MB with compressor={compressor} dt: {dt:.2f}")
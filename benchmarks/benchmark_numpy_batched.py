@@ -0,0 +1,56 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.api.dataset_utils import create_numpy_dict
+from hub.schema import ClassLabel
+
+
+def benchmark_numpy_batched_setup(dataset_name, num_samples):
+    schema = {
+        "a": "int64",
+        "b": "float32",
+        "c": "float64",
+        "d": "int32",
+        "label": ClassLabel(num_classes=10),
+    }
+    ds = hub.Dataset(dataset_name, shape=(num_samples,), schema=schema, mode="w")
+    ds["a", :] = np.arange(num_samples)
+    ds["b", :] = np.random.rand(num_samples).astype("float32")
+    ds["c", :] = np.random.rand(num_samples)
+    ds["d", :] = np.arange(num_samples, dtype="int32")
+    ds["label", :] = np.arange(num_samples) % 10
+    ds.close()
+    return dataset_name
+
+
+def benchmark_numpy_per_sample_run(dataset_name, num_samples):
+    ds = hub.Dataset(dataset_name, mode="r")
+    return np.array([create_numpy_dict(ds, i) for i in range(num_samples)])
+
+
+def benchmark_numpy_batched_run(dataset_name, columnar=False):
+    ds = hub.Dataset(dataset_name, mode="r")
+    return ds.numpy(columnar=columnar)
+
+
+if __name__ == "__main__":
+    num_samples = 100000
+    dataset_name = "./data/benchmarks/numpy_batched"
+    benchmark_numpy_batched_setup(dataset_name, num_samples)
+    t0 = time()
+    benchmark_numpy_per_sample_run(dataset_name, 1000)
+    dt = (time() - t0) * num_samples / 1000
+    print(f"Per sample numpy of {num_samples} rows (extrapolated) dt: {dt:.2f}")
+    for columnar in (False, True):
+        t0 = time()
+        benchmark_numpy_batched_run(dataset_name, columnar)
+        dt = time() - t0
+        print(f"Batched numpy of {num_samples} rows columnar={columnar} dt: {dt:.2f}")
@@ -0,0 +1,32 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import hub
+from hub.schema import Tensor
+
+
+def benchmark_open_many_tensors_setup(dataset_name, num_tensors=500):
+    schema = {f"tensor_{i}": Tensor((10,), dtype="int32") for i in range(num_tensors)}
+    t0 = time()
+    ds = hub.Dataset(dataset_name, shape=(10,), schema=schema, mode="w")
+    ds.close()
+    print(f"Create {num_tensors} tensors dt: {time() - t0}")
+    return dataset_name
+
+
+def benchmark_open_many_tensors_run(dataset_name):
+    ds = hub.Dataset(dataset_name, mode="r")
+    ds.close()
+
+
+if __name__ == "__main__":
+    dataset_name = "./data/benchmarks/open_many_tensors"
+    benchmark_open_many_tensors_setup(dataset_name)
+    t0 = time()
+    benchmark_open_many_tensors_run(dataset_name)
+    print(f"Open 500 tensors dt: {time() - t0}")
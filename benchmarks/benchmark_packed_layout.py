@@ -0,0 +1,71 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import fsspec
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+MAX_SHAPE = (640, 640, 3)
+
+
+def coco_like_shapes(num_samples, seed=0):
+    """Image shapes distributed like COCO, sides mostly between 300 and 640 with 640 as the longer side"""
+    rng = np.random.default_rng(seed)
+    long_side = np.full(num_samples, 640)
+    short_side = np.clip(rng.normal(470, 70, num_samples), 200, 640).astype(int)
+    landscape = rng.random(num_samples) < 0.7
+    return [
+        (int(s), int(l), 3) if wide else (int(l), int(s), 3)
+        for s, l, wide in zip(short_side, long_side, landscape)
+    ]
+
+
+def benchmark_packed_layout_setup(num_samples):
+    rng = np.random.default_rng(1)
+    return [
+        rng.integers(0, 256, shape, dtype="uint8")
+        for shape in coco_like_shapes(num_samples)
+    ]
+
+
+def benchmark_packed_layout_run(dataset_name, images, layout):
+    schema = {
+        "image": Tensor(
+            (None, None, 3), dtype="uint8", max_shape=MAX_SHAPE, layout=layout
+        )
+    }
+    ds = hub.Dataset(dataset_name, shape=(len(images),), schema=schema, mode="w")
+    t0 = time()
+    for i, image in enumerate(images):
+        ds["image", i] = image
+    ds.flush()
+    write_dt = time() - t0
+    t0 = time()
+    for i in range(len(images)):
+        ds["image", i].compute()
+    read_dt = time() - t0
+    ds.close()
+    size = fsspec.filesystem("file").du(dataset_name)
+    return write_dt, read_dt, size
+
+
+if __name__ == "__main__":
+    num_samples = 200
+    images = benchmark_packed_layout_setup(num_samples)
+    real_size = sum(image.nbytes for image in images)
+    print(f"Real size of {num_samples} images: {real_size / 2 ** 20:.1f} MB")
+    for layout in ("padded", "packed"):
+        write_dt, read_dt, size = benchmark_packed_layout_run(
+            f"./data/benchmarks/packed_layout_{layout}", images, layout
+        )
+        print(
+            f"{layout} layout write dt: {write_dt:.2f}, read dt: {read_dt:.2f}, "
+            f"size: {size / 2 ** 20:.1f} MB"
+        )
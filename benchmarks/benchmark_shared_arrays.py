@@ -0,0 +1,40 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+SCHEMA = {"image": Tensor((1080, 1920, 3), dtype="uint8")}
+
+
+@hub.transform(schema=SCHEMA, scheduler="processed", workers=2)
+def load_frame(index):
+    return {"image": np.full((1080, 1920, 3), index % 256, dtype="uint8")}
+
+
+def benchmark_shared_arrays_run(num_samples, shared_arrays):
+    """Times computing a shard and bringing its results to the parent, without upload"""
+    transform = load_frame(range(num_samples))
+    transform.shared_arrays = shared_arrays
+    transform._compute_shard(range(2))  # start the worker processes
+    t0 = time()
+    results = transform._compute_shard(range(num_samples))
+    dt = time() - t0
+    assert int(results["image"][-1][0, 0, 0]) == (num_samples - 1) % 256
+    return dt
+
+
+if __name__ == "__main__":
+    num_samples = 64
+    for shared_arrays in (False, True):
+        dt = benchmark_shared_arrays_run(num_samples, shared_arrays)
+        print(
+            f"Transform {num_samples} 1080p frames shared_arrays={shared_arrays} dt: {dt:.2f}"
+        )
@@ -0,0 +1,59 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+SCHEMA = {
+    "image": Tensor((32, 32, 3), dtype="float32"),
+    "label": Tensor((), dtype="int32"),
+}
+
+
+def benchmark_transform_batched_setup(dataset_name, num_samples):
+    schema = {"image": Tensor((32, 32, 3), dtype="uint8"), "label": "int32"}
+    ds = hub.Dataset(dataset_name, shape=(num_samples,), schema=schema, mode="w")
+    ds["image", :] = np.random.randint(0, 256, (num_samples, 32, 32, 3), "uint8")
+    ds["label", :] = np.arange(num_samples) % 10
+    ds.close()
+    return hub.Dataset(dataset_name, mode="r")
+
+
+@hub.transform(schema=SCHEMA)
+def normalize_sample(sample):
+    return {"image": sample["image"] / 255.0 - 0.5, "label": sample["label"]}
+
+
+@hub.transform(schema=SCHEMA, batched=True)
+def normalize_batch(batch):
+    return {"image": batch["image"] / 255.0 - 0.5, "label": batch["label"]}
+
+
+def benchmark_transform_batched_run(ds, dataset_name, transform):
+    t0 = time()
+    transform(ds).store(dataset_name)
+    return time() - t0
+
+
+if __name__ == "__main__":
+    num_samples = 10000
+    ds = benchmark_transform_batched_setup(
+        "./data/benchmarks/transform_batched_input", num_samples
+    )
+    for name, transform in (
+        ("per sample", normalize_sample),
+        ("batched", normalize_batch),
+    ):
+        dt = benchmark_transform_batched_run(
+            ds,
+            f"./data/benchmarks/transform_batched_{name.replace(' ', '_')}",
+            transform,
+        )
+        print(f"Normalize {num_samples} samples {name} dt: {dt:.2f}")
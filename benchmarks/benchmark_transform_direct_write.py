@@ -0,0 +1,45 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+SCHEMA = {"image": Tensor((512, 512, 3), dtype="uint8", chunks=4)}
+
+
+@hub.transform(schema=SCHEMA, scheduler="processed", workers=2)
+def load_image(index):
+    return {"image": np.full((512, 512, 3), index % 256, dtype="uint8")}
+
+
+def benchmark_transform_direct_write_run(dataset_name, num_samples, direct_write):
+    """Times storing a processed transform with results written by the parent or by workers"""
+    transform = load_image(range(num_samples))
+    t0 = time()
+    ds = transform.store(
+        dataset_name, sample_per_shard=num_samples // 4, direct_write=direct_write
+    )
+    dt = time() - t0
+    assert (
+        int(ds["image", num_samples - 1, 0, 0, 0].compute()) == (num_samples - 1) % 256
+    )
+    return dt
+
+
+if __name__ == "__main__":
+    num_samples = 256
+    for direct_write in (False, True):
+        dataset_name = f"./data/benchmarks/transform_direct_write_{direct_write}"
+        dt = benchmark_transform_direct_write_run(
+            dataset_name, num_samples, direct_write
+        )
+        print(
+            f"Store {num_samples} 512x512 images direct_write={direct_write} dt: {dt:.2f}"
+        )
@@ -0,0 +1,43 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import sleep, time
+
+import numpy as np
+
+import hub
+from hub.schema import Tensor
+
+SCHEMA = {"image": Tensor((256, 256, 3), dtype="uint8", chunks=8)}
+
+
+@hub.transform(schema=SCHEMA)
+def load_image(index, delay=0.001):
+    """Stands for decoding a file, waits like IO and returns a noisy image that compresses poorly"""
+    sleep(delay)
+    rng = np.random.default_rng(index)
+    return {"image": rng.integers(0, 256, (256, 256, 3), dtype="uint8")}
+
+
+def benchmark_transform_pipeline_run(dataset_name, num_samples, pipeline_depth):
+    t0 = time()
+    load_image(range(num_samples)).store(
+        dataset_name, sample_per_shard=64, pipeline_depth=pipeline_depth
+    )
+    return time() - t0
+
+
+if __name__ == "__main__":
+    num_samples = 1024
+    for pipeline_depth in (0, 2):
+        dt = benchmark_transform_pipeline_run(
+            f"./data/benchmarks/transform_pipeline_{pipeline_depth}",
+            num_samples,
+            pipeline_depth,
+        )
+        print(
+            f"Store {num_samples} samples pipeline_depth={pipeline_depth} dt: {dt:.2f}"
+        )
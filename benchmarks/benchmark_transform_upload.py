@@ -0,0 +1,62 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from time import sleep, time
+
+import numpy as np
+from fsspec.implementations.local import LocalFileSystem
+
+import hub
+import hub.compute.transform
+from hub.schema import Tensor
+
+SCHEMA = {
+    "image": Tensor((512, 512, 3), dtype="uint8", chunks=4, compressor="zstd"),
+    "mask": Tensor((512, 512), dtype="uint8", chunks=4, compressor="zstd"),
+}
+
+IMAGE = np.random.default_rng(0).integers(0, 64, (512, 512, 3), dtype="uint8")
+
+
+@hub.transform(schema=SCHEMA, scheduler="threaded", workers=8)
+def create_sample(index):
+    """Cheap to compute so the upload dominates"""
+    return {
+        "image": IMAGE + np.uint8(index % 64),
+        "mask": np.full((512, 512), index % 256, dtype="uint8"),
+    }
+
+
+def simulate_put_latency(latency=0.02):
+    """Delays each file write like a PUT request to object storage"""
+    pipe_file = LocalFileSystem.pipe_file
+
+    def delayed_pipe_file(self, *args, **kwargs):
+        sleep(latency)
+        return pipe_file(self, *args, **kwargs)
+
+    LocalFileSystem.pipe_file = delayed_pipe_file
+
+
+def benchmark_transform_upload_run(dataset_name, num_samples, upload_workers):
+    hub.compute.transform.DEFAULT_UPLOAD_WORKERS = upload_workers
+    t0 = time()
+    create_sample(range(num_samples)).store(dataset_name, sample_per_shard=128)
+    return time() - t0
+
+
+if __name__ == "__main__":
+    num_samples = 512
+    simulate_put_latency()
+    for upload_workers in (1, 16):
+        dt = benchmark_transform_upload_run(
+            f"./data/benchmarks/transform_upload_{upload_workers}",
+            num_samples,
+            upload_workers,
+        )
+        print(
+            f"Store {num_samples} samples upload_workers={upload_workers} dt: {dt:.2f}"
+        )
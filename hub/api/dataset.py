@@ -3,8 +3,9 @@ License:
 This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
+import copy
 import warnings
-from hub.api.versioning import VersionNode
+from hub.api.versioning import ChunkIndex, VersionLog, VersionNode
 import os
 import posixpath
 import collections.abc as abc
@@ -13,7 +14,6 @@ import sys
 from typing import Iterable
 import traceback
 from collections import defaultdict
-import numpy as np
 from PIL import Image as im, ImageChops
 
 import fsspec
@@ -27,6 +27,7 @@ from hub.schema.features import (
     Tensor,
     SchemaDict,
     featurify,
+    _normalize_chunks,
 )
 from hub.log import logger
 import hub.store.pickle_s3_storage
@@ -35,7 +36,7 @@ from hub.api.datasetview import DatasetView
 from hub.api.objectview import ObjectView
 from hub.api.tensorview import TensorView
 from hub.api.dataset_utils import (
-    create_numpy_dict,
+    create_numpy_batch,
     generate_hash,
     get_value,
     slice_split,
@@ -43,6 +44,9 @@ from hub.api.dataset_utils import (
     _copy_helper,
     _get_compressor,
     _get_dynamic_tensor_dtype,
+    _get_tensor_class,
+    _LazyTensors,
+    _select_keys,
     _store_helper,
     check_class_label,
     same_schema,
@@ -53,7 +57,19 @@ import hub.schema.deserialize
 from hub.schema.features import flatten
 from hub import auto
 
-from hub.store.dynamic_tensor import DynamicTensor
+from hub.store.packed_tensor import PACKED_META, PackedTensor
+from hub.store.disk_cache import DiskCache
+from hub.store.lru_cache import LRUCache
+from hub.store.prefetcher import Prefetcher
+from hub.store.rechunker import (
+    LAYOUT_META,
+    is_chunk_key,
+    layout_key,
+    rechunk,
+    remove_chunks,
+    split_layout_key,
+)
+from hub.store.shape_detector import ShapeDetector
 from hub.store.store import get_fs_and_path, get_storage_map
 from hub.exceptions import (
     AddressNotFound,
@@ -76,7 +92,6 @@ from hub.client.hub_control import HubControlClient
 from hub.schema import Audio, BBox, ClassLabel, Image, Sequence, Text, Video
 from hub.utils import norm_cache, norm_shape, _tuple_product
 from hub import defaults
-import pickle
 
 
 def get_file_count(fs: fsspec.AbstractFileSystem, path):
@@ -125,7 +140,7 @@ class Dataset:
             Size of the memory cache. Default is 64MB (2**26)
             if 0, False or None, then cache is not used
         storage_cache: int, optional
-            Size of the storage cache. Default is 256MB (2**28)
+            Size of the local disk cache (~/.activeloop/cache) of remote datasets. Default is 256MB (2**28)
             if 0, False or None, then storage cache is not used
         lock_cache: bool, optional
             Lock the cache for avoiding multiprocessing errors
@@ -171,6 +186,9 @@ class Dataset:
         self._meta_information = meta_information
         self.username = None
         self.dataset_name = None
+        self._meta_dirty = False
+        self._chunk_index = {}
+        self._version_log = VersionLog(fs_map)
         if not needcreate:
             self.meta = json.loads(fs_map[defaults.META_FILE].decode("utf-8"))
             self._name = self.meta.get("name") or None
@@ -179,7 +197,7 @@ class Dataset:
             self._meta_information = self.meta.get("meta_info") or dict()
             self._flat_tensors = tuple(flatten(self._schema))
             try:
-                version_info = pickle.loads(fs_map[defaults.VERSION_INFO])
+                version_info = self._version_log.load()
                 self._branch_node_map = version_info.get("branch_node_map")
                 self._commit_node_map = version_info.get("commit_node_map")
                 self._chunk_commit_map = version_info.get("chunk_commit_map")
@@ -207,7 +225,7 @@ class Dataset:
                 self._commit_node_map = None
                 self._chunk_commit_map = None
 
-            self._tensors = dict(self._open_storage_tensors())
+            self._tensors = _LazyTensors(self._flat_tensors, self._open_storage_tensor)
 
             if shape != (None,) and shape != self._shape:
                 raise TypeError(
@@ -240,7 +258,10 @@ class Dataset:
                 self._chunk_commit_map = {
                     path: defaultdict(set) for schema, path in self._flat_tensors
                 }
-                self._tensors = dict(self._generate_storage_tensors())
+                self._tensors = _LazyTensors(
+                    self._flat_tensors, self._open_storage_tensor
+                )
+                self._tensors.update(self._generate_storage_tensors())
             except Exception as e:
                 try:
                     self.close()
@@ -303,25 +324,59 @@ class Dataset:
         return self._meta_information
 
     def _store_meta(self) -> dict:
-        meta = {
-            "shape": self._shape,
-            "schema": hub.schema.serialize.serialize(self._schema),
-            "version": 1,
-            "meta_info": self._meta_information or dict(),
-            "name": self._name,
-        }
-
-        self._fs_map[defaults.META_FILE] = bytes(json.dumps(meta), "utf-8")
+        meta = getattr(self, "meta", None) or {}
+        meta.update(
+            {
+                "shape": self._shape,
+                "schema": hub.schema.serialize.serialize(self._schema),
+                "version": 1,
+                "meta_info": copy.deepcopy(self._meta_information or dict()),
+                "name": self._name,
+            }
+        )
+        self.meta = meta
+        self._meta_dirty = True
+        self._flush_meta()
         return meta
 
+    def _flush_meta(self):
+        """Writes meta.json if the parsed meta was changed since the last write"""
+        if self._meta_dirty:
+            self._fs_map[defaults.META_FILE] = bytes(json.dumps(self.meta), "utf-8")
+            self._meta_dirty = False
+
+    def _get_chunk_index(self, path: str) -> ChunkIndex:
+        """Returns the resolved chunk versions of the tensor at path for the current version node
+        The index is built on first use after the node changes (open, commit, checkout) and updated on writes
+        """
+        index = self._chunk_index.get(path)
+        if index is None or index.node is not self._version_node:
+            index = ChunkIndex(self._chunk_commit_map[path], self._version_node)
+            self._chunk_index[path] = index
+        return index
+
+    def _add_chunk_versions(self, chunk_versions: dict):
+        """Records chunks written to storage by another Dataset object of the same version in version info
+        chunk_versions maps tensor path to list of (chunk_key, commit_id, added) as logged by VersionLog
+        """
+        for path, changes in chunk_versions.items():
+            for chunk_key, commit_id, added in changes:
+                commit_ids = self._chunk_commit_map[path][chunk_key]
+                if added and commit_id not in commit_ids:
+                    commit_ids.add(commit_id)
+                    self._version_log.chunk_added(path, chunk_key, commit_id)
+                elif not added and commit_id in commit_ids:
+                    commit_ids.remove(commit_id)
+                    self._version_log.chunk_removed(path, chunk_key, commit_id)
+                else:
+                    continue
+                self._get_chunk_index(path).update(chunk_key, commit_ids)
+
     def _store_version_info(self) -> dict:
         if self._commit_id is not None:
-            d = {
-                "branch_node_map": self._branch_node_map,
-                "commit_node_map": self._commit_node_map,
-                "chunk_commit_map": self._chunk_commit_map,
-            }
-            self._fs_map[defaults.VERSION_INFO] = pickle.dumps(d)
+            self._version_log.flush(
+                self._branch_node_map, self._commit_node_map, self._chunk_commit_map
+            )
 
     def commit(self, message: str = "") -> str:
         """| Saves the current state of the dataset and returns the commit id.
@@ -356,6 +411,10 @@ class Dataset:
     def checkout(self, address: str, create: bool = False) -> str:
         """| Changes the state of the dataset to the address mentioned. Creates a new branch if address isn't a commit id or branch name and create is True.
         Always checks out to the head of a branch if the address specified is a branch name.
+        Creating a branch from the head of a branch with uncommitted changes commits them on that branch first,
+        with an automatic message, so both branches share them without copying chunks.
+        The current branch continues from a new commit id.
+        Without uncommitted changes the new branch starts from the last commit of the current branch.
 
         Returns the commit id of the commit that has been switched to.
 
@@ -385,17 +444,22 @@ class Dataset:
             self._branch = address
             new_commit_id = generate_hash()
             new_node = VersionNode(new_commit_id, self._branch)
-            if not self._version_node.children:
-                for key in self.keys:
-                    self._tensors[key].fs_map.copy_all_chunks(
-                        self._commit_id, new_commit_id
-                    )
-                if self._version_node.parent is not None:
-                    self._version_node.parent.insert(
-                        new_node, f"switched to new branch {address}"
+            base_node = self._version_node
+            if not base_node.children:
+                if base_node.parent is not None and not self._has_pending_chunks():
+                    # Nothing was written since the last commit, the new branch starts from it
+                    base_node = base_node.parent
+                else:
+                    # Uncommitted changes are shared with the new branch without copying chunks:
+                    # the current node is frozen and both branches continue from it
+                    head_node = VersionNode(generate_hash(), base_node.branch)
+                    base_node.insert(
+                        head_node,
+                        f"[auto] uncommitted changes of branch {head_node.branch} before creating branch {address}",
                     )
-            else:
-                self._version_node.insert(new_node, f"switched to new branch {address}")
+                    self._branch_node_map[head_node.branch] = head_node
+                    self._commit_node_map[head_node.commit_id] = head_node
+            base_node.insert(new_node, f"switched to new branch {address}")
             self._version_node = new_node
             self._commit_id = new_commit_id
             self._branch_node_map[self._branch] = new_node
@@ -405,6 +469,14 @@ class Dataset:
             raise AddressNotFound(address)
         return self._commit_id
 
+    def _has_pending_chunks(self) -> bool:
+        """True if any chunk was written in the current commit"""
+        return any(
+            self._commit_id in commit_ids
+            for _, path in self._flat_tensors
+            for commit_ids in self._chunk_commit_map[path].values()
+        )
+
     def _auto_checkout(self):
         """| Automatically checks out to a new branch if the current commit is not at the head of a branch"""
         if self._version_node and self._version_node.children:
@@ -477,7 +549,7 @@ class Dataset:
             t_dtype, t_path = t
             path = posixpath.join(self._path, t_path[1:])
             self._fs.makedirs(posixpath.join(path, "--dynamic--"))
-            yield t_path, DynamicTensor(
+            yield t_path, _get_tensor_class(t_dtype)(
                 fs_map=MetaStorage(
                     t_path,
                     get_storage_map(
@@ -486,6 +558,7 @@ class Dataset:
                         self._cache,
                         self.lock_cache,
                         storage_cache=self._storage_cache,
+                        cacheable=self._is_frozen_chunk,
                     ),
                     self._fs_map,
                     self,
@@ -498,27 +571,54 @@ class Dataset:
                 compressor=_get_compressor(t_dtype.compressor),
             )
 
-    def _open_storage_tensors(self):
-        for t in self._flat_tensors:
-            t_dtype, t_path = t
-            path = posixpath.join(self._path, t_path[1:])
-            yield t_path, DynamicTensor(
-                fs_map=MetaStorage(
-                    t_path,
-                    get_storage_map(
-                        self._fs,
-                        path,
-                        self._cache,
-                        self.lock_cache,
-                        storage_cache=self._storage_cache,
-                    ),
-                    self._fs_map,
-                    self,
+    def _stored_uncompressed(self, t_path) -> bool:
+        """True if chunks of the tensor at t_path are stored without compression"""
+        for key in (".zarray", PACKED_META):
+            tensor_meta = (self.meta.get(key) or {}).get(t_path)
+            if tensor_meta:
+                return tensor_meta.get("compressor") is None
+        return False
+
+    def _is_frozen_chunk(self, key: str) -> bool:
+        """True if key is a chunk of a committed version or any version chunk of a read only dataset,
+        such chunks don't change while the dataset is open and can be cached on disk
+        """
+        commit_id = key.rsplit(":", 1)[1] if ":" in key else None
+        node = (
+            self._commit_node_map.get(commit_id)
+            if commit_id and self._commit_node_map
+            else None
+        )
+        return node is not None and (bool(node.children) or "r" in self._mode)
+
+    def _open_storage_tensors(self, paths=None, mode=None):
+        for t_dtype, t_path in self._flat_tensors:
+            if paths is not None and t_path not in paths:
+                continue
+            yield t_path, self._open_storage_tensor(t_dtype, t_path, mode=mode)
+
+    def _open_storage_tensor(self, t_dtype, t_path, mode=None):
+        path = posixpath.join(self._path, t_path[1:])
+        return _get_tensor_class(t_dtype)(
+            fs_map=MetaStorage(
+                t_path,
+                get_storage_map(
+                    self._fs,
+                    path,
+                    self._cache,
+                    self.lock_cache,
+                    storage_cache=self._storage_cache,
+                    # Writes through memory maps would rewrite whole chunk files per sample
+                    mmap="r" in self._mode and self._stored_uncompressed(t_path),
+                    cacheable=self._is_frozen_chunk,
                 ),
-                mode=self._mode,
-                # FIXME We don't need argument below here
-                shape=self._shape + t_dtype.shape,
-            )
+                self._fs_map,
+                self,
+            ),
+            mode=mode or self._mode,
+            # FIXME We don't need argument below here
+            shape=self._shape + t_dtype.shape,
+        )
 
     def __getitem__(self, slice_):
         """| Gets a slice or slices from dataset
@@ -643,6 +743,27 @@ class Dataset:
         indexes = [index for index in self.indexes if fn(self[index])]
         return DatasetView(dataset=self, lazy=self.lazy, indexes=indexes)
 
+    def select(self, keys):
+        """| Gets a DatasetView of all samples that holds only the selected tensors
+        | Other tensors are not read when iterating or computing the view, or when it is passed to transforms and framework loaders
+        | Usage:
+
+        >>> ds_view = ds.select(["image", "label"])
+        >>> for sample in ds_view: # masks and other tensors are never fetched
+        >>>     sample["image"].compute()
+
+        Parameters
+        ----------
+        keys: str or list of str
+            Keys of the tensors to keep, a key of a nested schema keeps all the tensors under it
+        """
+        return DatasetView(
+            dataset=self,
+            lazy=self.lazy,
+            indexes=self.indexes,
+            key_list=_select_keys(tuple(self.keys), keys),
+        )
+
     def store(
         self,
         url: str,
@@ -722,6 +843,115 @@ class Dataset:
             )
         return hub.Dataset(destination, token=token, fs=fs, public=public)
 
+    def rechunk(self, chunks: dict, workers: int = defaults.DEFAULT_RECHUNK_WORKERS):
+        """| Changes chunks of tensors
+        Chunks are streamed from the old layout to a new one stored under new keys, workers new chunks at a time.
+        Chunks of every commit are rewritten, so all versions of the dataset keep their data.
+        The dataset switches to the new layout with a single write of meta.json, old chunks are removed after that,
+        so an interrupted rechunk leaves the dataset in the old layout.
+
+        Parameters
+        ----------
+        chunks: dict
+            Maps tensor key to its new chunks, given the same way as chunks of schema
+            (number of samples per chunk or the whole chunk shape)
+        workers: int, optional
+            Number of chunks written in parallel
+        """
+        if "r" in self._mode:
+            raise ReadModeException("rechunk")
+        self.flush()
+        for key, tensor_chunks in chunks.items():
+            path = key if key.startswith("/") else "/" + key
+            if path not in self._tensors:
+                raise KeyError(f"Key {key} not found in the dataset")
+            tensor = self._tensors[path]
+            if isinstance(tensor, PackedTensor):
+                raise ValueError(f"{key} is a packed tensor, it has no chunk shape")
+            tensor_chunks = _normalize_chunks(tensor_chunks)
+            new_chunks = ShapeDetector(
+                tensor.shape, tensor.max_shape, tensor_chunks, tensor.dtype
+            ).chunks
+            storage = tensor.fs_map._fs_map
+            zarr_meta = json.loads(tensor.fs_map[".zarray"])
+            layouts = self.meta.setdefault(LAYOUT_META, {})
+            old_layout, layout = layouts.get(path), generate_hash()
+
+            def layout_keys(names):
+                for name in names:
+                    name_layout, chunk = split_layout_key(name)
+                    if name_layout == old_layout and is_chunk_key(chunk):
+                        yield name, chunk
+
+            if self._commit_id is None:
+                old_keys = dict(layout_keys(storage))
+                versions = {
+                    "": (list(old_keys.values()), lambda k: layout_key(old_layout, k))
+                }
+            else:
+                chunk_commits = self._chunk_commit_map[path]
+                stored, old_keys = defaultdict(list), []
+                for name, chunk in layout_keys(list(chunk_commits)):
+                    for commit_id in chunk_commits[name]:
+                        stored[commit_id].append(chunk)
+                        old_keys.append((name, commit_id))
+
+                def resolver(index):
+                    def resolve(k):
+                        name = layout_key(old_layout, k)
+                        commit_id = index.get(name)
+                        return f"{name}:{commit_id}" if commit_id else None
+
+                    return resolve
+
+                versions = {
+                    f":{commit_id}": (
+                        keys,
+                        resolver(
+                            ChunkIndex(chunk_commits, self._commit_node_map[commit_id])
+                        ),
+                    )
+                    for commit_id, keys in stored.items()
+                }
+            result = rechunk(
+                storage, zarr_meta, new_chunks, versions, layout, workers=workers
+            )
+            if self._commit_id is not None:
+                for suffix, new_keys in result.items():
+                    for chunk in new_keys:
+                        chunk_commits[layout_key(layout, chunk)].add(suffix[1:])
+                        self._version_log.chunk_added(
+                            path, layout_key(layout, chunk), suffix[1:]
+                        )
+                self._store_version_info()
+                self._fs_map.flush()
+            # The switch to the new layout
+            zarr_meta["chunks"] = list(new_chunks)
+            tensor.fs_map[".zarray"] = bytes(json.dumps(zarr_meta), "utf-8")
+            layouts[path] = layout
+            for t_dtype, t_path in self._flat_tensors:
+                if t_path == path:
+                    t_dtype.chunks = tensor_chunks
+            self._store_meta()
+            self._fs_map.flush()
+            self._chunk_index.pop(path, None)
+
+            if self._commit_id is None:
+                remove_chunks(storage, list(old_keys), workers=workers)
+            else:
+                for name, commit_id in old_keys:
+                    chunk_commits[name].discard(commit_id)
+                    self._version_log.chunk_removed(path, name, commit_id)
+                remove_chunks(
+                    storage,
+                    [f"{name}:{commit_id}" for name, commit_id in old_keys],
+                    workers=workers,
+                )
+            self._tensors[path] = dict(self._open_storage_tensors([path], mode="a"))[
+                path
+            ]
+        self.flush()
+
     def resize_shape(self, size: int) -> None:
         """ Resize the shape of the dataset by resizing each tensor first dimension """
         if size == self._shape[0]:
@@ -849,8 +1079,37 @@ class Dataset:
 
     def __iter__(self):
         """ Returns Iterable over samples """
-        for i in range(len(self)):
-            yield self[i]
+        with self.prefetch(range(len(self))) as prefetcher:
+            for i in prefetcher:
+                yield self[i]
+
+    def prefetch(self, indexes, keys=None) -> Prefetcher:
+        """| Starts reading the chunks of samples at indexes in the background, in the order of indexes
+        | The returned Prefetcher iterates over indexes, or the reader reports its position in indexes with consume()
+        | Only tensors stored behind a memory or disk cache are prefetched, the cache keeps the chunks until they are read
+
+        Parameters
+        ----------
+        indexes: iterable of int
+            Sample indexes in the order they are going to be read
+        keys: list of str, optional
+            Paths of the tensors to prefetch, all tensors by default
+        """
+        if not self._cache:
+            # Without a cache prefetched chunks would be thrown away and read again
+            return Prefetcher([], indexes)
+        tensors = [
+            self._tensors[key] for key in self._tensors if keys is None or key in keys
+        ]
+        tensors = [
+            tensor
+            for tensor in tensors
+            if isinstance(
+                getattr(tensor.chunk_store, "_fs_map", tensor.chunk_store),
+                (LRUCache, DiskCache),
+            )
+        ]
+        return Prefetcher(tensors, indexes, max_size=self._cache // 2)
 
     def __len__(self):
         """ Number of samples in the dataset """
@@ -863,9 +1122,10 @@ class Dataset:
         self.lazy = True
 
     def _save_meta(self):
-        _meta = json.loads(self._fs_map[defaults.META_FILE])
-        _meta["meta_info"] = self._meta_information
-        self._fs_map[defaults.META_FILE] = json.dumps(_meta).encode("utf-8")
+        if self.meta.get("meta_info") != self._meta_information:
+            self.meta["meta_info"] = copy.deepcopy(self._meta_information)
+            self._meta_dirty = True
+        self._flush_meta()
 
     def flush(self):
         """Save changes from cache to dataset final storage. Doesn't create a new commit.
@@ -874,7 +1134,7 @@ class Dataset:
         if "r" in self._mode:
             return
         self._store_version_info()
-        for t in self._tensors.values():
+        for t in self._tensors.opened():
             t.flush()
         self._save_meta()
         self._fs_map.flush()
@@ -891,7 +1151,7 @@ class Dataset:
         This invalidates this object.
         """
         self.flush()
-        for t in self._tensors.values():
+        for t in self._tensors.opened():
             t.close()
         self._fs_map.close()
         self._update_dataset_state()
@@ -902,7 +1162,7 @@ class Dataset:
                 self.username, self.dataset_name, "UPLOADED"
             )
 
-    def numpy(self, label_name=False):
+    def numpy(self, label_name=False, columnar=False):
         """Gets the values from different tensorview objects in the dataset schema
 
         Parameters
@@ -910,15 +1170,14 @@ class Dataset:
         label_name: bool, optional
             If the TensorView object is of the ClassLabel type, setting this to True would retrieve the label names
             instead of the label encoded integers, otherwise this parameter is ignored.
+        columnar: bool, optional
+            Setting this to True returns a dict with an array of values per tensor instead of an array of per sample dicts.
         """
-        return np.array(
-            [
-                create_numpy_dict(self, i, label_name=label_name)
-                for i in range(self._shape[0])
-            ]
+        return create_numpy_batch(
+            self, list(range(self._shape[0])), label_name=label_name, columnar=columnar
         )
 
-    def compute(self, label_name=False):
+    def compute(self, label_name=False, columnar=False):
         """Gets the values from different tensorview objects in the dataset schema
 
         Parameters
@@ -926,8 +1185,10 @@ class Dataset:
         label_name: bool, optional
             If the TensorView object is of the ClassLabel type, setting this to True would retrieve the label names
             instead of the label encoded integers, otherwise this parameter is ignored.
+        columnar: bool, optional
+            Setting this to True returns a dict with an array of values per tensor instead of an array of per sample dicts.
         """
-        return self.numpy(label_name=label_name)
+        return self.numpy(label_name=label_name, columnar=columnar)
 
     def __str__(self):
         return (
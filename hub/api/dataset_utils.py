@@ -4,10 +4,14 @@ This Source Code Form is subject to the terms of the Mozilla Public License, v.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
 
-import os
+import threading
 import time
+from collections.abc import MutableMapping
 from typing import Union, Iterable, List
 from hub.store.store import get_fs_and_path
+from hub.store.copier import copy_tree, is_copy_in_progress
+from hub.store.dynamic_tensor import DynamicTensor
+from hub.store.packed_tensor import PackedTensor
 import numpy as np
 import sys
 from hub.exceptions import (
@@ -20,9 +24,10 @@ import time
 import numcodecs
 import numcodecs.lz4
 import numcodecs.zstd
-from hub.schema.features import Primitive, SchemaDict, Tensor
+from hub.schema.features import Primitive, SchemaDict, Tensor, featurify
 from hub.numcodecs import PngCodec
-from hub.schema import ClassLabel
+from hub.schema import ClassLabel, Text
+from hub import defaults
 
 
 def slice_split(slice_):
@@ -116,7 +121,7 @@ def slice_extract_info(slice_, num):
     return num, offset
 
 
-def create_numpy_dict(dataset, index, label_name=False):
+def create_numpy_dict(dataset, index, label_name=False, keys=None):
     """Creates a list of dictionaries with the values from the tensorview objects in the dataset schema.
 
     Parameters
@@ -128,9 +133,11 @@ def create_numpy_dict(dataset, index, label_name=False):
     label_name: bool, optional
         If the TensorView object is of the ClassLabel type, setting this to True would retrieve the label names
         instead of the label encoded integers, otherwise this parameter is ignored.
+    keys: tuple, optional
+        Paths of the tensors to read, all tensors of the dataset by default.
     """
     numpy_dict = {}
-    for path in dataset._tensors.keys():
+    for path in dataset._tensors.keys() if keys is None else keys:
         d = numpy_dict
         split = path.split("/")
         for subpath in split[1:-1]:
@@ -141,6 +148,171 @@ def create_numpy_dict(dataset, index, label_name=False):
     return numpy_dict
 
 
+def create_numpy_batch(dataset, indexes, label_name=False, keys=None, columnar=False):
+    """Reads the samples at indexes of the dataset, each tensor is read once in chunk aligned blocks.
+
+    Parameters
+    ----------
+    dataset: hub.api.dataset.Dataset object
+        The dataset whose samples are being read.
+    indexes: list of int
+        The indexes of the dataset records that are being read.
+    label_name: bool, optional
+        If the tensor is of the ClassLabel type, setting this to True would retrieve the label names
+        instead of the label encoded integers, otherwise this parameter is ignored.
+    keys: tuple, optional
+        Paths of the tensors to read, all tensors of the dataset by default.
+    columnar: bool, optional
+        Setting this to True returns a nested dict with a column of values per tensor
+        instead of an array of per sample dicts like create_numpy_dict.
+        Columns of tensors with static shapes are numpy arrays, the others are lists.
+    """
+    keys = tuple(dataset._tensors.keys()) if keys is None else keys
+    tokenizer = None
+    columns = {}
+    for path in keys:
+        tensor = dataset._tensors[path]
+        dtype = _dtype_from_path(dataset.schema, path)
+        decoded = isinstance(dtype, Text) or (
+            label_name and isinstance(dtype, ClassLabel)
+        )
+        if isinstance(dtype, Text) and dataset.tokenizer is not None and not tokenizer:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained("bert-base-cased")
+        if not decoded and not tensor.is_dynamic:
+            columns[path] = _read_column(tensor, indexes)
+            continue
+        samples = _read_samples(tensor, indexes)
+        columns[path] = [
+            _decode_sample(dtype, samples[index], label_name, tokenizer)
+            for index in indexes
+        ]
+    if columnar:
+        return _nest_paths(columns)
+    return np.array(
+        [
+            _nest_paths({path: columns[path][i] for path in keys})
+            for i in range(len(indexes))
+        ]
+    )
+
+
+def _read_blocks(tensor, indexes):
+    """Reads the samples at indexes of a storage tensor in blocks of consecutive chunks that hold requested samples,
+    so each chunk is decoded once and chunks without requested samples are skipped.
+    Yields sorted list of indexes of each block and the values read for the block, starting at the first index
+    """
+    chunk = tensor.chunks[0]
+    sample_size = int(np.prod(tensor.max_shape[1:])) * np.dtype(tensor.dtype).itemsize
+    block_chunks = max(
+        1, defaults.DEFAULT_BATCH_READ_SIZE // max(1, sample_size * chunk)
+    )
+    block = []
+    for index in sorted(set(indexes)):
+        if block and (
+            index // chunk > block[-1] // chunk + 1
+            or index // chunk >= block[0] // chunk + block_chunks
+        ):
+            yield block, tensor[block[0] : block[-1] + 1]
+            block = []
+        block.append(index)
+    if block:
+        yield block, tensor[block[0] : block[-1] + 1]
+
+
+def _read_samples(tensor, indexes):
+    """Reads the samples at indexes of a storage tensor, returns dict mapping index to sample"""
+    samples = {}
+    for block, values in _read_blocks(tensor, indexes):
+        for index in block:
+            samples[index] = values[index - block[0]]
+    return samples
+
+
+def _read_column(tensor, indexes) -> np.ndarray:
+    """Reads the samples at indexes of a storage tensor with static shape into a single array"""
+    indexes = np.asarray(indexes, dtype="int64")
+    unique = np.unique(indexes)
+    parts = [
+        values[np.asarray(block) - block[0]]
+        for block, values in _read_blocks(tensor, unique.tolist())
+    ]
+    if not parts:
+        return np.zeros((0,) + tuple(tensor.shape[1:]), dtype=tensor.dtype)
+    return np.concatenate(parts)[np.searchsorted(unique, indexes)]
+
+
+def _decode_sample(dtype, value, label_name=False, tokenizer=None):
+    """Converts a single sample of a ClassLabel or Text tensor the same way as TensorView.numpy()"""
+    if isinstance(dtype, ClassLabel) and label_name:
+        value = np.asarray(value)
+        if value.ndim == 0:
+            return dtype.int2str(value)
+        elif value.ndim == 1:
+            return [dtype.int2str(value[i]) for i in range(value.size)]
+    if isinstance(dtype, Text):
+        value = np.asarray(value)
+        if tokenizer is not None:
+            if value.ndim == 1:
+                return tokenizer.decode(value.tolist())
+            elif value.ndim == 2:
+                return [tokenizer.decode(val.tolist()) for val in value]
+        elif value.ndim == 1:
+            return "".join(chr(it) for it in value.tolist())
+        elif value.ndim == 2:
+            return ["".join(chr(it) for it in val.tolist()) for val in value]
+        raise ValueError(f"Unexpected value with shape for text {value.shape}")
+    return value
+
+
+def _dtype_from_path(schema, path):
+    """Gets the schema of the tensor at path"""
+    cur_type = schema
+    for subpath in path.split("/")[1:]:
+        cur_type = featurify(cur_type).dict_[subpath]
+    return cur_type
+
+
+def _nest_paths(flat: dict) -> dict:
+    """Converts dict of tensor paths to nested dict following the schema"""
+    nested = {}
+    for path, value in flat.items():
+        split = path.split("/")
+        cur = nested
+        for subpath in split[1:-1]:
+            cur = cur.setdefault(subpath, {})
+        cur[split[-1]] = value
+    return nested
+
+
+def _select_keys(keys, selection):
+    """Paths of tensors among keys selected by selection, a key selects itself and all the tensors nested under it"""
+    if isinstance(selection, str):
+        selection = [selection]
+    selected = set()
+    for key in selection:
+        path = "/" + key.strip("/")
+        matched = {k for k in keys if k == path or k.startswith(path + "/")}
+        if not matched:
+            raise KeyError(f"Key {key} not found in the dataset")
+        selected |= matched
+    return tuple(k for k in keys if k in selected)
+
+
+def _select_schema(schema: SchemaDict, keys, root: str = "") -> SchemaDict:
+    """Subset of schema holding only the tensors at paths in keys"""
+    dict_ = {}
+    for name, value in featurify(schema).dict_.items():
+        path = f"{root}/{name}"
+        if isinstance(value, SchemaDict):
+            if any(key.startswith(path + "/") for key in keys):
+                dict_[name] = _select_schema(value, keys, path)
+        elif path in keys:
+            dict_[name] = value
+    return SchemaDict(dict_)
+
+
 def get_value(value):
     if isinstance(value, np.ndarray) and value.shape == ():
         value = value.item()
@@ -214,25 +386,14 @@ def _copy_helper(
     dst_fs, dst_url = (
         (fs, dst_url) if fs else get_fs_and_path(dst_url, token=token, public=public)
     )
-    if dst_fs.exists(dst_url) and dst_fs.ls(dst_url):
+    if (
+        dst_fs.exists(dst_url)
+        and dst_fs.ls(dst_url)
+        and not is_copy_in_progress(dst_fs, dst_url)
+    ):
         raise DirectoryNotEmptyException(dst_url)
-    for path in src_fs.ls(src_url, refresh=True):
-        dst_full_path = dst_url + path[len(src_url) :]
-        dst_folder_path, dst_file = os.path.split(dst_full_path)
-        if src_fs.isfile(path):
-            if not dst_fs.exists(dst_folder_path):
-                dst_fs.mkdir(dst_folder_path)
-            content = src_fs.cat_file(path)
-            dst_fs.pipe_file(dst_full_path, content)
-        else:
-            _copy_helper(
-                dst_full_path,
-                token=token,
-                fs=dst_fs,
-                public=public,
-                src_url=path,
-                src_fs=src_fs,
-            )
+    src_fs.invalidate_cache(src_url)
+    copy_tree(src_fs, src_url, dst_fs, dst_url)
     return dst_url
 
 
@@ -264,6 +425,66 @@ def _get_dynamic_tensor_dtype(t_dtype):
         return "object"
 
 
+def _get_tensor_class(t_dtype):
+    if getattr(t_dtype, "layout", "padded") == "packed":
+        return PackedTensor
+    return DynamicTensor
+
+
+class _LazyTensors(MutableMapping):
+    """Storage tensors of a dataset (tensor path -> tensor) that are opened on first access
+
+    opener(t_dtype, t_path) opens the tensor, iterating the mapping lists all paths without opening them
+    """
+
+    def __init__(self, flat_tensors, opener):
+        self._dtypes = {t_path: t_dtype for t_dtype, t_path in flat_tensors}
+        self._opener = opener
+        self._opened = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, path):
+        try:
+            return self._opened[path]
+        except KeyError:
+            if path not in self._dtypes:
+                raise
+        with self._lock:
+            if path not in self._opened:
+                self._opened[path] = self._opener(self._dtypes[path], path)
+            return self._opened[path]
+
+    def __setitem__(self, path, tensor):
+        self._dtypes.setdefault(path, None)
+        self._opened[path] = tensor
+
+    def __delitem__(self, path):
+        del self._dtypes[path]
+        self._opened.pop(path, None)
+
+    def __contains__(self, path):
+        return path in self._dtypes
+
+    def __iter__(self):
+        return iter(self._dtypes)
+
+    def __len__(self):
+        return len(self._dtypes)
+
+    def opened(self):
+        """Tensors opened so far, the only ones that may hold unflushed changes"""
+        return list(self._opened.values())
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
 def _get_compressor(compressor: str):
     if compressor is None:
         return None
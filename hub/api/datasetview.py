@@ -7,17 +7,19 @@ from typing import Iterable
 from hub.api.tensorview import TensorView
 import collections.abc as abc
 from hub.api.dataset_utils import (
+    create_numpy_batch,
     create_numpy_dict,
     get_value,
     slice_split,
     str_to_int,
     _store_helper,
+    _select_keys,
+    _select_schema,
     check_class_label,
 )
 from hub.exceptions import NoneValueException
 from hub.api.objectview import ObjectView
 from hub.schema import Sequence, ClassLabel, Text, SchemaDict
-import numpy as np
 
 
 class DatasetView:
@@ -26,6 +28,7 @@ class DatasetView:
         dataset=None,
         lazy: bool = True,
         indexes=None,  # list or integer
+        key_list=None,
     ):
         """Creates a DatasetView object for a subset of the Dataset.
 
@@ -37,6 +40,9 @@ class DatasetView:
             Setting this to False will stop lazy computation and will allow items to be accessed without .compute()
         indexes: optional
             It can be either a list or an integer depending upon the slicing. Represents the indexes that the datasetview is representing.
+        key_list: tuple, optional
+            Paths of the tensors the datasetview is representing, all tensors of the dataset by default.
+            Other tensors are never read through the datasetview.
         """
         if dataset is None:
             raise NoneValueException("dataset")
@@ -46,6 +52,7 @@ class DatasetView:
         self.dataset = dataset
         self.lazy = lazy
         self.indexes = indexes
+        self.key_list = tuple(key_list) if key_list is not None else None
         self.is_contiguous = False
         if isinstance(self.indexes, list) and self.indexes:
             self.is_contiguous = self.indexes[-1] - self.indexes[0] + 1 == len(
@@ -68,7 +75,12 @@ class DatasetView:
             if len(slice_list) > 1:
                 raise ValueError("Can't slice dataset with multiple slices without key")
             indexes = self.indexes[slice_list[0]]
-            return DatasetView(dataset=self.dataset, lazy=self.lazy, indexes=indexes)
+            return DatasetView(
+                dataset=self.dataset,
+                lazy=self.lazy,
+                indexes=indexes,
+                key_list=self.key_list,
+            )
         elif not slice_list:
             slice_ = (
                 [slice(self.indexes[0], self.indexes[-1] + 1)]
@@ -206,11 +218,39 @@ class DatasetView:
             dsv = self.dataset[self.indexes]
             if fn(dsv):
                 return DatasetView(
-                    dataset=self.dataset, lazy=self.lazy, indexes=self.indexes
+                    dataset=self.dataset,
+                    lazy=self.lazy,
+                    indexes=self.indexes,
+                    key_list=self.key_list,
                 )
         else:
             indexes = [index for index in self.indexes if fn(self.dataset[index])]
-        return DatasetView(dataset=self.dataset, lazy=self.lazy, indexes=indexes)
+        return DatasetView(
+            dataset=self.dataset,
+            lazy=self.lazy,
+            indexes=indexes,
+            key_list=self.key_list,
+        )
+
+    def select(self, keys):
+        """| Gets a DatasetView of the same samples that holds only the selected tensors
+        | Other tensors are not read when iterating or computing the view, or when it is passed to transforms and framework loaders
+        | Usage:
+
+        >>> ds_view = ds[5:15].select(["image", "label"])
+        >>> ds_view.numpy() # reads only images and labels
+
+        Parameters
+        ----------
+        keys: str or list of str
+            Keys of the tensors to keep, a key of a nested schema keeps all the tensors under it
+        """
+        return DatasetView(
+            dataset=self.dataset,
+            lazy=self.lazy,
+            indexes=self.indexes,
+            key_list=_select_keys(tuple(self.keys), keys),
+        )
 
     def store(
         self,
@@ -257,10 +297,14 @@ class DatasetView:
         """
         Get Keys of the dataset
         """
+        if self.key_list is not None:
+            return self.key_list
         return self.dataset._tensors.keys()
 
     @property
     def schema(self):
+        if self.key_list is not None:
+            return _select_schema(self.dataset.schema, self.key_list)
         return self.dataset.schema
 
     def _get_dictionary(self, subpath, slice_):
@@ -293,8 +337,10 @@ class DatasetView:
             yield self
             return
 
-        for i in range(len(self.indexes)):
-            yield self[i]
+        with self.dataset.prefetch(self.indexes, keys=self.key_list) as prefetcher:
+            for i in range(len(self.indexes)):
+                prefetcher.consume(i)
+                yield self[i]
 
     def __len__(self):
         return len(self.indexes) if isinstance(self.indexes, list) else 1
@@ -319,7 +365,9 @@ class DatasetView:
         """
 
         return self.dataset.to_tensorflow(
-            indexes=self.indexes, include_shapes=include_shapes, key_list=key_list
+            indexes=self.indexes,
+            include_shapes=include_shapes,
+            key_list=key_list or self.key_list,
         )
 
     def to_pytorch(
@@ -351,7 +399,7 @@ class DatasetView:
             indexes=self.indexes,
             inplace=inplace,
             output_type=output_type,
-            key_list=key_list,
+            key_list=key_list or self.key_list,
             shuffle=shuffle,
         )
 
@@ -371,7 +419,7 @@ class DatasetView:
         """Flush dataset"""
         self.dataset.flush()
 
-    def numpy(self, label_name=False):
+    def numpy(self, label_name=False, columnar=False):
         """Gets the value from different tensorview objects in the datasetview schema
 
         Parameters
@@ -379,15 +427,21 @@ class DatasetView:
         label_name: bool, optional
             If the TensorView object is of the ClassLabel type, setting this to True would retrieve the label names
             instead of the label encoded integers, otherwise this parameter is ignored.
+        columnar: bool, optional
+            Setting this to True returns a dict with an array of values per tensor instead of an array of per sample dicts,
+            ignored if the datasetview represents a single sample.
         """
         if isinstance(self.indexes, int):
-            return create_numpy_dict(self.dataset, self.indexes, label_name=label_name)
+            return create_numpy_dict(
+                self.dataset, self.indexes, label_name=label_name, keys=self.key_list
+            )
         else:
-            return np.array(
-                [
-                    create_numpy_dict(self.dataset, index, label_name=label_name)
-                    for index in self.indexes
-                ]
+            return create_numpy_batch(
+                self.dataset,
+                self.indexes,
+                label_name=label_name,
+                keys=self.key_list,
+                columnar=columnar,
             )
 
     def disable_lazy(self):
@@ -396,7 +450,7 @@ class DatasetView:
     def enable_lazy(self):
         self.lazy = True
 
-    def compute(self, label_name=False):
+    def compute(self, label_name=False, columnar=False):
         """Gets the value from different tensorview objects in the datasetview schema
 
         Parameters
@@ -404,5 +458,8 @@ class DatasetView:
         label_name: bool, optional
             If the TensorView object is of the ClassLabel type, setting this to True would retrieve the label names
             instead of the label encoded integers, otherwise this parameter is ignored.
+        columnar: bool, optional
+            Setting this to True returns a dict with an array of values per tensor instead of an array of per sample dicts,
+            ignored if the datasetview represents a single sample.
         """
-        return self.numpy(label_name=label_name)
+        return self.numpy(label_name=label_name, columnar=columnar)
@@ -186,9 +186,7 @@ def _to_tensorflow(dataset, indexes=None, include_shapes=False, key_list=None):
             raise KeyError(key)
     indexes = indexes or dataset.indexes
     indexes = [indexes] if isinstance(indexes, int) else indexes
-    _samples_in_chunks = {
-        key: value.chunks[0] for key, value in dataset._tensors.items()
-    }
+    _samples_in_chunks = {key: dataset._tensors[key].chunks[0] for key in key_list}
     _active_chunks = {}
     _active_chunks_range = {}
 
@@ -208,7 +206,7 @@ def _to_tensorflow(dataset, indexes=None, include_shapes=False, key_list=None):
         return _active_chunks[key][index % samples_per_chunk]
 
     def tf_gen():
-        key_dtype_map = {key: dataset[key, indexes[0]].dtype for key in dataset.keys}
+        key_dtype_map = {key: dataset[key, indexes[0]].dtype for key in key_list}
         for index in indexes:
             d = {}
             for key in dataset.keys:
@@ -607,6 +605,14 @@ class TorchDataset:
         elif len(indexes) > 0:
             self.last_index = indexes[-1]
         self.indexes = self.shuffle_indexes(indexes, shuffle)
+        self._prefetcher = None
+        self._plan_positions = None
+        self._worker_run = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_prefetcher"] = state["_plan_positions"] = state["_worker_run"] = None
+        return state
 
     def shuffle_indexes(self, indexes, shuffle):
         if not shuffle or isinstance(indexes, int):
@@ -625,11 +631,9 @@ class TorchDataset:
 
     def get_max_chunk(self, ds):
         max_chunk = 1
-        for key, value in ds._tensors.items():
-            if key in self.key_list:
-                max_chunk = max(
-                    max_chunk, ((None in value.shape) and 1 or value.chunks[0])
-                )
+        for key in self.key_list:
+            value = ds._tensors[key]
+            max_chunk = max(max_chunk, ((None in value.shape) and 1 or value.chunks[0]))
         return max_chunk
 
     def _do_transform(self, data):
@@ -644,8 +648,10 @@ class TorchDataset:
         if not self._inited:
             self._inited = True
             self._samples_in_chunks = {
-                key: (None in value.shape) and 1 or value.chunks[0]
-                for key, value in self._ds._tensors.items()
+                key: (None in self._ds._tensors[key].shape)
+                and 1
+                or self._ds._tensors[key].chunks[0]
+                for key in self.key_list
             }
             self._active_chunks = {}
             self._active_chunks_range = {}
@@ -669,6 +675,53 @@ class TorchDataset:
             ]
         return self._active_chunks[key][index % samples_per_chunk]
 
+    def _prefetch(self, ind):
+        """Keeps the chunks of the samples following ind in self.indexes loading in the background
+        DataLoader workers read every num_workers-th batch, each worker prefetches only its own batches
+        """
+        if isinstance(self.indexes, int) or self._worker_run is False:
+            return
+        if self._prefetcher is None:
+            worker_info = torch.utils.data.get_worker_info()
+            if worker_info is None:
+                plan = range(len(self.indexes))
+            else:
+                plan = self._worker_plan(ind, worker_info.num_workers)
+                if plan is None:
+                    return
+            self._plan_positions = {position: i for i, position in enumerate(plan)}
+            self._prefetcher = self._ds.prefetch(
+                [self.indexes[position] for position in plan], keys=self.key_list
+            )
+        if ind in self._plan_positions:
+            self._prefetcher.consume(self._plan_positions[ind])
+
+    def _worker_plan(self, ind, num_workers):
+        """Positions of self.indexes read by this DataLoader worker, None while they are not known yet
+        Workers read batches of consecutive positions in turns, the batch size is the length
+        of the first run of consecutive positions read by the worker
+        """
+        if self._worker_run is None:
+            self._worker_run = [ind, ind]
+            return None
+        start, last = self._worker_run
+        if ind == last + 1:
+            self._worker_run[1] = ind
+            return None
+        batch_size = last - start + 1
+        step = batch_size * num_workers
+        if ind != start + step:
+            # Positions don't come from a sequential sampler, the worker's share is unknown
+            self._worker_run = False
+            return None
+        return [
+            position
+            for batch_start in range(start, len(self.indexes), step)
+            for position in range(
+                batch_start, min(batch_start + batch_size, len(self.indexes))
+            )
+        ]
+
     def __getitem__(self, ind):
         if isinstance(self.indexes, int):
             if ind != 0:
@@ -677,6 +730,7 @@ class TorchDataset:
         else:
             index = self.indexes[ind]
         self._init_ds()
+        self._prefetch(ind)
         d = {}
         for key in self._ds._tensors.keys():
             if key not in self.key_list:
@@ -705,8 +759,19 @@ class TorchDataset:
 
     def __iter__(self):
         self._init_ds()
-        for i in range(len(self)):
-            yield self[i]
+        try:
+            for i in range(len(self)):
+                yield self[i]
+        finally:
+            self._close_prefetcher()
+
+    def _close_prefetcher(self):
+        if getattr(self, "_prefetcher", None) is not None:
+            self._prefetcher.close()
+            self._prefetcher = self._plan_positions = self._worker_run = None
+
+    def __del__(self):
+        self._close_prefetcher()
 
 
 def _from_supervisely(project, scheduler: str = "single", workers: int = 1):
@@ -600,6 +600,25 @@ def test_to_pytorch_shuffle():
         assert item["cl"].numpy() % 16 == i % 16
 
 
+def test_to_pytorch_worker_prefetch(monkeypatch):
+    torch = pytest.importorskip("torch")
+    ds = hub.Dataset(
+        "./data/test_pytorch_worker_prefetch",
+        schema={"cl": hub.schema.Primitive("int32", chunks=4)},
+        shape=(20,),
+        mode="w",
+    )
+    ds["cl"] = np.arange(20, dtype="int32")
+    pds = ds.to_pytorch(indexes=list(range(19, -1, -1)))
+    worker_info = type("WorkerInfo", (), {"id": 1, "num_workers": 3})
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: worker_info)
+    # Worker 1 of 3 with batches of 2 reads positions 2, 3, 8, 9, 14, 15
+    for position in (2, 3, 8):
+        assert pds[position]["cl"].item() == 19 - position
+    assert pds._prefetcher._indexes == [17, 16, 11, 10, 5, 4]
+    pds._close_prefetcher()
+
+
 if __name__ == "__main__":
     with Timer("Test Converters"):
         with Timer("from MNIST"):
@@ -14,7 +14,12 @@ import numpy as np
 import pytest
 import hub
 from hub import load, transform
-from hub.api.dataset_utils import slice_extract_info, slice_split, check_class_label
+from hub.api.dataset_utils import (
+    slice_extract_info,
+    slice_split,
+    check_class_label,
+    create_numpy_dict,
+)
 from hub.cli.auth import login_fn
 from hub.exceptions import (
     DirectoryNotEmptyException,
@@ -1335,6 +1340,105 @@ def test_dataset_schema_bug():
     ds2 = Dataset("./data/schema_bug_2", schema=schema, shape=(100,))
 
 
+def test_dataset_lazy_tensors():
+    schema = {f"col_{i}": Tensor((4,), dtype="int32") for i in range(20)}
+    ds = Dataset("./data/test/lazy_tensors", schema=schema, shape=(10,), mode="w")
+    ds["col_3", 2] = np.arange(4)
+    ds.close()
+
+    ds = Dataset("./data/test/lazy_tensors")
+    assert len(ds.keys) == 20 and "/col_7" in ds.keys
+    assert ds._tensors.opened() == []
+    assert ds["col_3", 2].compute().tolist() == [0, 1, 2, 3]
+    assert ds._tensors.opened() == [ds._tensors["/col_3"]]
+    ds["col_5", 1] = np.ones(4)
+    assert len(ds._tensors.opened()) == 2
+    new_ds = pickle.loads(pickle.dumps(ds))
+    assert new_ds["col_3", 2].compute().tolist() == [0, 1, 2, 3]
+    ds.close()
+    ds = Dataset("./data/test/lazy_tensors")
+    assert ds["col_5", 1].compute().tolist() == [1, 1, 1, 1]
+    with pytest.raises(KeyError):
+        ds._tensors["/missing"]
+
+
+def test_dataset_select():
+    schema = {
+        "image": Tensor((8, 8), dtype="uint8"),
+        "label": "int32",
+        "mask": Tensor((64, 64), dtype="uint8"),
+        "meta": {"id": "int64", "score": "float32"},
+    }
+    ds = Dataset("./data/test/select", schema=schema, shape=(6,), mode="w")
+    for i in range(6):
+        ds["image", i] = np.full((8, 8), i)
+        ds["label", i] = i
+        ds["meta/id", i] = 10 * i
+    ds.close()
+
+    ds = Dataset("./data/test/select")
+    view = ds.select(["image", "label"])
+    assert view.keys == ("/image", "/label")
+    assert list(view.schema.dict_) == ["image", "label"]
+    assert [sample["label"].compute() for sample in view] == list(range(6))
+    sample = view[2:4].numpy()[1]
+    assert sorted(sample) == ["image", "label"] and sample["label"] == 3
+    assert view[4].compute()["image"][0, 0] == 4
+    assert view.filter(lambda x: x["label"].compute() > 3).keys == view.keys
+    assert ds[1:3].select("meta").numpy()[0] == {"meta": {"id": 10, "score": 0.0}}
+    assert ds.select("label").select(["/label"]).keys == ("/label",)
+    with pytest.raises(KeyError):
+        view.select("mask")
+    with pytest.raises(KeyError):
+        ds.select("missing")
+    assert len(ds._tensors.opened()) == 4  # all tensors but the mask
+
+    ds2 = view.store("./data/test/select_store")
+    assert list(ds2.keys) == ["/image", "/label"]
+    assert ds2["label", 5].compute() == 5
+    assert ds2["image", 3].compute()[0, 0] == 3
+
+
+def test_dataset_numpy_batched():
+    schema = {
+        "image": Tensor((None, 4), dtype="uint8", max_shape=(6, 4), chunks=(3,)),
+        "label": ClassLabel(names=["cat", "dog"]),
+        "text": Text((None,), max_shape=(10,)),
+        "meta": {"score": Tensor((2,), dtype="float32", chunks=(4,))},
+    }
+    ds = Dataset("./data/test/numpy_batched", schema=schema, shape=(10,), mode="w")
+    for i in range(10):
+        ds["image", i] = np.full((i % 6 + 1, 4), i)
+        ds["label", i] = i % 2
+        ds["text", i] = "sample" + str(i)
+        ds["meta/score", i] = np.array([i, -i])
+
+    for label_name in (False, True):
+        expected = [create_numpy_dict(ds, i, label_name=label_name) for i in range(10)]
+        records = ds.numpy(label_name=label_name)
+        view_records = ds.filter(lambda x: x["label"].compute() == 1).compute()
+        for record, expected_record in zip(records, expected):
+            assert record["image"].tolist() == expected_record["image"].tolist()
+            assert record["label"] == expected_record["label"]
+            assert record["text"] == expected_record["text"]
+            assert (
+                record["meta"]["score"].tolist()
+                == expected_record["meta"]["score"].tolist()
+            )
+        assert [record["text"] for record in view_records] == [
+            "sample" + str(i) for i in range(1, 10, 2)
+        ]
+
+    columns = ds[2:9].numpy(columnar=True, label_name=True)
+    assert columns["meta"]["score"].shape == (7, 2)
+    assert columns["meta"]["score"][:, 0].tolist() == list(range(2, 9))
+    assert [image.shape for image in columns["image"]] == [
+        (i % 6 + 1, 4) for i in range(2, 9)
+    ]
+    assert columns["label"] == ["cat", "dog"] * 3 + ["cat"]
+    assert ds.select("meta").compute(columnar=True)["meta"]["score"].shape == (10, 2)
+
+
 def test_dataset_google():
     ds = Dataset("google/bike")
     assert ds["image_channels", 0].compute() == 3
@@ -1405,3 +1509,6 @@ if __name__ == "__main__":
     test_dataset_utils()
     # test_check_label_name()
     test_class_label_value()
+    test_dataset_lazy_tensors()
+    test_dataset_select()
+    test_dataset_numpy_batched()
@@ -3,10 +3,64 @@ from hub.exceptions import (
     ReadModeException,
     VersioningNotSupportedException,
 )
-from hub.schema import Image
+from hub.schema import Image, Tensor
+from hub.api import versioning
+from hub.api.versioning import ChunkIndex, VersionLog, VersionNode
 import hub
+from hub import defaults
+from hub.store.disk_cache import DiskCache
+import json
 import numpy as np
+import os
+import pickle
 import pytest
+import zarr
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_chunk_index():
+    root = VersionNode("a", "master")
+    child = VersionNode("b", "master")
+    child.parent = root
+    other = VersionNode("c", "other")
+    other.parent = root
+    chunk_commits = {"0.0": {"a", "b"}, "1.0": {"a"}, "2.0": {"c"}}
+    index = ChunkIndex(chunk_commits, child)
+    assert index.get("0.0") == "b"
+    assert index.get("1.0") == "a"
+    assert index.get("2.0") is None
+    assert index.get("3.0") is None
+
+    chunk_commits["0.0"].remove("b")
+    index.update("0.0", chunk_commits["0.0"])
+    assert index.get("0.0") == "a"
+    for i in range(2000):
+        index.update(f"{i}.1", {"b"})
+    assert index.get("1999.1") == "b"
+    assert index.get("1.0") == "a"
+    index.update("1.0", set())
+    index._compact()
+    assert index.get("1.0") is None
+    assert index.get("0.0") == "a"
+
+
+def test_chunk_index_threads():
+    # Partial writes look chunks up while other threads update and compact the index
+    ds = hub.Dataset(
+        "./data/test_versioning/chunk_index_threads",
+        shape=(3000,),
+        schema={"abc": Tensor((4,), "int32", chunks=1)},
+        mode="w",
+    )
+    ds.commit("first")
+
+    def write(i):
+        ds["abc", i, 0:2] = [i, i]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write, range(3000)))
+    for i in range(0, 3000, 7):
+        assert ds["abc", i].compute().tolist() == [i, i, 0, 0]
 
 
 def test_commit():
@@ -186,6 +240,185 @@ def test_auto_checkout_bug():
     assert ds["abc", 0].compute() == 3
 
 
+def test_version_log():
+    my_schema = {"abc": "uint32"}
+    path = "./data/test_versioning/version_log"
+    ds = hub.Dataset(path, shape=(10,), schema=my_schema, mode="w")
+    commits = []
+    for i in range(20):
+        ds["abc", 0] = i
+        commits.append(ds.commit(f"commit {i}"))
+    ds["abc", 1] = 5
+    ds.flush()
+    head = ds._fs_map[defaults.VERSION_LOG_HEAD]
+    ds.flush()
+    assert ds._fs_map[defaults.VERSION_LOG_HEAD] == head
+    assert json.loads(head)["deltas"] < defaults.VERSION_LOG_COMPACT
+    ds.close()
+
+    ds = hub.Dataset(path)
+    assert not dict.__len__(ds._chunk_commit_map)
+    assert ds["abc", 0].compute() == 19
+    assert ds["abc", 1].compute() == 5
+    ds.checkout(commits[3])
+    assert ds["abc", 0].compute() == 3
+    assert ds["abc", 1].compute() == 0
+    ds.checkout("master")
+    ds.close()
+
+    # Datasets with version.pkl only are read from it
+    ds._fs_map[defaults.VERSION_INFO] = pickle.dumps(
+        {
+            "branch_node_map": ds._branch_node_map,
+            "commit_node_map": ds._commit_node_map,
+            "chunk_commit_map": dict(ds._chunk_commit_map),
+        }
+    )
+    del ds._fs_map[defaults.VERSION_LOG_HEAD]
+    ds._fs_map.flush()
+    ds = hub.Dataset(path)
+    assert ds["abc", 0].compute() == 19
+    ds.checkout(commits[7])
+    assert ds["abc", 0].compute() == 7
+
+
+def test_version_log_recreated(tmp_path):
+    # Two machines sharing the dataset storage, each with its own disk cache of everything but the head
+    storage = zarr.MemoryStore()
+
+    def cacheable(key):
+        return key != defaults.VERSION_LOG_HEAD
+
+    def version_log(machine):
+        return VersionLog(
+            DiskCache(storage, str(tmp_path / machine), 2 ** 20, cacheable)
+        )
+
+    for commit_id in ("first", "second"):
+        # Each round recreates the dataset with a new log on machine a
+        node = VersionNode(commit_id, "master")
+        version_log("a").flush(
+            {"master": node}, {commit_id: node}, {"/abc": {"0": {commit_id}}}
+        )
+        version_info = version_log("b").load()
+        assert list(version_info["commit_node_map"]) == [commit_id]
+        assert version_info["chunk_commit_map"]["/abc"]["0"] == {commit_id}
+
+
+def test_branch_without_copy(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    my_schema = {"abc": "uint32"}
+    path = "./data/test_versioning/branch_without_copy"
+    ds = hub.Dataset(path, shape=(10,), schema=my_schema, mode="w")
+    ds["abc", 0] = 1
+    ds.flush()
+    chunks = set(os.listdir(os.path.join(path, "abc")))
+    master = ds._commit_id
+    ds.checkout("alt", create=True)
+    ds.flush()
+    assert set(os.listdir(os.path.join(path, "abc"))) == chunks
+    assert ds["abc", 0].compute() == 1
+    ds["abc", 0] = 2
+    ds.checkout("master")
+    # Uncommitted changes of master were committed automatically to share them with alt
+    assert ds._commit_id != master
+    assert ds._commit_node_map[master].message.startswith("[auto] ")
+    assert ds["abc", 0].compute() == 1
+    ds["abc", 0] = 3
+    ds.checkout("alt")
+    assert ds["abc", 0].compute() == 2
+    ds.checkout(master)
+    assert ds["abc", 0].compute() == 1
+
+
+def test_branch_after_commit(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    path = "./data/test_versioning/branch_after_commit"
+    ds = hub.Dataset(path, shape=(10,), schema={"abc": "uint32"}, mode="w")
+    ds["abc", 0] = 1
+    first = ds.commit("first")
+    head = ds._commit_id
+    ds.checkout("alt", create=True)
+    # Nothing was written since the commit, so there is nothing to freeze
+    assert ds._version_node.parent is ds._commit_node_map[first]
+    assert not ds._commit_node_map[head].children
+    assert all(
+        not node.message.startswith("[auto]")
+        for node in ds._commit_node_map.values()
+        if node.message
+    )
+    ds["abc", 0] = 2
+    ds.checkout("master")
+    assert ds._commit_id == head
+    assert ds["abc", 0].compute() == 1
+    ds["abc", 0] = 3
+    ds.checkout("alt")
+    assert ds["abc", 0].compute() == 2
+
+
+def test_rechunk(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    my_schema = {
+        "img": Tensor((None, 20), "int32", max_shape=(30, 20), chunks=2),
+        "abc": "uint32",
+    }
+    path = "./data/test_versioning/rechunk"
+    ds = hub.Dataset(path, shape=(10,), schema=my_schema, mode="w")
+    for i in range(10):
+        ds["img", i] = np.full((i + 1, 20), i, dtype="int32")
+        ds["abc", i] = i
+    first = ds.commit("first")
+    ds["img", 3] = np.full((4, 20), 33, dtype="int32")
+    ds.checkout("alt", create=True)
+    ds["img", 7] = np.full((8, 20), 77, dtype="int32")
+    ds.commit("alt")
+    ds.checkout("master")
+
+    ds.rechunk({"img": 8, "abc": 4})
+    assert ds["img"].chunksize == (8, 30, 20)
+    assert ds["abc"].chunksize == (4,)
+    assert (ds["img", 3].compute() == 33).all()
+    assert (ds["img", 7].compute() == 7).all()
+    assert ds["abc"].compute().tolist() == list(range(10))
+    ds.checkout("alt")
+    assert (ds["img", 7].compute() == 77).all()
+    assert (ds["img", 3].compute() == 33).all()
+    ds.checkout(first)
+    assert (ds["img", 3].compute() == 3).all()
+    ds.close()
+
+    ds = hub.Dataset(path)
+    assert ds["img"].chunksize == (8, 30, 20)
+    assert ds["img", 9].compute().shape == (10, 20)
+    assert (ds["img", 9].compute() == 9).all()
+    assert not [f for f in os.listdir(os.path.join(path, "img")) if f[0].isdigit()]
+
+
+def test_rechunk_interrupted(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    path = "./data/test_versioning/rechunk_interrupted"
+    ds = hub.Dataset(path, shape=(10,), schema={"abc": "uint32"}, mode="w")
+    ds["abc"] = np.arange(10, dtype="uint32")
+    ds.commit("first")
+    ds["abc", 3] = 33
+
+    def crash():
+        raise RuntimeError("crash")
+
+    with monkeypatch.context() as m:
+        m.setattr(ds, "_store_meta", crash)
+        with pytest.raises(RuntimeError):
+            ds.rechunk({"abc": 4})
+    ds = hub.Dataset(path)
+    assert ds["abc"].chunksize != (4,)
+    assert ds["abc"].compute().tolist() == [0, 1, 2, 33, 4, 5, 6, 7, 8, 9]
+    ds.rechunk({"abc": 4})
+    assert ds["abc"].chunksize == (4,)
+    ds = hub.Dataset(path)
+    assert ds["abc"].chunksize == (4,)
+    assert ds["abc"].compute().tolist() == [0, 1, 2, 33, 4, 5, 6, 7, 8, 9]
+
+
 def test_read_mode():
     my_schema = {"abc": "uint8"}
     ds = hub.Dataset("./data/test_versioning/read_ds", schema=my_schema, shape=(10,))
@@ -243,6 +476,8 @@ if __name__ == "__main__":
     test_commit_checkout()
     test_commit_checkout_2()
     test_auto_checkout_bug()
+    test_version_log()
+    test_branch_without_copy()
     test_read_mode()
     test_old_datasets()
     test_checkout_address_not_found()
@@ -3,8 +3,16 @@ License:
 This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
+from hub.api.dataset_utils import generate_hash
 from hub.store.store import get_user_name
+from hub import defaults
+from collections import defaultdict
 from datetime import datetime
+from urllib.parse import quote
+import json
+import pickle
+
+import numpy as np
 
 
 class VersionNode:
@@ -30,3 +38,266 @@ class VersionNode:
 
     def __str__(self) -> str:
         return self.__repr__()
+
+
+class ChunkIndex:
+    """Resolved chunk versions of a single tensor as seen from a version node
+
+    Maps chunk key to the commit id of the closest ancestor (or the node itself) that has the chunk,
+    so lookups don't walk the parent chain.
+    Resolved chunks are kept in sorted arrays, changes after materialization in a small overlay dict.
+    """
+
+    def __init__(self, chunk_commits: dict, node: VersionNode):
+        self.node = node
+        distance = {}
+        cur_node = node
+        while cur_node is not None:
+            distance[cur_node.commit_id] = len(distance)
+            cur_node = cur_node.parent
+        self._distance = distance
+        self._commits = list(distance)
+        resolved = []
+        for chunk, commit_ids in chunk_commits.items():
+            closest = self._closest(commit_ids)
+            if closest is not None:
+                resolved.append((chunk.encode("utf-8"), closest))
+        self._set_resolved(resolved)
+
+    def _set_resolved(self, resolved):
+        resolved.sort()
+        self._keys = np.array([chunk for chunk, _ in resolved], dtype=bytes)
+        self._values = np.array([closest for _, closest in resolved], dtype=np.int32)
+        self._overlay = {}
+
+    def _compact(self):
+        """Merges the overlay into the sorted arrays"""
+        resolved = dict(zip(self._keys.tolist(), self._values.tolist()))
+        for chunk, closest in self._overlay.items():
+            resolved[chunk.encode("utf-8")] = closest
+        self._set_resolved(
+            [
+                (chunk, closest)
+                for chunk, closest in resolved.items()
+                if closest is not None
+            ]
+        )
+
+    def _closest(self, commit_ids):
+        """Distance from node to the closest commit of commit_ids or None"""
+        distances = [self._distance[c] for c in commit_ids if c in self._distance]
+        return min(distances) if distances else None
+
+    def get(self, chunk: str) -> str:
+        """Returns commit id of the chunk version visible from node or None"""
+        if chunk in self._overlay:
+            closest = self._overlay[chunk]
+        else:
+            key = chunk.encode("utf-8")
+            i = np.searchsorted(self._keys, key)
+            if i == len(self._keys) or self._keys[i] != key:
+                return None
+            closest = self._values[i]
+        return None if closest is None else self._commits[closest]
+
+    def update(self, chunk: str, commit_ids):
+        """Re-resolves the chunk after the set of commits having it changed"""
+        self._overlay[chunk] = self._closest(commit_ids)
+        if len(self._overlay) > max(1024, len(self._keys)):
+            self._compact()
+
+
+class _ChunkCommitMap(dict):
+    """Chunk commit map (tensor path -> chunk -> set of commit ids) that loads tensors from the version log on first access"""
+
+    def __init__(self, log, paths):
+        super().__init__()
+        self._log = log
+        self._paths = set(paths)
+
+    def __missing__(self, path):
+        if path not in self._paths:
+            raise KeyError(path)
+        chunk_commits = self[path] = self._log._load_chunks(path)
+        return chunk_commits
+
+    def __bool__(self):
+        return bool(self._paths) or super().__len__() > 0
+
+    def paths(self):
+        return self._paths | set(self.keys())
+
+
+class VersionLog:
+    def __init__(self, storage, compact_after: int = defaults.VERSION_LOG_COMPACT):
+        """Append-only log of the version control info of a dataset
+
+        The log consists of a snapshot and the deltas appended after it, a small head file points to them.
+        Snapshot stores commit tree in one file and chunk commit map of each tensor in a separate file,
+        which is loaded only when the tensor is accessed.
+        Each flush appends a delta with just the changes since the previous flush,
+        after compact_after deltas a new snapshot replaces the old one.
+        Datasets with the legacy version.pkl are read from it and switch to the log on first flush.
+        """
+        self._storage = storage
+        self._compact_after = compact_after
+        self._snapshot = None
+        self._deltas = 0
+        self._written_nodes = {}
+        self._written_branches = {}
+        self._chunk_deltas = defaultdict(list)
+        self._pending_chunks = defaultdict(list)
+
+    def _key(self, *parts) -> str:
+        return "/".join((defaults.VERSION_LOG, str(self._snapshot)) + parts)
+
+    def _chunks_key(self, path) -> str:
+        return self._key("chunks", quote(path, safe=""))
+
+    @staticmethod
+    def _node_record(node: VersionNode):
+        return (
+            node.branch,
+            node.parent.commit_id if node.parent else None,
+            node.message,
+            node.commit_time,
+            node.commit_user_name,
+        )
+
+    def load(self) -> dict:
+        """Returns version info dict with branch_node_map, commit_node_map and chunk_commit_map
+        Raises KeyError if the dataset has no version info
+        """
+        try:
+            head = json.loads(self._storage[defaults.VERSION_LOG_HEAD])
+        except KeyError:
+            return pickle.loads(self._storage[defaults.VERSION_INFO])
+        self._snapshot, self._deltas = head["snapshot"], head["deltas"]
+        snapshot = pickle.loads(self._storage[self._key("nodes")])
+        records, branches = snapshot["nodes"], snapshot["branches"]
+        for i in range(self._deltas):
+            try:
+                delta = pickle.loads(self._storage[self._key(f"delta-{i}")])
+            except KeyError:
+                # Flush was interrupted before the delta got stored
+                self._deltas = i
+                break
+            records.update(delta["nodes"])
+            branches.update(delta["branches"])
+            for path, changes in delta["chunks"].items():
+                self._chunk_deltas[path].extend(changes)
+
+        commit_node_map = {}
+        for commit_id, record in records.items():
+            node = commit_node_map[commit_id] = VersionNode(commit_id, record[0])
+            node.message, node.commit_time, node.commit_user_name = record[2:]
+        for commit_id, record in records.items():
+            if record[1] is not None:
+                parent = commit_node_map[record[1]]
+                commit_node_map[commit_id].parent = parent
+                parent.children.append(commit_node_map[commit_id])
+        self._written_nodes = records
+        self._written_branches = dict(branches)
+        return {
+            "branch_node_map": {
+                branch: commit_node_map[commit_id]
+                for branch, commit_id in branches.items()
+            },
+            "commit_node_map": commit_node_map,
+            "chunk_commit_map": _ChunkCommitMap(self, snapshot["paths"]),
+        }
+
+    def _load_chunks(self, path):
+        chunk_commits = defaultdict(set)
+        try:
+            data = pickle.loads(self._storage[self._chunks_key(path)])
+        except KeyError:
+            data = {"commits": [], "chunks": []}
+        commits = data["commits"]
+        for chunk, commit_indexes in data["chunks"]:
+            chunk_commits[chunk] = {commits[i] for i in commit_indexes}
+        for chunk, commit_id, added in self._chunk_deltas.pop(path, []):
+            if added:
+                chunk_commits[chunk].add(commit_id)
+            else:
+                chunk_commits[chunk].discard(commit_id)
+        return chunk_commits
+
+    def chunk_added(self, path, chunk, commit_id):
+        self._pending_chunks[path].append((chunk, commit_id, True))
+
+    def chunk_removed(self, path, chunk, commit_id):
+        self._pending_chunks[path].append((chunk, commit_id, False))
+
+    def flush(self, branch_node_map, commit_node_map, chunk_commit_map):
+        """Appends changes since the last flush to the log, compacts it into a new snapshot when needed"""
+        records = {
+            commit_id: self._node_record(node)
+            for commit_id, node in commit_node_map.items()
+        }
+        branches = {branch: node.commit_id for branch, node in branch_node_map.items()}
+        if self._snapshot is None or self._deltas >= self._compact_after:
+            self._write_snapshot(records, branches, chunk_commit_map)
+        else:
+            delta = {
+                "nodes": {
+                    commit_id: record
+                    for commit_id, record in records.items()
+                    if self._written_nodes.get(commit_id) != record
+                },
+                "branches": {
+                    branch: commit_id
+                    for branch, commit_id in branches.items()
+                    if self._written_branches.get(branch) != commit_id
+                },
+                "chunks": dict(self._pending_chunks),
+            }
+            if not any(delta.values()):
+                return
+            self._storage[self._key(f"delta-{self._deltas}")] = pickle.dumps(delta)
+            self._deltas += 1
+            self._write_head()
+        self._written_nodes = records
+        self._written_branches = branches
+        self._pending_chunks.clear()
+
+    def _write_snapshot(self, records, branches, chunk_commit_map):
+        paths = (
+            chunk_commit_map.paths()
+            if isinstance(chunk_commit_map, _ChunkCommitMap)
+            else set(chunk_commit_map)
+        )
+        old_keys = []
+        if self._snapshot is not None:
+            old_keys = [self._key("nodes")]
+            old_keys += [self._chunks_key(path) for path in paths]
+            old_keys += [self._key(f"delta-{i}") for i in range(self._deltas)]
+        chunk_maps = {path: chunk_commit_map[path] for path in paths}
+        # Unique names, so a log of a recreated dataset never reuses items of an old one
+        self._snapshot = generate_hash()
+        self._deltas = 0
+        for path, chunk_commits in chunk_maps.items():
+            commits = sorted(set().union(*chunk_commits.values()))
+            commit_indexes = {commit_id: i for i, commit_id in enumerate(commits)}
+            chunks = [
+                (chunk, [commit_indexes[c] for c in commit_ids])
+                for chunk, commit_ids in chunk_commits.items()
+                if commit_ids
+            ]
+            self._storage[self._chunks_key(path)] = pickle.dumps(
+                {"commits": commits, "chunks": chunks}
+            )
+        self._storage[self._key("nodes")] = pickle.dumps(
+            {"nodes": records, "branches": branches, "paths": sorted(paths)}
+        )
+        self._write_head()
+        for key in old_keys:
+            try:
+                del self._storage[key]
+            except KeyError:
+                pass
+
+    def _write_head(self):
+        self._storage[defaults.VERSION_LOG_HEAD] = bytes(
+            json.dumps({"snapshot": self._snapshot, "deltas": self._deltas}), "utf-8"
+        )
@@ -10,8 +10,9 @@ from collections.abc import Iterable
 from hub.exceptions import NotIterable
 
 
-def transform(schema, scheduler="single", workers=1):
+def transform(schema, scheduler="single", workers=1, batched=False):
     """| Transform is a decorator of a function. The function should output a dictionary per sample.
+    | Batched functions take and return a dict of columns for a whole shard instead, so they can be vectorized.
 
     Parameters:
     ----------
@@ -21,6 +22,10 @@ def transform(schema, scheduler="single", workers=1):
         "single" - for single threaded, "threaded" using multiple threads, "processed", "ray" scheduler, "dask" scheduler
     workers: int
         how many workers will be started for the process
+    batched: bool, optional
+        If True the function receives a dict of stacked numpy arrays (lists for ragged or text samples) per sub-batch
+        and returns a dict of columns of equal length. Each shard is split into a sub-batch per worker,
+        not supported by ray schedulers
     """
 
     def wrapper(func):
@@ -28,6 +33,9 @@ def transform(schema, scheduler="single", workers=1):
             if not isinstance(ds, Iterable) and not isinstance(ds, str):
                 raise NotIterable
 
+            if batched and scheduler in ("ray", "ray_generator"):
+                raise ValueError(f"Batched transforms are not supported by {scheduler}")
+
             if scheduler == "ray":
                 return RayTransform(
                     func, schema, ds, scheduler=scheduler, workers=workers, **kwargs
@@ -39,7 +47,13 @@ def transform(schema, scheduler="single", workers=1):
                 )
 
             return Transform(
-                func, schema, ds, scheduler=scheduler, workers=workers, **kwargs
+                func,
+                schema,
+                ds,
+                scheduler=scheduler,
+                workers=workers,
+                batched=batched,
+                **kwargs,
             )
 
         return inner
@@ -0,0 +1,120 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+from hub import defaults
+
+_ALIGNMENT = 64
+
+
+class SharedArray:
+    """Descriptor of an array written to a scratch file, it is sent between processes instead of the array"""
+
+    __slots__ = ("path", "offset", "shape", "dtype")
+
+    def __init__(self, path: str, offset: int, shape: tuple, dtype: str):
+        self.path = path
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return (self.path, self.offset, self.shape, self.dtype)
+
+    def __setstate__(self, state):
+        self.path, self.offset, self.shape, self.dtype = state
+
+
+def scratch_dir() -> str:
+    """Creates a folder for scratch files, in memory backed /dev/shm when available"""
+    root = defaults.SHARED_ARRAYS_DIR
+    if not os.path.isdir(root) or not os.access(root, os.W_OK):
+        root = None
+    return tempfile.mkdtemp(prefix="hub-transform-", dir=root)
+
+
+def _find_arrays(obj, arrays: dict, min_size: int):
+    if isinstance(obj, dict):
+        for value in obj.values():
+            _find_arrays(value, arrays, min_size)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            _find_arrays(value, arrays, min_size)
+    elif (
+        isinstance(obj, np.ndarray)
+        and obj.dtype != object
+        and obj.dtype.fields is None
+        and obj.nbytes >= min_size
+    ):
+        arrays[id(obj)] = obj
+
+
+def _replace(obj, replace):
+    if isinstance(obj, dict):
+        return {key: _replace(value, replace) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [_replace(value, replace) for value in obj]
+    elif isinstance(obj, tuple):
+        return tuple(_replace(value, replace) for value in obj)
+    return replace(obj)
+
+
+def share_arrays(obj, folder: str, min_size: int = defaults.SHARED_ARRAYS_MIN_SIZE):
+    """Writes large numpy arrays nested in obj (dicts, lists, tuples) to a single scratch file in folder
+    and returns obj with SharedArray descriptors in place of the arrays.
+    Called in worker processes, so only the descriptors are pickled back to the parent.
+    """
+    arrays = {}
+    _find_arrays(obj, arrays, min_size)
+    if not arrays:
+        return obj
+    fd, path = tempfile.mkstemp(dir=folder, suffix=".arrays")
+    descriptors = {}
+    with os.fdopen(fd, "wb") as f:
+        offset = 0
+        for key, array in arrays.items():
+            offset += -offset % _ALIGNMENT
+            f.seek(offset)
+            f.write(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+            descriptors[key] = SharedArray(path, offset, array.shape, array.dtype.str)
+            offset += array.nbytes
+    return _replace(
+        obj,
+        lambda value: descriptors.get(id(value), value)
+        if isinstance(value, np.ndarray)
+        else value,
+    )
+
+
+def attach_arrays(obj):
+    """Replaces SharedArray descriptors nested in obj with arrays mapped from their scratch files.
+    Files are removed once mapped, their memory is released when the arrays are garbage collected.
+    Arrays are copy-on-write, changing them doesn't change the file.
+    """
+    maps = {}
+
+    def attach(value):
+        if not isinstance(value, SharedArray):
+            return value
+        if value.path not in maps:
+            with open(value.path, "rb") as f:
+                maps[value.path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            try:
+                os.remove(value.path)
+            except OSError:
+                pass
+        dtype = np.dtype(value.dtype)
+        count = int(np.prod(value.shape, dtype="int64"))
+        return np.frombuffer(
+            maps[value.path], dtype=dtype, count=count, offset=value.offset
+        ).reshape(value.shape)
+
+    return _replace(obj, attach)
@@ -0,0 +1,77 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+import hub
+from hub.compute.shared_arrays import (
+    SharedArray,
+    attach_arrays,
+    scratch_dir,
+    share_arrays,
+)
+from hub.schema import Tensor
+
+
+def test_share_arrays():
+    folder = scratch_dir()
+    image = np.random.rand(128, 128)
+    label = np.arange(4)
+    shared = share_arrays(
+        [{"image": image, "label": label, "crops": (image[::2], "name")}], folder
+    )
+    assert isinstance(shared[0]["image"], SharedArray)
+    assert shared[0]["label"] is label
+    assert len(pickle.dumps(shared)) < 1000
+    assert len(os.listdir(folder)) == 1
+
+    attached = attach_arrays(pickle.loads(pickle.dumps(shared)))
+    assert os.listdir(folder) == []
+    assert (attached[0]["image"] == image).all()
+    assert (attached[0]["crops"][0] == image[::2]).all()
+    assert attached[0]["crops"][1] == "name"
+    attached[0]["image"][0, 0] = -1
+    assert share_arrays({"label": label}, folder) == {"label": label}
+    shutil.rmtree(folder)
+
+
+def test_transform_shared_arrays():
+    schema = {
+        "image": Tensor((None, 64, 3), "uint8", (64, 64, 3)),
+        "label": Tensor((), "int32"),
+    }
+
+    @hub.transform(schema=schema, scheduler="processed", workers=2)
+    def create_samples(value):
+        return [
+            {
+                "image": np.full((32 + i, 64, 3), value, dtype="uint8"),
+                "label": value,
+            }
+            for i in range(2)
+        ]
+
+    folder = scratch_dir()
+    root = os.path.dirname(folder)
+    os.rmdir(folder)
+    before = {name for name in os.listdir(root) if name.startswith("hub-transform-")}
+    transform = create_samples(range(6))
+    assert transform.shared_arrays
+    ds = transform.store("./data/test/test_transform_shared_arrays")
+    assert ds["label"].compute().tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+    assert ds["image", 3].shape.tolist() == [33, 64, 3]
+    assert (ds["image", 3].compute() == 1).all()
+    after = {name for name in os.listdir(root) if name.startswith("hub-transform-")}
+    assert after == before
+
+
+if __name__ == "__main__":
+    test_share_arrays()
+    test_transform_shared_arrays()
@@ -12,6 +12,7 @@ import hub
 from hub.schema import Tensor, Image, Text
 from hub.utils import Timer
 from hub.utils import hub_creds_exist
+from hub.store.shape_detector import ShapeDetector
 import pytest
 
 my_schema = {
@@ -391,6 +392,259 @@ def test_transform_overwrite():
         assert (ds["image", i].compute() == i * np.ones((1, 1, 1))).all()
 
 
+def test_transform_adaptive_chunks():
+    schema = {
+        "image": Tensor((None, None), "int32", (1000, 1000)),
+        "label": Tensor((10,), "int32", chunks=4),
+    }
+
+    @hub.transform(schema=schema)
+    def create_sample(value):
+        return {
+            "image": np.full((10 + value, 20), value, dtype="int32"),
+            "label": np.full((10,), value, dtype="int32"),
+        }
+
+    ds = create_sample(range(8)).store(
+        "./data/test/test_transform_adaptive_chunks", chunking="adaptive"
+    )
+    assert (
+        ds["image"].chunksize[0]
+        > ShapeDetector((8, None, None), (8, 1000, 1000), dtype="int32").chunks[0]
+    )
+    assert ds["label"].chunksize[0] == 4
+    assert (ds["image", 5].compute() == 5).all()
+    assert ds["image", 5].shape.tolist() == [15, 20]
+
+    ds = create_sample(range(8)).store(
+        "./data/test/test_transform_adaptive_chunks",
+        chunking="adaptive",
+        access_pattern="spatial",
+    )
+    assert ds["image"].chunksize == (1, 17, 20)
+
+
+def test_transform_pipelined_store():
+    schema = {
+        "image": Tensor((None, 4), "int32", (20, 4), chunks=3),
+        "label": Tensor((), "int32"),
+    }
+
+    @hub.transform(schema=schema)
+    def create_samples(value):
+        return [
+            {
+                "image": np.full((value % 20 + 1, 4), value, dtype="int32"),
+                "label": value + i,
+            }
+            for i in range(value % 3)
+        ]
+
+    stored = []
+    for pipeline_depth, compute_workers in ((0, 1), (2, 1), (3, 2)):
+        ds = create_samples(range(25)).store(
+            f"./data/test/test_transform_pipelined_{pipeline_depth}",
+            sample_per_shard=4,
+            pipeline_depth=pipeline_depth,
+            compute_workers=compute_workers,
+        )
+        stored.append(
+            (
+                ds["label"].compute().tolist(),
+                [ds["image", i].compute().tolist() for i in range(len(ds))],
+            )
+        )
+    assert len(stored[0][0]) == sum(value % 3 for value in range(25))
+    assert stored[0] == stored[1] == stored[2]
+
+    @hub.transform(schema=schema)
+    def fail(value):
+        if value == 9:
+            raise ValueError("failed sample")
+        return {"image": np.ones((2, 4), dtype="int32"), "label": value}
+
+    with pytest.raises(ValueError):
+        fail(range(25)).store(
+            "./data/test/test_transform_pipelined_fail", sample_per_shard=4
+        )
+
+
+def test_transform_batched():
+    schema = {
+        "image": Tensor((None, 4), "float32", (8, 4)),
+        "label": Tensor((), "int32"),
+        "meta": {"name": Text((None,), max_shape=(10,))},
+    }
+
+    @hub.transform(schema=schema, batched=True)
+    def create_batch(values):
+        return {
+            "image": [np.full((v % 8 + 1, 4), v, dtype="float32") for v in values],
+            "label": np.array(values, dtype="int32") * 2,
+            "meta": {"name": [f"s{v}" for v in values]},
+        }
+
+    ds = create_batch(range(10)).store(
+        "./data/test/test_transform_batched", sample_per_shard=4
+    )
+    assert ds["label"].compute().tolist() == list(range(0, 20, 2))
+    assert ds["image", 9].shape.tolist() == [2, 4]
+    assert ds["meta/name", 7].compute() == "s7"
+
+    @hub.transform(schema=schema, batched=True)
+    def normalize(batch, scale):
+        assert isinstance(batch["label"], np.ndarray)
+        assert isinstance(batch["image"], list)
+        batch["image"] = [image / scale for image in batch["image"]]
+        batch["label"] = batch["label"] + 1
+        return batch
+
+    @hub.transform(schema=schema, batched=True)
+    def keep_even(batch):
+        even = [i for i, label in enumerate(batch["label"]) if label % 4 == 1]
+        return {
+            "image": [batch["image"][i] for i in even],
+            "label": batch["label"][even],
+            "meta": {"name": [batch["meta"]["name"][i] for i in even]},
+        }
+
+    ds2 = keep_even(normalize(ds, scale=2)).store(
+        "./data/test/test_transform_batched_2", sample_per_shard=3
+    )
+    assert ds2["label"].compute().tolist() == [1, 5, 9, 13, 17]
+    assert (ds2["image", 2].compute() == 2).all()
+    assert [ds2["meta/name", i].compute() for i in range(5)] == [
+        "s0",
+        "s2",
+        "s4",
+        "s6",
+        "s8",
+    ]
+
+    @hub.transform(schema=schema, batched=True)
+    def stack(batch):
+        return {"label": batch["label"], "image": batch["image"][:1]}
+
+    with pytest.raises(ValueError):
+        stack([{"label": i, "image": np.zeros((2, 4))} for i in range(3)]).store(
+            "./data/test/test_transform_batched_3"
+        )
+
+    @hub.transform(schema=schema)
+    def per_sample(sample):
+        return sample
+
+    with pytest.raises(ValueError):
+        per_sample(normalize(ds, scale=2))
+
+
+@pytest.mark.parametrize("scheduler", ["threaded", "processed"])
+def test_transform_batched_workers(scheduler):
+    schema = {
+        "image": Tensor((None,), "int32", (4,)),
+        "label": Tensor((), "int32"),
+        "batch_size": Tensor((), "int32"),
+    }
+
+    @hub.transform(schema=schema, scheduler=scheduler, workers=2, batched=True)
+    def create_batch(values):
+        return {
+            "image": [np.full(v % 4 + 1, v, dtype="int32") for v in values],
+            "label": np.array(values, dtype="int32"),
+            "batch_size": np.full(len(values), len(values), dtype="int32"),
+        }
+
+    ds = create_batch(range(20)).store(
+        f"./data/test/test_transform_batched_workers_{scheduler}", sample_per_shard=10
+    )
+    assert ds["label"].compute().tolist() == list(range(20))
+    assert ds["batch_size"].compute().tolist() == [5] * 20
+    assert ds["image", 7].compute().tolist() == [7] * 4
+
+
+def test_transform_parallel_upload():
+    schema = {
+        "image": Tensor((None, 3), "int32", (12, 3), chunks=4),
+        "label": Tensor((), "int32", chunks=3),
+        "packed": Tensor((None,), "int32", (12,), layout="packed"),
+    }
+
+    @hub.transform(schema=schema, scheduler="threaded", workers=4)
+    def create_sample(value):
+        return {
+            "image": np.full((value % 12 + 1, 3), value, dtype="int32"),
+            "label": value,
+            "packed": np.arange(value % 12 + 1, dtype="int32"),
+        }
+
+    ds = create_sample(range(50)).store(
+        "./data/test/test_transform_parallel_upload", sample_per_shard=13
+    )
+    ds.commit("first")
+    assert ds["label"].compute().tolist() == list(range(50))
+    for i in range(50):
+        assert ds["image", i].shape.tolist() == [i % 12 + 1, 3]
+        assert (ds["image", i].compute() == i).all()
+        assert ds["packed", i].compute().tolist() == list(range(i % 12 + 1))
+
+
+def test_transform_direct_write():
+    schema = {
+        "image": Tensor((None, 3), "int32", (12, 3), chunks=4),
+        "label": Tensor((), "int32", chunks=6),
+        "text": Text((None,), max_shape=(10,)),
+    }
+
+    @hub.transform(schema=schema, scheduler="processed", workers=2)
+    def create_sample(value):
+        return {
+            "image": np.full((value % 12 + 1, 3), value, dtype="int32"),
+            "label": value,
+            "text": f"sample{value}",
+        }
+
+    url = "./data/test/test_transform_direct_write"
+    ds = create_sample(range(50)).store(url, sample_per_shard=30, direct_write=True)
+    assert ds.shape == (50,)
+    ds.commit("first")
+    ds = hub.Dataset(url)
+    assert ds["label"].compute().tolist() == list(range(50))
+    for i in range(50):
+        assert ds["image", i].shape.tolist() == [i % 12 + 1, 3]
+        assert (ds["image", i].compute() == i).all()
+        assert ds["text", i].compute() == f"sample{i}"
+
+    @hub.transform(schema=schema)
+    def duplicate(value):
+        return [{"label": value}, {"label": value}]
+
+    with pytest.raises(ValueError):
+        duplicate(range(5)).store(url, direct_write=True)
+
+
+def test_transform_direct_write_default_chunks():
+    schema = {
+        "image": Tensor((None, 16, 3), "uint8", (16, 16, 3)),
+        "label": "int32",
+    }
+
+    @hub.transform(schema=schema, scheduler="processed", workers=2)
+    def create_sample(value):
+        return {
+            "image": np.full((value % 16 + 1, 16, 3), value, dtype="uint8"),
+            "label": value,
+        }
+
+    url = "./data/test/test_transform_direct_write_default_chunks"
+    ds = create_sample(range(37)).store(url, sample_per_shard=20, direct_write=True)
+    assert ds["label"].chunksize[0] > 37
+    ds = hub.Dataset(url)
+    assert ds["label"].compute().tolist() == list(range(37))
+    for i in range(37):
+        assert ds["image", i].shape.tolist() == [i % 16 + 1, 16, 3]
+        assert (ds["image", i].compute() == i).all()
+
+
 if __name__ == "__main__":
     with Timer("Test Transform"):
         with Timer("test threaded"):
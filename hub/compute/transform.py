@@ -12,14 +12,33 @@ from hub.api.dataset import Dataset
 from tqdm import tqdm
 from collections.abc import MutableMapping
 from hub.utils import batchify
-from hub.api.dataset_utils import get_value, slice_split, str_to_int, slice_extract_info
+from hub.api.dataset_utils import (
+    get_value,
+    slice_split,
+    str_to_int,
+    slice_extract_info,
+    _get_compressor,
+    create_numpy_batch,
+)
 import collections.abc as abc
 from hub.api.datasetview import DatasetView
 from pathos.pools import ProcessPool, ThreadPool
 from hub.schema.sequence import Sequence
-from hub.schema.features import featurify
+from hub.schema.features import featurify, Primitive, Tensor, _normalize_chunks
+from hub.compute.shared_arrays import attach_arrays, scratch_dir, share_arrays
+from hub.store.packed_tensor import PackedTensor
+from hub.store.shape_detector import estimate_compression_ratio, get_adaptive_chunks
+import copy
 import os
-from hub.defaults import OBJECT_CHUNK
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from hub.defaults import (
+    OBJECT_CHUNK,
+    ADAPTIVE_CHUNK_SAMPLES,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_UPLOAD_WORKERS,
+)
 
 
 def get_sample_size(schema, workers):
@@ -48,7 +67,14 @@ def get_sample_size(schema, workers):
 
 class Transform:
     def __init__(
-        self, func, schema, ds, scheduler: str = "single", workers: int = 1, **kwargs
+        self,
+        func,
+        schema,
+        ds,
+        scheduler: str = "single",
+        workers: int = 1,
+        batched: bool = False,
+        **kwargs,
     ):
         """| Transform applies a user defined function to each sample in single threaded manner.
 
@@ -64,6 +90,10 @@ class Transform:
             choice between "single", "threaded", "processed"
         workers: int
             how many threads or processes to use
+        batched: bool, optional
+            If True func is called with a dict of columns (stacked arrays or lists of ragged samples)
+            and returns a dict of columns, instead of being called for each sample.
+            Each shard is split into a sub-batch per worker, computed by the scheduler
         **kwargs:
             additional arguments that will be passed to func as static argument for all samples
         """
@@ -72,8 +102,13 @@ class Transform:
         self._ds = ds
         self.kwargs = kwargs
         self.workers = workers
+        self.batched = batched
+        # Worker processes return large arrays through memory mapped scratch files instead of pickling them
+        self.shared_arrays = scheduler == "processed"
 
         if isinstance(self._ds, Transform):
+            if self._ds.batched != batched:
+                raise ValueError("Batched and per sample transforms can't be chained")
             self.base_ds = self._ds.base_ds
             self._func = self._ds._func[:]
             self._func.append(func)
@@ -218,7 +253,12 @@ class Transform:
         return tqdm if show and single_threaded else _empty_pbar
 
     def create_dataset(
-        self, url: str, length: int = None, token: dict = None, public: bool = True
+        self,
+        url: str,
+        length: int = None,
+        token: dict = None,
+        public: bool = True,
+        schema=None,
     ):
         """Helper function to create a dataset"""
         shape = (length,)
@@ -226,7 +266,7 @@ class Transform:
             url,
             mode="w",
             shape=shape,
-            schema=self.schema,
+            schema=schema or self.schema,
             token=token,
             fs=zarr.storage.MemoryStore() if "tmp" in url else None,
             cache=False,
@@ -237,7 +277,8 @@ class Transform:
     def upload(self, results, ds: Dataset, token: dict, progressbar: bool = True):
         """Batchified upload of results.
         For each tensor batchify based on its chunk and upload.
-        If tensor is dynamic then still upload element by element.
+        Batches of all tensors are uploaded in parallel, batch boundaries are aligned to chunks
+        so no chunk is written by two batches. Batches of packed tensors are uploaded in order.
         For dynamic tensors, it disable dynamicness and then enables it back.
 
         Parameters
@@ -255,11 +296,32 @@ class Transform:
         offset = ds.indexes[
             0
         ]  # here ds.indexes will always be a contiguous list as obtained after slicing
+        values = self._write_results(results, ds)
+
+        # Enable and rewrite shapes
+        for key, value in values.items():
+            if ds.dataset._tensors[f"/{key}"].is_dynamic:
+                ds.dataset._tensors[f"/{key}"].enable_dynamicness()
+                ds.dataset._tensors[f"/{key}"].set_shape(
+                    [slice(offset, offset + len(value))], value
+                )
+
+        ds.flush()
+        return ds
+
+    def _write_results(self, results, ds: DatasetView):
+        """
+        Writes results to DatasetView with dynamicness of the tensors disabled, returns dict of written values
+        """
+        offset = ds.indexes[0]
+        tasks = []
+        values = {}
         for key, value in results.items():
             chunk = ds[key].chunksize[0]
             chunk = 1 if chunk == 0 else chunk
             value = get_value(value)
             value = str_to_int(value, ds.dataset.tokenizer)
+            values[key] = value
 
             num_chunks = len(value) / (chunk * self.workers)
             num_chunks = (
@@ -271,34 +333,34 @@ class Transform:
                 if length != len(value)
                 else batchify(value, length)
             )
-            len_batches = [len(item) for item in batched_values]
-
-            def upload_chunk(i_batch):
-                i, batch = i_batch
-                length = len(batch)
-                cur_offset = 0
-                for it in range(i):
-                    cur_offset += len_batches[it]
-                slice_ = slice(cur_offset, cur_offset + length)
-                ds[key, slice_] = batch
-
-            index_batched_values = list(
-                zip(list(range(len(batched_values))), batched_values)
-            )
+            key_tasks = []
+            cur_offset = 0
+            for batch in batched_values:
+                key_tasks.append(
+                    (key, slice(cur_offset, cur_offset + len(batch)), batch)
+                )
+                cur_offset += len(batch)
 
             # Disable dynamic arrays
-            ds.dataset._tensors[f"/{key}"].disable_dynamicness()
-            list(map(upload_chunk, index_batched_values))
+            tensor = ds.dataset._tensors[f"/{key}"]
+            tensor.disable_dynamicness()
+            if isinstance(tensor, PackedTensor):
+                tasks.append(key_tasks)
+            else:
+                tasks += [[task] for task in key_tasks]
 
-            # Enable and rewrite shapes
-            if ds.dataset._tensors[f"/{key}"].is_dynamic:
-                ds.dataset._tensors[f"/{key}"].enable_dynamicness()
-                ds.dataset._tensors[f"/{key}"].set_shape(
-                    [slice(offset, offset + len(value))], value
-                )
+        # Check out before the parallel writes, so they don't race to create a branch
+        ds.dataset._auto_checkout()
 
-        ds.flush()
-        return ds
+        def upload_chunks(key_tasks):
+            for key, slice_, batch in key_tasks:
+                ds[key, slice_] = batch
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(len(tasks), DEFAULT_UPLOAD_WORKERS))
+        ) as pool:
+            list(pool.map(upload_chunks, tasks))
+        return values
 
     def call_func(self, fn_index, item, as_list=False):
         """Calls all the functions one after the other
@@ -331,6 +393,17 @@ class Transform:
         """
         Takes a shard of iteratable ds_in, compute and stores in DatasetView
         """
+        results = self._compute_shard(ds_in)
+        return self._upload_shard(results, ds_out, offset, token=token)
+
+    def _compute_shard(self, ds_in: Iterable, serial: bool = False):
+        """
+        Takes a shard of iteratable ds_in, computes it and returns dict of results lists
+        If serial is True the shard is computed in the calling thread instead of the scheduler's pool
+        """
+        map_ = map if serial else self.map
+        if self.batched:
+            return self._compute_batch(ds_in, serial=serial)
 
         def _func_argd(item):
             if isinstance(item, DatasetView) or isinstance(item, Dataset):
@@ -341,16 +414,153 @@ class Transform:
             return result
 
         ds_in = list(ds_in)
-        results = self.map(
-            _func_argd,
-            ds_in,
-        )
-        results = self._unwrap(results)
-        results = self.map(lambda x: self._flatten_dict(x, schema=self.schema), results)
-        results = list(results)
+        if self.shared_arrays and not serial:
+            folder = scratch_dir()
+            try:
+                results = self.map(
+                    lambda item: share_arrays(_func_argd(item), folder),
+                    ds_in,
+                )
+                results = attach_arrays(list(results))
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+            results = self._unwrap(results)
+            # Arrays are already in the parent, flattening them in workers would copy them back
+            results = [self._flatten_dict(x, schema=self.schema) for x in results]
+        else:
+            results = map_(
+                _func_argd,
+                ds_in,
+            )
+            results = self._unwrap(results)
+            results = map_(lambda x: self._flatten_dict(x, schema=self.schema), results)
+            results = list(results)
+
+        return self._split_list_to_dicts(results)
+
+    def _compute_batch(self, ds_in: Iterable, serial: bool = False):
+        """
+        Takes a shard of iteratable ds_in, applies batched functions to its columns and returns dict of results columns
+        The shard is split into a sub-batch per worker, computed by the scheduler and concatenated back in order
+        """
+        ds_in = list(ds_in)
+        if not ds_in:
+            return {}
+        n_parts = 1 if serial else min(self.workers, len(ds_in))
+        if n_parts == 1:
+            return self._apply_batch(ds_in)
+        bounds = np.linspace(0, len(ds_in), n_parts + 1).astype("int64")
+        parts = [ds_in[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        if self.shared_arrays:
+            folder = scratch_dir()
+            try:
+                results = self.map(
+                    lambda part: share_arrays(self._apply_batch(part), folder), parts
+                )
+                results = attach_arrays(list(results))
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+        else:
+            results = list(self.map(self._apply_batch, parts))
+        return self._concat_columns(results)
 
-        results = self._split_list_to_dicts(results)
+    def _apply_batch(self, items: list):
+        """
+        Applies batched functions to the columns of items and returns dict of results columns
+        """
+        batch = self._to_columns(items)
+        for func, kwargs in zip(self._func, self.kwargs):
+            batch = func(batch, **kwargs)
+        if not isinstance(batch, dict):
+            raise ValueError(
+                f"Batched transform should return a dict of columns, got {type(batch)}"
+            )
+        results = {
+            key: value.tolist()
+            if isinstance(value, np.ndarray) and value.dtype.kind in "US"
+            else value
+            for key, value in self._flatten_dict(batch, schema=self.schema).items()
+        }
+        lengths = {len(value) for value in results.values()}
+        if len(lengths) > 1:
+            raise ValueError(
+                f"Columns returned by batched transform have different lengths {sorted(lengths)}"
+            )
+        return results
 
+    @classmethod
+    def _concat_columns(cls, batches):
+        """
+        Concatenates dicts of results columns, arrays of the same sample shape stay arrays
+        """
+        keys = set(batches[0])
+        if any(set(batch) != keys for batch in batches):
+            raise ValueError(
+                "Batched transform returned different keys for sub-batches"
+            )
+        columns = {}
+        for key in batches[0]:
+            values = [batch[key] for batch in batches]
+            if all(
+                isinstance(value, np.ndarray) and value.shape[1:] == values[0].shape[1:]
+                for value in values
+            ):
+                columns[key] = np.concatenate(values)
+            else:
+                columns[key] = [sample for value in values for sample in value]
+        return columns
+
+    @classmethod
+    def _to_columns(cls, items):
+        """
+        Converts shard of input samples to the argument of batched functions.
+        Samples of a dataset are read once per tensor, dicts are stacked into dict of columns,
+        other samples are passed as list
+        """
+        if items and all(
+            isinstance(item, DatasetView)
+            and isinstance(item.indexes, int)
+            and item.dataset is items[0].dataset
+            and item.key_list == items[0].key_list
+            for item in items
+        ):
+            return create_numpy_batch(
+                items[0].dataset,
+                [item.indexes for item in items],
+                keys=items[0].key_list,
+                columnar=True,
+            )
+        if items and all(isinstance(item, dict) for item in items):
+            return cls._stack_samples(items)
+        return items
+
+    @classmethod
+    def _stack_samples(cls, samples):
+        """
+        Transforms list of (nested) dicts into dict of columns, samples of the same shape are stacked into arrays
+        """
+        columns = {}
+        for key in samples[0]:
+            values = [sample[key] for sample in samples]
+            if all(isinstance(value, dict) for value in values):
+                columns[key] = cls._stack_samples(values)
+                continue
+            arrays = [np.asarray(value) for value in values]
+            if all(
+                array.shape == arrays[0].shape
+                and array.dtype == arrays[0].dtype
+                and array.dtype.kind not in "OUS"
+                for array in arrays
+            ):
+                columns[key] = np.stack(arrays)
+            else:
+                columns[key] = values
+        return columns
+
+    def _upload_shard(self, results, ds_out: Dataset, offset: int, token=None):
+        """
+        Stores computed results of a shard in DatasetView starting at offset
+        """
         results_values = list(results.values())
         if len(results_values) == 0:
             return 0
@@ -370,6 +580,161 @@ class Transform:
 
         return n_results
 
+    def _write_range(self, url: str, token, start: int, ds_in: Iterable):
+        """
+        Computes a shard of ds_in and writes it to the dataset at url starting at start, runs in a worker.
+        For each tensor only chunks lying wholly in the range are written, so no chunk is written by two workers.
+        Returns chunks written per tensor, dynamic shapes of the written samples per key
+        and (offset, values) of the samples in chunks shared with other ranges per key, to be written by the parent
+        """
+        ds_in = list(ds_in)
+        results = self._compute_shard(ds_in, serial=True)
+        n_results = len(next(iter(results.values()), []))
+        if n_results != len(ds_in):
+            raise ValueError(
+                f"Direct writes need one output sample per input sample, got {n_results} for {len(ds_in)}"
+            )
+        if n_results == 0:
+            return {}, {}, {}
+        ds = Dataset(url, mode="a", token=token, cache=False)
+        stop = start + n_results
+        shapes, shared = {}, {}
+        for key, value in results.items():
+            tensor = ds._tensors[f"/{key}"]
+            chunk = max(tensor.chunks[0], 1)
+            first = min(-(-start // chunk) * chunk, stop)
+            last = stop if stop == ds.shape[0] else max(stop // chunk * chunk, first)
+            shared[key] = [
+                (offset, value[offset - start : offset_stop - start])
+                for offset, offset_stop in ((start, first), (last, stop))
+                if offset_stop > offset
+            ]
+            if last == first:
+                continue
+            written = self._write_results(
+                {key: value[first - start : last - start]}, ds[first:last]
+            )[key]
+            if tensor.is_dynamic:
+                shapes[key] = (
+                    first,
+                    tensor.get_shape_from_value([slice(first, last)], written),
+                )
+        # Dataset.flush would also write version info, which is merged by the parent
+        for tensor in ds._tensors.opened():
+            tensor.flush()
+        ds._fs_map.flush()
+        return dict(ds._version_log._pending_chunks), shapes, shared
+
+    def _store_direct(
+        self, url: str, ds_in: Iterable, n_samples: int, token=None, public=True
+    ):
+        """
+        Stores the transform with workers writing ranges of the output directly to storage.
+        The parent records written chunks in version info, sets dynamic shapes
+        and writes the samples of chunks that cross range boundaries
+        """
+        if not hasattr(ds_in, "__len__"):
+            raise ValueError("Direct writes need an input dataset with known length")
+        if "tmp" in url:
+            raise ValueError(
+                "Direct writes need a dataset workers can open, in memory datasets are not supported"
+            )
+        length = len(ds_in)
+        ds_out = self.create_dataset(url, length=length, token=token, public=public)
+        tensors = [ds_out._tensors[path] for _, path in ds_out._flat_tensors]
+        if any(isinstance(tensor, PackedTensor) for tensor in tensors):
+            raise ValueError("Direct writes don't support packed tensors")
+        range_size = max(1, math.ceil(n_samples / self.workers))
+
+        def batchify_generator(iterator: Iterable, size: int):
+            batch = []
+            for el in iterator:
+                batch.append(el)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        def set_shapes(key, offset, shape):
+            ds_out._tensors[f"/{key}"].set_dynamic_shape(
+                [slice(offset, offset + len(shape))], shape
+            )
+
+        start = 0
+        ranges = batchify_generator(ds_in, range_size)
+        with tqdm(
+            total=length,
+            unit_scale=True,
+            unit=" items",
+            desc=f"Computing and writing the transformation in ranges of size {range_size}",
+        ) as pbar:
+            for shard in batchify_generator(ranges, self.workers):
+                starts = [start + i * range_size for i in range(len(shard))]
+                reports = self.map(
+                    lambda start, ds_in: self._write_range(url, token, start, ds_in),
+                    starts,
+                    shard,
+                )
+                for ds_in_range, (chunk_versions, shapes, shared) in zip(
+                    shard, reports
+                ):
+                    ds_out._add_chunk_versions(chunk_versions)
+                    for key, (offset, shape) in shapes.items():
+                        set_shapes(key, offset, shape)
+                    for key, pieces in shared.items():
+                        tensor = ds_out._tensors[f"/{key}"]
+                        for offset, value in pieces:
+                            view = ds_out[offset : offset + len(value)]
+                            written = self._write_results({key: value}, view)[key]
+                            if tensor.is_dynamic:
+                                shape = tensor.get_shape_from_value(
+                                    [slice(offset, offset + len(written))], written
+                                )
+                                set_shapes(key, offset, shape)
+                    pbar.update(len(ds_in_range))
+                start += sum(len(ds_in_range) for ds_in_range in shard)
+
+        for tensor in tensors:
+            tensor.enable_dynamicness()
+        ds_out.flush()
+        return ds_out
+
+    def _adaptive_schema(self, results, access_pattern: str = "sequential"):
+        """Copy of schema where tensors without explicit chunks get chunks chosen from the computed results"""
+        schema = copy.deepcopy(self.schema)
+        for key, values in results.items():
+            try:
+                dtype = self.dtype_from_path(key, schema)
+            except (KeyError, AttributeError):
+                continue
+            if (
+                not isinstance(dtype, Tensor)
+                or dtype.chunks is not None
+                or not isinstance(dtype.dtype, Primitive)
+                or dtype.dtype.dtype == "object"
+            ):
+                continue
+            try:
+                samples = [
+                    np.asarray(value, dtype=dtype.dtype.dtype)
+                    for value in get_value(values[:ADAPTIVE_CHUNK_SAMPLES])
+                ]
+            except (TypeError, ValueError):
+                continue
+            compressor = _get_compressor(dtype.compressor)
+            if compressor == "default":
+                compressor = zarr.storage.default_compressor
+            chunks = get_adaptive_chunks(
+                (1,) + dtype.max_shape,
+                dtype.dtype.dtype,
+                [sample.shape for sample in samples],
+                estimate_compression_ratio(samples, compressor),
+                access_pattern,
+            )
+            dtype.chunks = _normalize_chunks(chunks)
+        return schema
+
     def store(
         self,
         url: str,
@@ -379,8 +744,14 @@ class Transform:
         progressbar: bool = True,
         sample_per_shard: int = None,
         public: bool = True,
+        chunking: str = "default",
+        access_pattern: str = "sequential",
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+        compute_workers: int = 1,
+        direct_write: bool = False,
     ):
         """| The function to apply the transformation for each element in batchified manner
+        | Shards are computed ahead in the background while previous shards are uploaded in order
 
         Parameters
         ----------
@@ -400,12 +771,29 @@ class Transform:
             only applicable if using hub storage, ignored otherwise
             setting this to False allows only the user who created it to access the dataset and
             the dataset won't be visible in the visualizer to the public
+        chunking: str, optional
+            "default" uses chunks of the schema, "adaptive" chooses chunks of tensors without explicit chunks
+            from real sizes and compression ratio of the samples in the first shard
+        access_pattern: str, optional
+            Hint for adaptive chunking how the dataset will be read, "sequential", "random" or "spatial" (crops)
+        pipeline_depth: int, optional
+            How many shards can be computed ahead of the shard being uploaded, bounds the memory used by results.
+            0 computes and uploads each shard in sequence
+        compute_workers: int, optional
+            How many shards are computed at the same time, the transform function must be thread safe if above 1
+        direct_write: bool, optional
+            If True each worker computes a range of the output and writes its chunks to storage itself,
+            only samples of chunks shared by two ranges are returned to be written by this process. Needs one output sample per input sample,
+            an input with known length and default chunking, packed tensors are not supported
         Returns
         ----------
         ds: hub.Dataset
             uploaded dataset
         """
-
+        if chunking not in ("default", "adaptive"):
+            raise ValueError(
+                f"chunking {chunking} is not supported, use default or adaptive"
+            )
         ds_in = ds or self.base_ds
 
         # compute shard length
@@ -421,7 +809,16 @@ class Transform:
         if length < n_samples:
             n_samples = length
 
-        ds_out = self.create_dataset(url, length=length, token=token, public=public)
+        if direct_write:
+            if chunking != "default":
+                raise ValueError("Direct writes only support default chunking")
+            return self._store_direct(url, ds_in, n_samples, token=token, public=public)
+
+        ds_out = (
+            self.create_dataset(url, length=length, token=token, public=public)
+            if chunking == "default"
+            else None
+        )
 
         def batchify_generator(iterator: Iterable, size: int):
             batch = []
@@ -434,18 +831,46 @@ class Transform:
 
         start = 0
         total = 0
+        shards = batchify_generator(ds_in, n_samples)
+        pending = deque()
+
+        def compute_next(pool):
+            ds_in_shard = next(shards, None)
+            if ds_in_shard is not None:
+                future = pool.submit(self._compute_shard, ds_in_shard)
+                pending.append((len(ds_in_shard), future))
 
         with tqdm(
             total=length,
             unit_scale=True,
             unit=" items",
             desc=f"Computing the transformation in chunks of size {n_samples}",
-        ) as pbar:
-            for ds_in_shard in batchify_generator(ds_in, n_samples):
-                n_results = self.store_shard(ds_in_shard, ds_out, start, token=token)
-                total += n_results
-                pbar.update(len(ds_in_shard))
-                start += n_results
+        ) as pbar, ThreadPoolExecutor(max_workers=compute_workers) as pool:
+            try:
+                for _ in range(max(pipeline_depth, 1)):
+                    compute_next(pool)
+                while pending:
+                    n_samples_in, future = pending.popleft()
+                    results = future.result()
+                    if pipeline_depth > 0:
+                        compute_next(pool)
+                    if ds_out is None:
+                        ds_out = self.create_dataset(
+                            url,
+                            length=length,
+                            token=token,
+                            public=public,
+                            schema=self._adaptive_schema(results, access_pattern),
+                        )
+                    n_results = self._upload_shard(results, ds_out, start, token=token)
+                    total += n_results
+                    pbar.update(n_samples_in)
+                    start += n_results
+                    if pipeline_depth == 0:
+                        compute_next(pool)
+            finally:
+                for _, future in pending:
+                    future.cancel()
 
         ds_out.resize_shape(total)
         ds_out.flush()
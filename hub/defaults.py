@@ -6,4 +6,24 @@ DEFAULT_STORAGE_CACHE_SIZE = 2 ** 28
 AZURE_HOST_SUFFIX = "blob.core.windows.net"
 META_FILE = "meta.json"
 VERSION_INFO = "version.pkl"
+VERSION_LOG = "versions"
+VERSION_LOG_HEAD = "versions/head.json"
+VERSION_LOG_COMPACT = 16
 CRED_EXPIRATION = 36000  # in seconds
+DEFAULT_CACHE_SHARDS = 16
+DEFAULT_WRITE_BEHIND_WORKERS = 16
+DEFAULT_PREFETCH_DEPTH = 8
+DEFAULT_PREFETCH_SIZE = DEFAULT_MEMORY_CACHE_SIZE // 2
+DEFAULT_PREFETCH_WORKERS = 8
+DEFAULT_COPY_WORKERS = 32
+DEFAULT_COPY_MANIFEST_BATCH = 1000
+DEFAULT_PACKED_INDEX_CHUNK = 4096
+ADAPTIVE_CHUNK_SAMPLES = 16
+CHUNK_RANDOM_ACCESS_SIZE = 2 ** 20
+CHUNK_MAX_UNCOMPRESSED_SIZE = 2 ** 28
+DEFAULT_RECHUNK_WORKERS = 16
+DEFAULT_BATCH_READ_SIZE = 2 ** 26
+DEFAULT_PIPELINE_DEPTH = 2
+DEFAULT_UPLOAD_WORKERS = 16
+SHARED_ARRAYS_DIR = "/dev/shm"
+SHARED_ARRAYS_MIN_SIZE = 2 ** 16
@@ -129,6 +129,7 @@ def deserialize(inp):
                 max_shape=tuple(inp["max_shape"]),
                 chunks=inp["chunks"],
                 compressor=_get_compressor(inp),
+                layout=inp.get("layout", "padded"),
             )
         elif inp["type"] == "Text":
             return Text(
@@ -128,6 +128,7 @@ class Tensor(HubSchema):
         max_shape: Shape = None,
         chunks=None,
         compressor="lz4",
+        layout="padded",
     ):
         """
         Parameters
@@ -144,6 +145,9 @@ class Tensor(HubSchema):
             It is anticipated that each file should be ~16MB.
             Sample Count is also in the list of tensor's dimensions (first dimension)
             If default value is chosen, automatically detects how to split into chunks
+        layout : str
+            "padded" (default) stores samples in chunks of a max_shape sized array,
+            "packed" appends samples of different shapes one after another, so storage scales with their real size
         """
         if shape is None:
             raise TypeError("shape cannot be None")
@@ -177,6 +181,8 @@ class Tensor(HubSchema):
                 raise ValueError(f"shape and max_shape mismatch, {dim} != {max_dim}")
 
         chunks = _normalize_chunks(chunks)
+        if layout not in ("padded", "packed"):
+            raise ValueError(f"layout {layout} is not supported, use padded or packed")
 
         # TODO add errors if shape and max_shape have wrong values
         self.shape = tuple(shape)
@@ -184,6 +190,7 @@ class Tensor(HubSchema):
         self.max_shape = max_shape
         self.chunks = chunks
         self.compressor = compressor
+        self.layout = layout
 
     def _flatten(self):
         for item in self.dtype._flatten():
@@ -203,6 +210,7 @@ class Tensor(HubSchema):
             else out
         )
         out = out + ", chunks=" + str(self.chunks) if self.chunks is not None else out
+        out = out + ", layout=" + self.layout if self.layout != "padded" else out
         out += ")"
         return out
 
@@ -6,6 +6,7 @@ If a copy of the MPL was not distributed with this file, You can obtain one at h
 
 from fsspec import AbstractFileSystem
 import array
+import time
 from collections.abc import MutableMapping
 from azure.storage.blob import BlobServiceClient
 
@@ -177,6 +178,23 @@ class AzureBlobFileSystem(AbstractFileSystem):
         blob_client = self.service_client.get_blob_client(container_name, sub_path)
         return blob_client.download_blob().readall()
 
+    def copy(self, path1, path2, **kwargs):
+        """Copies the blob at path1 to path2 server side and waits until the copy is done"""
+        split_path = path1.split("/")
+        src_client = self.service_client.get_blob_client(
+            split_path[0], "/".join(split_path[1:])
+        )
+        split_path = path2.split("/")
+        blob_client = self.service_client.get_blob_client(
+            split_path[0], "/".join(split_path[1:])
+        )
+        status = blob_client.start_copy_from_url(src_client.url)["copy_status"]
+        while status == "pending":
+            time.sleep(0.1)
+            status = blob_client.get_blob_properties().copy.status
+        if status != "success":
+            raise OSError(f"Copy of {path1} to {path2} ended with status {status}")
+
     def cat_file(self, path):
         return self.download(path)
 
@@ -0,0 +1,121 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import posixpath
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fsspec import AbstractFileSystem
+
+from hub import defaults
+
+MANIFEST_DIR = ".hub_copy"
+
+
+def same_backend(src_fs: AbstractFileSystem, dst_fs: AbstractFileSystem) -> bool:
+    """True if dst_fs can copy objects of src_fs server side (S3 CopyObject, GCS rewrite, Azure copy blob)"""
+    return src_fs is dst_fs or (
+        type(src_fs) is type(dst_fs)
+        and src_fs.storage_options == dst_fs.storage_options
+    )
+
+
+def is_copy_in_progress(fs: AbstractFileSystem, url: str) -> bool:
+    """True if url holds an interrupted copy that can be resumed"""
+    return fs.exists(posixpath.join(url, MANIFEST_DIR))
+
+
+class _Manifest:
+    """Keys already copied to the destination, stored there as append-only parts"""
+
+    def __init__(self, fs: AbstractFileSystem, url: str):
+        self._fs = fs
+        self._url = posixpath.join(url, MANIFEST_DIR)
+        self._pending = []
+        try:
+            self._parts = sorted(self._fs.ls(self._url, detail=False))
+        except FileNotFoundError:
+            self._parts = []
+
+    def done(self):
+        keys = set()
+        for part in self._parts:
+            keys.update(self._fs.cat_file(part).decode("utf-8").splitlines())
+        return keys
+
+    def add(self, key):
+        self._pending.append(key)
+        if len(self._pending) >= defaults.DEFAULT_COPY_MANIFEST_BATCH:
+            self.save()
+
+    def save(self):
+        if not self._pending:
+            return
+        self._fs.makedirs(self._url, exist_ok=True)
+        part = posixpath.join(self._url, f"part-{len(self._parts):08d}")
+        self._fs.pipe_file(part, "\n".join(self._pending).encode("utf-8"))
+        self._parts.append(part)
+        self._pending = []
+
+    def remove(self):
+        if self._fs.exists(self._url):
+            self._fs.rm(self._url, recursive=True)
+
+
+def copy_tree(
+    src_fs: AbstractFileSystem,
+    src_url: str,
+    dst_fs: AbstractFileSystem,
+    dst_url: str,
+    workers: int = defaults.DEFAULT_COPY_WORKERS,
+    last_keys=(defaults.META_FILE,),
+):
+    """Copies all files under src_url to dst_url
+
+    Files are copied server side when both file systems share the backend and implement copy,
+    otherwise they are streamed through the client, workers files at a time.
+    Copied keys are recorded in a manifest at the destination so an interrupted copy
+    continues where it stopped when called again, the manifest is removed once the copy is complete.
+    Keys in last_keys are copied after all others, so the destination becomes a valid dataset only when complete.
+    """
+    keys = [
+        posixpath.relpath(path, src_url)
+        for path in src_fs.find(src_url)
+        if posixpath.relpath(path, src_url).split("/")[0] != MANIFEST_DIR
+    ]
+    manifest = _Manifest(dst_fs, dst_url)
+    done = manifest.done()
+    keys = [key for key in keys if key not in done]
+    server_side = same_backend(src_fs, dst_fs)
+
+    for folder in {posixpath.dirname(key) for key in keys}:
+        dst_fs.makedirs(posixpath.join(dst_url, folder), exist_ok=True)
+
+    def copy(key):
+        nonlocal server_side
+        src_path = posixpath.join(src_url, key)
+        dst_path = posixpath.join(dst_url, key)
+        if server_side:
+            try:
+                # copy, not cp_file, is the server side copy of s3fs and gcsfs
+                dst_fs.copy(src_path, dst_path)
+                return key
+            except NotImplementedError:
+                server_side = False
+        dst_fs.pipe_file(dst_path, src_fs.cat_file(src_path))
+        return key
+
+    batches = [
+        [key for key in keys if key not in last_keys],
+        [key for key in keys if key in last_keys],
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for batch in batches:
+                for future in as_completed([pool.submit(copy, key) for key in batch]):
+                    manifest.add(future.result())
+        finally:
+            manifest.save()
+    manifest.remove()
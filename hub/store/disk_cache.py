@@ -0,0 +1,219 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections.abc import MutableMapping
+from urllib.parse import quote, unquote
+
+from hub.store.store_utils import getitems, setitems
+
+_TMP_PREFIX = ".tmp-"
+
+
+class DiskCache(MutableMapping):
+    def __init__(
+        self,
+        actual_storage: MutableMapping,
+        root: str,
+        max_size: int,
+        cacheable=None,
+    ):
+        """Read-through, write-through cache of immutable actual_storage items in a local directory
+
+        The directory can be shared by several processes and is reused after restarts.
+        Items are written atomically (temporary file + rename) so a crash never leaves a partial item.
+        When the directory grows over max_size least recently used items are evicted.
+        Cached items are never checked against actual_storage, so only items that can't change are cached,
+        other items are read and written through without being stored.
+
+        Parameters
+        ----------
+        actual_storage: MutableMapping
+            Storage which is used for actual storing (not caching)
+        root: str
+            Local directory of the cache
+        max_size: int
+            Maximum size of the cache directory in bytes
+        cacheable: callable, optional
+            cacheable(key) returns True if the item at key doesn't change while the cache is used.
+            If None nothing is cached
+        """
+        self._actual_storage = actual_storage
+        self._root = os.path.expanduser(root)
+        self._max_size = max_size
+        self._cacheable = cacheable or (lambda key: False)
+        self._lock = threading.Lock()
+        os.makedirs(self._root, exist_ok=True)
+        self._total_cached = sum(size for _, size, _ in self._scan())
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        return self._root
+
+    @property
+    def actual_storage(self):
+        return self._actual_storage
+
+    def _path(self, key):
+        return os.path.join(self._root, quote(key, safe=""))
+
+    def _scan(self):
+        """Returns (path, size, mtime) of all cached items and removes leftovers of crashed writes"""
+        items = []
+        for entry in os.scandir(self._root):
+            try:
+                stat = entry.stat()
+                if entry.name.startswith(_TMP_PREFIX):
+                    if stat.st_mtime < time.time() - 3600:
+                        os.remove(entry.path)
+                    continue
+                items.append((entry.path, stat.st_size, stat.st_mtime))
+            except FileNotFoundError:
+                # Removed by another process meanwhile
+                pass
+        return items
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def _write(self, key, value):
+        value = bytes(memoryview(value))
+        path = self._path(key)
+        try:
+            old_size = os.path.getsize(path)
+        except FileNotFoundError:
+            old_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._root, prefix=_TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._total_cached += len(value) - old_size
+            if self._total_cached > self._max_size:
+                self._evict()
+
+    def _evict(self):
+        """Removes least recently used items until the cache is at most 80% full, must be called holding self._lock"""
+        items = sorted(self._scan(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in items)
+        for path, size, _ in items:
+            if total <= 0.8 * self._max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_cached = total
+
+    def _remove(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def __getitem__(self, key):
+        if not self._cacheable(key):
+            return self._actual_storage[key]
+        value = self._read(key)
+        if value is None:
+            value = self._actual_storage[key]
+            self._write(key, value)
+        return value
+
+    def getitems(self, keys, on_error="omit"):
+        """Gets multiple items, all items missing on disk are fetched from actual_storage in one bulk request"""
+        result = {}
+        missing = []
+        for key in keys:
+            value = self._read(key) if self._cacheable(key) else None
+            if value is None:
+                missing.append(key)
+            else:
+                result[key] = value
+        fetched = getitems(self._actual_storage, missing, on_error=on_error)
+        for key, value in fetched.items():
+            if self._cacheable(key):
+                self._write(key, value)
+        result.update(fetched)
+        return result
+
+    def __setitem__(self, key, value):
+        self._actual_storage[key] = value
+        if self._cacheable(key):
+            self._write(key, value)
+        else:
+            self._remove(key)
+
+    def setitems(self, mapping):
+        setitems(self._actual_storage, mapping)
+        for key, value in mapping.items():
+            if self._cacheable(key):
+                self._write(key, value)
+            else:
+                self._remove(key)
+
+    def __delitem__(self, key):
+        self._remove(key)
+        del self._actual_storage[key]
+
+    def __len__(self):
+        return len(self._actual_storage)
+
+    def __iter__(self):
+        yield from self._actual_storage
+
+    def cached_keys(self):
+        """Keys of the items that are currently cached on disk"""
+        return [
+            unquote(entry.name)
+            for entry in os.scandir(self._root)
+            if not entry.name.startswith(_TMP_PREFIX)
+        ]
+
+    def flush(self):
+        if hasattr(self._actual_storage, "flush"):
+            self._actual_storage.flush()
+
+    def commit(self):
+        """ Deprecated alias to flush()"""
+        self.flush()
+
+    def close(self):
+        if hasattr(self._actual_storage, "close"):
+            self._actual_storage.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
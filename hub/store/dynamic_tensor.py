@@ -9,13 +9,16 @@ from shutil import Error
 from hub.schema.features import Shape
 import json
 import math
+import mmap
 
 import numpy as np
 from numpy.lib.arraysetops import isin
 import zarr
+from zarr.indexing import BasicIndexer
 import numcodecs
 
 from hub.store.nested_store import NestedStore
+from hub.utils import _tuple_product
 from hub.store.shape_detector import ShapeDetector
 from hub.defaults import DEFAULT_COMPRESSOR
 
@@ -158,11 +161,20 @@ class DynamicTensor:
             else:
                 start = slice_[0].start or 0
                 end = slice_[0].stop or self.shape[0]
-                real_shapes = [self.get_real_shape(i) for i in range(start, end)]
+                real_shapes = list(self._read_shapes(range(start, end)))
         else:
             real_shapes = None
         return real_shapes
 
+    def _read_shapes(self, samples):
+        """Reads dynamic shapes of samples with a single read of the shape array"""
+        samples = list(samples)
+        if not samples:
+            return np.zeros((0, len(self._dynamic_dims)), dtype=np.int32)
+        if samples[0] >= 0 and samples == list(range(samples[0], samples[-1] + 1)):
+            return self._dynamic_tensor[samples[0] : samples[-1] + 1]
+        return self._dynamic_tensor.get_orthogonal_selection(np.array(samples))
+
     def __getitem__(self, slice_):
         """Gets a slice or slices from tensor"""
         if not isinstance(slice_, abc.Iterable):
@@ -178,9 +190,54 @@ class DynamicTensor:
                 self._get_slice([start + i] + slice_[1:], real_shapes[i])
                 for i in range(len(real_shapes))
             ]
-            return [self._storage_tensor[cur_slice] for cur_slice in slice_list]
+            if self.chunks[0] > 1 and slice_list:
+                samples = self._read_samples(slice_list)
+                if samples is not None:
+                    return samples
+            return [self._read_storage(cur_slice) for cur_slice in slice_list]
         slice_ = self._get_slice(slice_, real_shapes)
-        return self._storage_tensor[slice_]
+        return self._read_storage(slice_)
+
+    def _read_samples(self, slice_list):
+        """Reads consecutive samples of different shapes with a single read of their bounding box,
+        so chunks shared by several samples are fetched and decoded once.
+        Returns list of per sample views or None if the slices can't be combined
+        """
+        box = [slice(slice_list[0][0], slice_list[-1][0] + 1)]
+        for dim in range(1, len(slice_list[0])):
+            items = [cur_slice[dim] for cur_slice in slice_list]
+            if all(item == items[0] for item in items):
+                box.append(items[0])
+                continue
+            starts, stops = [], []
+            for item in items:
+                if isinstance(item, slice):
+                    if item.step not in (None, 1) or item.stop is None:
+                        return None
+                    starts.append(item.start or 0)
+                    stops.append(item.stop)
+                else:
+                    starts.append(item)
+                    stops.append(item + 1)
+            if min(starts) < 0 or min(stops) < 0:
+                return None
+            box.append(slice(min(starts), max(stops)))
+        block = self._read_storage(tuple(box))
+        samples = []
+        for i, cur_slice in enumerate(slice_list):
+            local = [i]
+            for dim in range(1, len(cur_slice)):
+                item = cur_slice[dim]
+                if item == box[dim]:
+                    if isinstance(item, slice):
+                        local.append(slice(None))
+                elif isinstance(item, slice):
+                    start = box[dim].start
+                    local.append(slice((item.start or 0) - start, item.stop - start))
+                else:
+                    local.append(item - box[dim].start)
+            samples.append(block[tuple(local)])
+        return samples
 
     def __setitem__(self, slice_, value):
         """Sets a slice or slices with a value"""
@@ -190,19 +247,12 @@ class DynamicTensor:
         if self._dynamic_tensor and self._enabled_dynamicness:
             self.set_shape(slice_, value)
         slice_ += [slice(0, None, 1) for i in self.max_shape[len(slice_) :]]
+        value_shape = list(value.shape) if hasattr(value, "shape") else None
 
         if self._dynamic_tensor and isinstance(slice_[0], int):
             real_shapes = self._dynamic_tensor[slice_[0]]
         elif self._dynamic_tensor and isinstance(slice_[0], slice):
-            max_shape = value[0].shape
-            for item in value:
-                max_shape = tuple(max(value) for value in zip(max_shape, item.shape))
-            for i in range(len(value)):
-                pad = [
-                    (0, max_shape[dim] - value[i].shape[dim])
-                    for dim in range(value[i].ndim)
-                ]
-                value[i] = np.pad(value[i], pad)
+            value, max_shape = self._pack_values(value)
             real_shapes = np.array(
                 [
                     max_shape[i]
@@ -215,8 +265,8 @@ class DynamicTensor:
 
         if not self._enabled_dynamicness:
             real_shapes = (
-                list(value.shape)
-                if hasattr(value, "shape")
+                value_shape
+                if value_shape is not None
                 else real_shapes
                 if real_shapes is not None
                 else [1]
@@ -224,6 +274,89 @@ class DynamicTensor:
 
         slice_ = self._get_slice(slice_, real_shapes)
         value = self.check_value_shape(value, slice_)
+        self._write_storage(slice_, value)
+
+    def _pack_values(self, value):
+        """Packs values of different shapes into a single zero padded array
+        Returns the array and the shape of its samples
+        """
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            return value, value.shape[1:]
+        shapes = np.array([item.shape for item in value])
+        max_shape = tuple(int(dim) for dim in shapes.max(axis=0))
+        packed = np.zeros((len(value),) + max_shape, dtype=self.dtype)
+        for i, item in enumerate(value):
+            packed[(i,) + tuple(slice(0, dim) for dim in item.shape)] = item
+        return packed, max_shape
+
+    def _read_storage(self, slice_):
+        """Reads slice_ from storage tensor, empty selections never reach the store"""
+        indexer = BasicIndexer(slice_, self._storage_tensor)
+        if 0 in indexer.shape:
+            return np.zeros(indexer.shape, dtype=self.dtype)
+        if self._raw_chunks:
+            value = self._read_raw_chunk(indexer)
+            if value is not None:
+                return value
+        return self._storage_tensor[slice_]
+
+    @property
+    def _raw_chunks(self):
+        """True if chunks are stored as raw array bytes, so they can be used without decoding"""
+        tensor = self._storage_tensor
+        return (
+            tensor.compressor is None
+            and not tensor.filters
+            and tensor.order == "C"
+            and self.dtype != object
+        )
+
+    def _read_raw_chunk(self, indexer):
+        """Reads selection within a single raw chunk as a view of the chunk buffer
+        Memory mapped chunks are returned without any copy, other buffers are copied once.
+        Returns None if the selection spans more chunks or the chunk is missing
+        """
+        projections = list(indexer)
+        if len(projections) != 1:
+            return None
+        chunk_coords, chunk_selection, _ = projections[0]
+        try:
+            buffer = self.chunk_store[self._storage_tensor._chunk_key(chunk_coords)]
+        except KeyError:
+            return None
+        chunk = np.frombuffer(buffer, dtype=self.dtype)
+        if chunk.size != _tuple_product(self.chunks):
+            return None
+        value = chunk.reshape(self.chunks)[chunk_selection]
+        if not isinstance(buffer, mmap.mmap):
+            value = np.array(value)
+        value = value.reshape(indexer.shape)
+        return value[()] if value.ndim == 0 else value
+
+    @property
+    def chunk_store(self):
+        """Store that holds the chunks of the storage tensor"""
+        return self._storage_tensor.chunk_store
+
+    def chunk_keys(self, index: int):
+        """Returns keys of the storage tensor chunks that hold the sample at index"""
+        if index < 0:
+            index += self.shape[0]
+        slice_ = [index] + [slice(0, None, 1) for i in self.max_shape[1:]]
+        slice_ = self._get_slice(slice_, self.get_real_shape(index))
+        indexer = BasicIndexer(slice_, self._storage_tensor)
+        if 0 in indexer.shape:
+            return []
+        return [
+            self._storage_tensor._chunk_key(chunk_coords)
+            for chunk_coords, _, _ in indexer
+        ]
+
+    def _write_storage(self, slice_, value):
+        """Writes value to slice_ of storage tensor, empty selections are skipped"""
+        indexer = BasicIndexer(slice_, self._storage_tensor)
+        if 0 in indexer.shape:
+            return
         self._storage_tensor[slice_] = value
 
     def check_value_shape(self, value, slice_):
@@ -281,11 +414,12 @@ class DynamicTensor:
         """Gets full shape of dynamic_tensor(s)"""
         if isinstance(samples, int):
             shape, shape_offset = [], 0
+            dynamic_shape = self._dynamic_tensor[samples]
             for i in range(1, len(self.shape)):
                 if self.shape[i] is not None:
                     current = self.shape[i]
                 else:
-                    current = self._dynamic_tensor[samples][shape_offset]
+                    current = dynamic_shape[shape_offset]
                     shape_offset += 1
                 shape.append(current)
             return np.array(shape)
@@ -296,7 +430,7 @@ class DynamicTensor:
                     shapes = np.insert(shapes, i - 1, self.shape[i], axis=1)
             return shapes
         elif isinstance(samples, list):
-            shapes = np.array([self._dynamic_tensor[index] for index in samples])
+            shapes = self._read_shapes(samples)
             for i in range(1, len(self.shape)):
                 if self.shape[i] is not None:
                     shapes = np.insert(shapes, i - 1, self.shape[i], axis=1)
@@ -381,6 +515,10 @@ class DynamicTensor:
                 slice_[0].stop if slice_[0].stop is not None else start + value.shape[0]
             )
             dt = self._dynamic_tensor[slice_[0]]
+            if len(slice_) == 1:
+                new_shapes = self._get_shapes_from_values(value, dt)
+                if new_shapes is not None:
+                    return new_shapes
             new_shapes = []
             for i in range(start, stop):
                 new_shape = self.create_shape([i] + slice_[1:], value[i - start])
@@ -388,6 +526,26 @@ class DynamicTensor:
                 new_shapes.append(new_shape)
         return new_shapes
 
+    def _get_shapes_from_values(self, value, current_shapes):
+        """Computes dynamic shapes of whole samples written at once with a single numpy operation
+        Returns None if some sample needs the per sample path
+        """
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            shapes = np.broadcast_to(value.shape[1:], (len(value), value.ndim - 1))
+        else:
+            shapes = np.array([np.shape(item) for item in value])
+        if (
+            shapes.ndim != 2
+            or shapes.shape[1] != len(self.shape) - 1
+            or len(shapes) != len(current_shapes)
+        ):
+            return None
+        new_shapes = shapes[:, [dim - 1 for dim in self._dynamic_dims]]
+        if self.chunks[0] == 1 and (new_shapes < current_shapes).any():
+            # Shrinking samples might leave chunks behind, these are handled per sample
+            return None
+        return np.maximum(current_shapes, new_shapes)
+
     def create_shape(self, slice_, value):
         assert isinstance(slice_[0], int)
         new_shape = []
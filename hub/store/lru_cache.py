@@ -4,22 +4,157 @@ This Source Code Form is subject to the terms of the Mozilla Public License, v.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
 
+import threading
+import zlib
 from collections import OrderedDict
 from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 
+from hub.defaults import (
+    CHUNK_DEFAULT_SIZE,
+    DEFAULT_CACHE_SHARDS,
+    DEFAULT_WRITE_BEHIND_WORKERS,
+)
+from hub.store.store_utils import getitems, setitems
+
+
+class _Flight:
+    """Pending fetch of a single key, concurrent readers of the key wait for its result"""
 
-class DummyLock:
     def __init__(self):
-        pass
+        self._event = threading.Event()
+        self._value = None
+        self._error = None
 
-    def __enter__(self):
-        return self
+    def set_result(self, value):
+        self._value = value
+        self._event.set()
 
-    def __exit__(self, *args):
-        pass
+    def set_error(self, error):
+        self._error = error
+        self._event.set()
+
+    def result(self):
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class _CacheShard:
+    """Independently locked part of LRUCache with its own LRU order and size budget"""
+
+    def __init__(self, max_size):
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.total_cached = 0
+        self.cached_items = OrderedDict()
+        self.dirty = set()
+        self.inflight = {}
+
+    def __getstate__(self):
+        return self.max_size, self.total_cached, self.cached_items, self.dirty
+
+    def __setstate__(self, state):
+        self.__init__(state[0])
+        self.total_cached, self.cached_items, self.dirty = state[1:]
 
 
-Lock = DummyLock
+class _WriteBehind:
+    """Uploads items to storage from a pool of background threads
+
+    At most max_pending uploads are outstanding, put() blocks when the limit is reached.
+    Items stay readable with get() until they are stored.
+    Upload errors are kept and raised by the next raise_errors() or wait() call.
+    """
+
+    def __init__(self, storage: MutableMapping, workers: int, max_pending: int = None):
+        self._storage = storage
+        self._workers = workers
+        self._max_pending = max_pending or 4 * workers
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(self._max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = {}
+        self._errors = []
+
+    def __getstate__(self):
+        self.wait()
+        return self._storage, self._workers, self._max_pending
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def get(self, key):
+        """Returns the value of a not yet stored item or None"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            running = key in self._pending
+            self._pending[key] = value
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers)
+            pool = self._pool
+        if running:
+            # The running upload of the key stores the latest value before finishing
+            return
+        self._slots.acquire()
+        pool.submit(self._upload, key)
+
+    def _upload(self, key):
+        try:
+            while True:
+                with self._lock:
+                    value = self._pending[key]
+                try:
+                    self._storage[key] = value
+                except Exception as err:
+                    with self._lock:
+                        self._errors.append(err)
+                        del self._pending[key]
+                        self._idle.notify_all()
+                    return
+                with self._lock:
+                    if self._pending[key] is value:
+                        del self._pending[key]
+                        self._idle.notify_all()
+                        return
+        finally:
+            self._slots.release()
+
+    def raise_errors(self):
+        with self._lock:
+            if self._errors:
+                err = self._errors[0]
+                self._errors.clear()
+                raise err
+
+    def wait(self):
+        """Waits until all outstanding uploads are done"""
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+        self.raise_errors()
+
+    def close(self):
+        """Waits until all outstanding uploads are done and stops the upload threads
+        The next put() starts them again
+        """
+        try:
+            self.wait()
+        finally:
+            with self._lock:
+                pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+
+def _default_shards(max_size):
+    """Number of shards so that each of them can still hold a default sized chunk"""
+    return max(1, min(DEFAULT_CACHE_SHARDS, int(max_size // CHUNK_DEFAULT_SIZE)))
 
 
 class LRUCache(MutableMapping):
@@ -28,19 +163,50 @@ class LRUCache(MutableMapping):
         cache_storage: MutableMapping,
         actual_storage: MutableMapping,
         max_size,
+        shards: int = None,
+        write_behind: bool = False,
+        write_workers: int = DEFAULT_WRITE_BEHIND_WORKERS,
     ):
         """Creates LRU cache using cache_storage and actual_storage containers
         max_size -> maximum cache size that is allowed
+        shards -> number of independently locked parts the cache is split into by key,
+            by default derived from max_size so that each shard can hold a whole chunk
+        write_behind -> if True dirty items are written to actual_storage by write_workers background threads
+            flush() and close() wait for the outstanding writes, write errors are raised by the next call
+
+        The cache is safe to share between threads.
+        Concurrent misses on the same key result in a single read from actual_storage.
         """
-        self._dirty = set()
-        self._mutex = Lock()
         self._max_size = max_size
         self._cache_storage = cache_storage
         self._actual_storage = actual_storage
-        self._total_cached = 0
-        self._cached_items = OrderedDict()
+        shards = shards or _default_shards(max_size)
+        self._shards = [_CacheShard(max_size / shards) for _ in range(shards)]
+        self._write_behind = (
+            _WriteBehind(actual_storage, write_workers) if write_behind else None
+        )
         # assert len(self._cache_storage) == 0, "Initially cache storage should be empty"
 
+    def _shard(self, key) -> _CacheShard:
+        if len(self._shards) == 1:
+            return self._shards[0]
+        return self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+
+    @property
+    def _cached_items(self):
+        items = OrderedDict()
+        for shard in self._shards:
+            items.update(shard.cached_items)
+        return items
+
+    @property
+    def _dirty(self):
+        return set().union(*(shard.dirty for shard in self._shards))
+
+    @property
+    def _total_cached(self):
+        return sum(shard.total_cached for shard in self._shards)
+
     @property
     def cache_storage(self):
         """Storage which is used for caching
@@ -61,13 +227,52 @@ class LRUCache(MutableMapping):
     def __exit__(self, *args):
         self.close()
 
+    def _check_write_behind(self):
+        """Raises errors of the background writes"""
+        if self._write_behind is not None:
+            self._write_behind.raise_errors()
+
+    def _store(self, key, value):
+        """Writes an item to actual_storage, in write behind mode it is only queued"""
+        if self._write_behind is None:
+            self._actual_storage[key] = value
+        else:
+            self._write_behind.put(key, value)
+
+    def _fetch(self, keys, on_error):
+        """Reads items from actual_storage, items that are still queued for writing are taken from the queue"""
+        result = {}
+        if self._write_behind is not None:
+            for key in keys:
+                value = self._write_behind.get(key)
+                if value is not None:
+                    result[key] = value
+        missing = [key for key in keys if key not in result]
+        result.update(getitems(self._actual_storage, missing, on_error=on_error))
+        return result
+
     def _flush_dirty(self):
-        for item in self._dirty:
-            self._actual_storage[item] = self._cache_storage[item]
-        self._dirty.clear()
+        pending = {}
+        for shard in self._shards:
+            with shard.lock:
+                for item in shard.dirty:
+                    pending[item] = self._cache_storage[item]
+        if self._write_behind is None:
+            setitems(self._actual_storage, pending)
+        else:
+            for item, value in pending.items():
+                self._write_behind.put(item, value)
+        for item, value in pending.items():
+            shard = self._shard(item)
+            with shard.lock:
+                # Item might have been rewritten while flushing, then it stays dirty
+                if item in shard.dirty and self._cache_storage.get(item) is value:
+                    shard.dirty.discard(item)
 
     def flush(self):
         self._flush_dirty()
+        if self._write_behind is not None:
+            self._write_behind.wait()
         if hasattr(self._cache_storage, "flush"):
             self._cache_storage.flush()
         if hasattr(self._actual_storage, "flush"):
@@ -75,6 +280,8 @@ class LRUCache(MutableMapping):
 
     def close(self):
         self._flush_dirty()
+        if self._write_behind is not None:
+            self._write_behind.close()
         if hasattr(self._cache_storage, "close"):
             self._cache_storage.close()
         if hasattr(self._actual_storage, "close"):
@@ -85,33 +292,108 @@ class LRUCache(MutableMapping):
 
     def __getitem__(self, key):
         """ Gets item and puts it in the cache if not there """
-        with self._mutex:
-            if key in self._cached_items:
-                self._cached_items.move_to_end(key)
+        self._check_write_behind()
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.cached_items:
+                shard.cached_items.move_to_end(key)
                 return self._cache_storage[key]
+            flight = shard.inflight.get(key)
+            if flight is None:
+                flight = shard.inflight[key] = _Flight()
+                leader = True
             else:
-                result = self._actual_storage[key]
-                self._free_memory(len(result))
-                self._append_cache(key, result)
-                return result
+                leader = False
+        if not leader:
+            return flight.result()
+        try:
+            result = self._fetch([key], on_error="raise")[key]
+        except Exception as err:
+            self._end_flight(key, flight, error=err)
+            raise
+        return self._end_flight(key, flight, value=result)
+
+    def _end_flight(self, key, flight, value=None, error=None):
+        """Caches the fetched value and wakes up the readers waiting for it"""
+        shard = self._shard(key)
+        with shard.lock:
+            del shard.inflight[key]
+            if error is None:
+                if key in shard.cached_items:
+                    # Item was written while it was being fetched
+                    value = self._cache_storage[key]
+                else:
+                    self._free_memory(shard, len(value))
+                    self._append_cache(shard, key, value)
+        if error is None:
+            flight.set_result(value)
+        else:
+            flight.set_error(error)
+        return value
+
+    def getitems(self, keys, on_error="omit"):
+        """Gets multiple items, all cache misses are fetched from actual_storage in one bulk request"""
+        self._check_write_behind()
+        result = {}
+        fetching = {}
+        waiting = {}
+        for key in keys:
+            shard = self._shard(key)
+            with shard.lock:
+                if key in shard.cached_items:
+                    shard.cached_items.move_to_end(key)
+                    result[key] = self._cache_storage[key]
+                elif key in shard.inflight:
+                    waiting[key] = shard.inflight[key]
+                else:
+                    fetching[key] = shard.inflight[key] = _Flight()
+        if fetching:
+            try:
+                fetched = self._fetch(list(fetching), on_error=on_error)
+            except Exception as err:
+                for key, flight in fetching.items():
+                    self._end_flight(key, flight, error=err)
+                raise
+            for key, flight in fetching.items():
+                if key in fetched:
+                    result[key] = self._end_flight(key, flight, value=fetched[key])
+                else:
+                    self._end_flight(key, flight, error=KeyError(key))
+        for key, flight in waiting.items():
+            try:
+                result[key] = flight.result()
+            except KeyError:
+                if on_error == "raise":
+                    raise
+        return result
+
+    def setitems(self, mapping):
+        """Sets multiple items and puts them in the cache"""
+        for key, value in mapping.items():
+            self[key] = value
 
     def __setitem__(self, key, value):
         """ Sets item and puts it in the cache if not there"""
-        with self._mutex:
-            if key in self._cached_items:
-                self._total_cached -= self._cached_items.pop(key)
-            self._free_memory(len(value))
-            self._append_cache(key, value)
-            if key not in self._dirty:
-                self._dirty.add(key)
+        self._check_write_behind()
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.cached_items:
+                shard.total_cached -= shard.cached_items.pop(key)
+            self._free_memory(shard, len(value))
+            self._append_cache(shard, key, value)
+            shard.dirty.add(key)
 
     def __delitem__(self, key):
+        if self._write_behind is not None:
+            # Queued write of the key must not recreate it after deletion
+            self._write_behind.wait()
         deleted_from_cache = False
-        with self._mutex:
-            if key in self._cached_items:
-                self._total_cached -= self._cached_items.pop(key)
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.cached_items:
+                shard.total_cached -= shard.cached_items.pop(key)
                 del self._cache_storage[key]
-                self._dirty.discard(key)
+                shard.dirty.discard(key)
                 deleted_from_cache = True
             try:
                 del self._actual_storage[key]
@@ -131,18 +413,19 @@ class LRUCache(MutableMapping):
             yield i
         yield from sorted(cached_keys)
 
-    def _free_memory(self, extra_size):
+    def _free_memory(self, shard, extra_size):
+        """Evicts least recently used items of the shard, must be called holding shard.lock"""
         while (
-            self._total_cached > 0 and extra_size + self._total_cached > self._max_size
+            shard.total_cached > 0 and extra_size + shard.total_cached > shard.max_size
         ):
-            item, itemsize = self._cached_items.popitem(last=False)
-            if item in self._dirty:
-                self._actual_storage[item] = self._cache_storage[item]
-                self._dirty.discard(item)
+            item, itemsize = shard.cached_items.popitem(last=False)
+            if item in shard.dirty:
+                self._store(item, self._cache_storage[item])
+                shard.dirty.discard(item)
             del self._cache_storage[item]
-            self._total_cached -= itemsize
+            shard.total_cached -= itemsize
 
-    def _append_cache(self, key, value):
-        self._total_cached += len(value)
-        self._cached_items[key] = len(value)
+    def _append_cache(self, shard, key, value):
+        shard.total_cached += len(value)
+        shard.cached_items[key] = len(value)
         self._cache_storage[key] = value
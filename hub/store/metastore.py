@@ -4,9 +4,11 @@ This Source Code Form is subject to the terms of the Mozilla Public License, v.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
 import json
+import threading
 from collections.abc import MutableMapping
 import posixpath
-from hub import defaults
+from hub.store.rechunker import LAYOUT_META, layout_key
+from hub.store.store_utils import getitems, setitems
 
 
 # TODO: Better version control for PB scale data
@@ -21,31 +23,43 @@ class MetaStorage(MutableMapping):
         return obj
 
     def __init__(self, path, fs_map: MutableMapping, meta_map: MutableMapping, ds):
+        """Storage of a single dataset tensor
+        Tensor metadata (.zarray, .zattrs) is kept in the parsed meta.json shared with ds (ds.meta),
+        changes are written to meta_map once on flush
+        """
         self._fs_map = fs_map
         self._meta = meta_map
+        self._parsed_meta = ds.meta
         self._path = path
         self._ds = ds
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _chunk_name(self, k: str) -> str:
+        """Name of the chunk at zarr key k in the current chunk layout of the tensor (see Dataset.rechunk)"""
+        if "/" in k:
+            return k
+        return layout_key((self._parsed_meta.get(LAYOUT_META) or {}).get(self._path), k)
 
     def find_chunk(self, k: str) -> str:
-        ls = self._ds._chunk_commit_map[self._path][k]
-        cur_node = self._ds._version_node
-        while cur_node is not None:
-            if cur_node.commit_id in ls:
-                return f"{k}:{cur_node.commit_id}"
-            cur_node = cur_node.parent
-        return None
+        # Other threads writing chunks of the tensor update (and compact) the index meanwhile
+        with self._lock:
+            commit_id = self._ds._get_chunk_index(self._path).get(k)
+        return f"{k}:{commit_id}" if commit_id else None
 
     def __getitem__(self, k: str, check=True) -> bytes:
         filename = posixpath.split(k)[1]
         if filename.startswith("."):
-            return bytes(
-                json.dumps(
-                    json.loads(self.to_str(self._meta[defaults.META_FILE]))[k][
-                        self._path
-                    ]
-                ),
-                "utf-8",
-            )
+            return bytes(json.dumps(self._parsed_meta[k][self._path]), "utf-8")
+        k = self._chunk_name(k)
         if check:
             if self._ds._commit_id:
                 k = self.find_chunk(k) or f"{k}:{self._ds._commit_id}"
@@ -54,16 +68,13 @@ class MetaStorage(MutableMapping):
     def get(self, k: str, check=True) -> bytes:
         filename = posixpath.split(k)[1]
         if filename.startswith("."):
-            meta_ = self._meta.get(defaults.META_FILE)
-            if not meta_:
-                return None
-            meta = json.loads(self.to_str(meta_))
-            metak = meta.get(k)
+            metak = self._parsed_meta.get(k)
             if not metak:
                 return None
             item = metak.get(self._path)
             return bytes(json.dumps(item), "utf-8") if item else None
         else:
+            k = self._chunk_name(k)
             if check:
                 if self._ds._commit_id:
                     k = self.find_chunk(k) or f"{k}:{self._ds._commit_id}"
@@ -72,36 +83,62 @@ class MetaStorage(MutableMapping):
     def __setitem__(self, k: str, v: bytes, check=True):
         filename = posixpath.split(k)[1]
         if filename.startswith("."):
-            meta = json.loads(self.to_str(self._meta[defaults.META_FILE]))
+            meta = self._parsed_meta
             meta[k] = meta.get(k) or {}
             meta[k][self._path] = json.loads(self.to_str(v))
-            self._meta[defaults.META_FILE] = bytes(json.dumps(meta), "utf-8")
+            self._ds._meta_dirty = True
         else:
-            chunk_key = k.split(":")[0]
-            if check and self._ds._commit_id:
-                old_filename = self.find_chunk(k)
-                k = f"{k}:{self._ds._commit_id}"
-                if old_filename and k != old_filename:
-                    self.copy_chunk(old_filename, k)
-            commit_id = k.split(":")[-1]
-            self._ds._chunk_commit_map[self._path][chunk_key].add(commit_id)
+            k = self._prepare_chunk_write(self._chunk_name(k), check)
             self._fs_map[k] = v
 
-    def copy_all_chunks(self, from_commit_id: str, to_commit_id: str):
-        ls = {
-            chunk
-            for chunk, commit_ids in self._ds._chunk_commit_map[self._path].items()
-            if from_commit_id in commit_ids
-        }
-
-        for chunk in ls:
-            from_path = f"{chunk}:{from_commit_id}"
-            to_path = f"{chunk}:{to_commit_id}"
-            self.copy_chunk(from_path, to_path)
-
-    def copy_chunk(self, from_chunk: str, to_chunk: str):
-        data = self.__getitem__(from_chunk, False)
-        self.__setitem__(to_chunk, data, False)
+    def _prepare_chunk_write(self, k: str, check=True) -> str:
+        """Updates version info for a chunk that is about to be written and returns its storage key
+        Chunks of the tensor can be written from several threads, version info is updated
+        and read (find_chunk) under a lock
+        """
+        chunk_key = k.split(":")[0]
+        if check and self._ds._commit_id:
+            # Chunks of ancestor commits are never copied, zarr always writes whole chunks
+            # so the first write of a chunk in a commit creates its own version
+            k = f"{k}:{self._ds._commit_id}"
+        commit_id = k.split(":")[-1]
+        with self._lock:
+            commit_ids = self._ds._chunk_commit_map[self._path][chunk_key]
+            if commit_id not in commit_ids:
+                commit_ids.add(commit_id)
+                self._ds._version_log.chunk_added(self._path, chunk_key, commit_id)
+                self._ds._get_chunk_index(self._path).update(chunk_key, commit_ids)
+        return k
+
+    def getitems(self, keys, on_error="omit"):
+        """Gets multiple chunks at once, version resolution is done before a single bulk read"""
+        result = {}
+        chunk_keys = {}
+        for k in keys:
+            if posixpath.split(k)[1].startswith("."):
+                try:
+                    result[k] = self[k]
+                except KeyError:
+                    if on_error == "raise":
+                        raise
+            elif self._ds._commit_id:
+                name = self._chunk_name(k)
+                chunk_keys[self.find_chunk(name) or f"{name}:{self._ds._commit_id}"] = k
+            else:
+                chunk_keys[self._chunk_name(k)] = k
+        items = getitems(self._fs_map, list(chunk_keys), on_error=on_error)
+        result.update({chunk_keys[k]: v for k, v in items.items()})
+        return result
+
+    def setitems(self, mapping):
+        """Sets multiple chunks at once with a single bulk write"""
+        chunks = {}
+        for k, v in mapping.items():
+            if posixpath.split(k)[1].startswith("."):
+                self[k] = v
+            else:
+                chunks[self._prepare_chunk_write(self._chunk_name(k))] = v
+        setitems(self._fs_map, chunks)
 
     def __len__(self):
         return len(self._fs_map) + 1
@@ -115,17 +152,24 @@ class MetaStorage(MutableMapping):
         if not filename.startswith("."):
             filename = self.find_chunk(filename) or f"{filename}:{self._ds._commit_id}"
         if filename.startswith("."):
-            meta = json.loads(self.to_str(self._meta[defaults.META_FILE]))
+            meta = self._parsed_meta
             meta[k] = meta.get(k) or dict()
             meta[k][self._path] = None
-            self._meta[defaults.META_FILE] = bytes(json.dumps(meta), "utf-8")
+            self._ds._meta_dirty = True
         else:
+            k = self._chunk_name(k)
             chunk_key = k.split(":")[0]
             if self._ds._commit_id:
                 k = self.find_chunk(k) or f"{k}:{self._ds._commit_id}"
             commit_id = k.split(":")[-1]
             try:
-                self._ds._chunk_commit_map[self._path][chunk_key].remove(commit_id)
+                with self._lock:
+                    commit_ids = self._ds._chunk_commit_map[self._path][chunk_key]
+                    commit_ids.remove(commit_id)
+                    self._ds._version_log.chunk_removed(
+                        self._path, chunk_key, commit_id
+                    )
+                    self._ds._get_chunk_index(self._path).update(chunk_key, commit_ids)
             except Exception:
                 try:
                     del self._fs_map[k]
@@ -133,6 +177,7 @@ class MetaStorage(MutableMapping):
                     pass
 
     def flush(self):
+        self._ds._flush_meta()
         self._meta.flush()
         self._fs_map.flush()
 
@@ -141,6 +186,7 @@ class MetaStorage(MutableMapping):
         self.flush()
 
     def close(self):
+        self._ds._flush_meta()
         self._meta.close()
         self._fs_map.close()
 
@@ -0,0 +1,94 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import mmap
+import os
+import posixpath
+import tempfile
+from collections.abc import MutableMapping
+
+
+class MMapStore(MutableMapping):
+    def __init__(self, root: str):
+        """Storage of a local folder where items are memory mapped files
+
+        Items are returned as copy-on-write mmap objects, so numpy arrays over them
+        read the pages of the file directly without copying it into memory first.
+        Writes replace the file atomically, arrays mapped before keep seeing the old content.
+        """
+        self.root = os.path.abspath(os.path.expanduser(root))
+
+    def _path(self, k: str) -> str:
+        return os.path.join(self.root, *k.split("/"))
+
+    def __getitem__(self, k: str):
+        try:
+            with open(self._path(k), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise KeyError(k)
+
+    def __setitem__(self, k: str, v):
+        path = self._path(k)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(v)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def __delitem__(self, k: str):
+        try:
+            os.remove(self._path(k))
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise KeyError(k)
+
+    def __contains__(self, k) -> bool:
+        return os.path.isfile(self._path(k))
+
+    def getitems(self, keys, on_error="omit"):
+        """Maps multiple files at once, mapping is lazy so there is nothing to read ahead"""
+        result = {}
+        for k in keys:
+            try:
+                result[k] = self[k]
+            except KeyError:
+                if on_error == "raise":
+                    raise
+        return result
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __iter__(self):
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.relpath(os.path.join(folder, name), self.root)
+                yield posixpath.join(*path.split(os.sep))
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        """ Deprecated alias to flush()"""
+        self.flush()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
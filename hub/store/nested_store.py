@@ -8,6 +8,8 @@ from collections.abc import MutableMapping
 
 import posixpath
 
+from hub.store.store_utils import getitems, setitems
+
 
 class NestedStore(MutableMapping):
     def __init__(self, storage: MutableMapping, root: str):
@@ -23,6 +25,18 @@ class NestedStore(MutableMapping):
     def __delitem__(self, k):
         del self._storage[posixpath.join(self._root, k)]
 
+    def getitems(self, keys, on_error="omit"):
+        keys = list(keys)
+        full_keys = [posixpath.join(self._root, k) for k in keys]
+        items = getitems(self._storage, full_keys, on_error=on_error)
+        return {k: items[fk] for k, fk in zip(keys, full_keys) if fk in items}
+
+    def setitems(self, mapping):
+        setitems(
+            self._storage,
+            {posixpath.join(self._root, k): v for k, v in mapping.items()},
+        )
+
     def __iter__(self):
         prefix = self._root + "/"
         for item in self._storage:
@@ -0,0 +1,368 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import collections.abc as abc
+import json
+import threading
+
+import numpy as np
+import numcodecs
+from numcodecs.compat import ensure_bytes
+import zarr
+
+from hub.defaults import (
+    CHUNK_DEFAULT_SIZE,
+    DEFAULT_COMPRESSOR,
+    DEFAULT_PACKED_INDEX_CHUNK,
+)
+from hub.exceptions import DynamicTensorNotFoundException, ValueShapeError
+from hub.numcodecs import PngCodec
+from hub.store.dynamic_tensor import DynamicTensor, get_dynamic_dims
+from hub.store.nested_store import NestedStore
+from hub.store.shape_detector import ShapeDetector
+from hub.store.store_utils import getitems
+
+PACKED_META = ".hub.packed_tensor"
+PACKED_CHUNKS = "--packed--"
+PACKED_INDEX = "--index--"
+
+# Index columns, followed by the shape of the sample
+CHUNK, OFFSET, NBYTES = 0, 1, 2
+
+
+def _get_codec(compressor):
+    if compressor == "default":
+        return zarr.storage.default_compressor
+    if isinstance(compressor, PngCodec):
+        raise ValueError("png compressor is not supported for packed tensors")
+    return compressor
+
+
+class PackedTensor(DynamicTensor):
+    """Class for handling tensor with samples of different shapes
+
+    Instead of a storage tensor allocated at max_shape, bytes of the samples are appended
+    one after another to chunks of about chunk_size bytes,
+    an index array stores chunk, offset, number of bytes and shape of each sample.
+    Storage and transfer size scales with the real size of the samples, not with max_shape.
+    Overwritten samples are appended again, their previous bytes stay unused in the old chunk.
+    """
+
+    def __init__(
+        self,
+        fs_map,
+        mode: str = "r",
+        shape=None,
+        max_shape=None,
+        dtype="float64",
+        chunks=None,
+        compressor=DEFAULT_COMPRESSOR,
+        chunk_size: int = CHUNK_DEFAULT_SIZE,
+    ):
+        """Constructor
+        Parameters
+        ----------
+        fs_map : MutableMap
+            Maps filesystem to MutableMap
+        mode : str
+            Mode in which tensor is opened (default is "r"), can be used to overwrite or append
+        shape : Tuple[int | None]
+            Shape of tensor, (must be specified) can contains Nones meaning the shape might change
+        max_shape: Tuple[int | None]
+            Maximum possible shape of the tensor
+        dtype : str
+            Numpy analog dtype for this tensor, object dtype is not supported
+        chunks : Tuple[int] | True
+            Samples per chunk reported to readers that batch by chunks, detected automatically if not set
+        chunk_size : int
+            Size of packed chunks in bytes before compression
+        """
+        self.fs_map = fs_map
+        meta = fs_map.get(PACKED_META)
+        exist = False if "w" in mode else meta is not None
+        if "r" in mode and not exist:
+            raise DynamicTensorNotFoundException()
+
+        if exist:
+            meta = json.loads(meta.decode("utf-8"))
+            self._index = zarr.open_array(NestedStore(fs_map, PACKED_INDEX), mode=mode)
+        else:
+            if shape is None:
+                raise TypeError("shape cannot be none")
+            if np.dtype(dtype) == object:
+                raise TypeError("object dtype is not supported for packed tensors")
+            shapeDt = ShapeDetector(
+                shape, max_shape, chunks, dtype, compressor=compressor
+            )
+            codec = _get_codec(compressor)
+            meta = {
+                "shape": shapeDt.shape,
+                "max_shape": shapeDt.max_shape,
+                "chunks": shapeDt.chunks,
+                "dtype": np.dtype(dtype).str,
+                "compressor": codec.get_config() if codec else None,
+                "chunk_size": chunk_size,
+                "chunk_count": 0,
+            }
+            columns = 3 + len(shapeDt.shape) - 1
+            self._index = zarr.zeros(
+                (shapeDt.shape[0], columns),
+                dtype=np.int64,
+                chunks=(DEFAULT_PACKED_INDEX_CHUNK, columns),
+                store=NestedStore(fs_map, PACKED_INDEX),
+                overwrite=True,
+                compressor=None,
+            )
+
+        self._meta = meta
+        self.shape = tuple(meta["shape"])
+        self.max_shape = tuple(meta["max_shape"])
+        self.chunks = tuple(meta["chunks"])
+        self.dtype = np.dtype(meta["dtype"])
+        self._codec = (
+            numcodecs.get_codec(meta["compressor"]) if meta["compressor"] else None
+        )
+        self._dynamic_dims = get_dynamic_dims(self.shape)
+        self._empty_shape = tuple(dim or 0 for dim in self.shape[1:])
+        self._enabled_dynamicness = True
+        self._lock = threading.RLock()
+        self._tail = None
+        self._tail_id = None
+        self._tail_dirty = False
+        self._decoded = {}
+        if not exist:
+            self._write_meta()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _write_meta(self):
+        self.fs_map[PACKED_META] = bytes(json.dumps(self._meta), "utf-8")
+
+    def _chunk_key(self, chunk_id: int) -> str:
+        return f"{PACKED_CHUNKS}/{chunk_id}"
+
+    def _decode(self, data) -> bytes:
+        return ensure_bytes(self._codec.decode(data) if self._codec else data)
+
+    def _load_tail(self):
+        """Continues appending to the last chunk if it has room left, otherwise starts a new chunk"""
+        count = self._meta["chunk_count"]
+        data = self.fs_map.get(self._chunk_key(count - 1)) if count else None
+        data = self._decode(data) if data is not None else None
+        if data is not None and len(data) < self._meta["chunk_size"]:
+            self._tail_id, self._tail = count - 1, bytearray(data)
+        else:
+            self._new_tail()
+
+    def _new_tail(self):
+        self._tail_id, self._tail = self._meta["chunk_count"], bytearray()
+        self._tail_dirty = True
+        self._meta["chunk_count"] += 1
+        self._write_meta()
+
+    def _store_tail(self):
+        if self._tail is not None and self._tail_dirty:
+            data = bytes(self._tail)
+            self.fs_map[self._chunk_key(self._tail_id)] = (
+                self._codec.encode(data) if self._codec else data
+            )
+            self._tail_dirty = False
+
+    def _append(self, sample: np.ndarray):
+        """Appends bytes of the sample to the last chunk and returns its index row"""
+        data = np.ascontiguousarray(sample).tobytes()
+        if self._tail is None:
+            self._load_tail()
+        if self._tail and len(self._tail) + len(data) > self._meta["chunk_size"]:
+            self._store_tail()
+            self._new_tail()
+        offset = len(self._tail)
+        self._tail.extend(data)
+        self._tail_dirty = True
+        return [self._tail_id + 1, offset, len(data)] + list(sample.shape)
+
+    def _read_rows(self, rows):
+        """Reads samples of the index rows, each chunk is fetched and decoded once"""
+        chunk_ids = {int(row[CHUNK]) - 1 for row in rows if row[CHUNK] > 0}
+        chunk_ids.discard(self._tail_id if self._tail is not None else None)
+        decoded = {c: self._decoded[c] for c in chunk_ids if c in self._decoded}
+        keys = {self._chunk_key(c): c for c in chunk_ids if c not in decoded}
+        for key, data in getitems(self.fs_map, list(keys), on_error="raise").items():
+            decoded[keys[key]] = self._decode(data)
+        self._decoded = decoded
+        samples = []
+        for row in rows:
+            if row[CHUNK] == 0:
+                samples.append(np.zeros(self._empty_shape, dtype=self.dtype))
+                continue
+            chunk_id, shape = int(row[CHUNK]) - 1, tuple(int(dim) for dim in row[3:])
+            buffer = self._tail if chunk_id == self._tail_id else decoded[chunk_id]
+            sample = np.frombuffer(
+                buffer,
+                dtype=self.dtype,
+                count=int(row[NBYTES]) // self.dtype.itemsize,
+                offset=int(row[OFFSET]),
+            )
+            samples.append(sample.reshape(shape).copy())
+        return samples
+
+    def _check_sample(self, value) -> np.ndarray:
+        sample = np.asarray(value, dtype=self.dtype)
+        if sample.ndim != len(self.shape) - 1:
+            raise ValueShapeError(self.shape[1:], sample.shape)
+        for dim, expected, max_dim in zip(
+            sample.shape, self.shape[1:], self.max_shape[1:]
+        ):
+            if (expected is not None and dim != expected) or dim > max_dim:
+                raise ValueShapeError(self.max_shape[1:], sample.shape)
+        return sample
+
+    def _merge_sample(self, index: int, slice_, value) -> np.ndarray:
+        """Writes value to a part of the sample at index, the sample grows if needed"""
+        current = self._read_rows([self._index[index]])[0]
+        shape = []
+        for i, dim in enumerate(current.shape):
+            item = slice_[i] if i < len(slice_) else slice(None)
+            if self.shape[i + 1] is not None:
+                shape.append(self.shape[i + 1])
+            elif isinstance(item, int):
+                shape.append(max(dim, item + 1))
+            elif item.stop is not None and item.stop >= 0:
+                shape.append(max(dim, item.stop))
+            else:
+                shape.append(dim)
+        sample = np.zeros(shape, dtype=self.dtype)
+        sample[tuple(slice(0, dim) for dim in current.shape)] = current
+        sample[tuple(slice_)] = value
+        return sample
+
+    def _normalize_index(self, index: int) -> int:
+        return index + self.shape[0] if index < 0 else index
+
+    def __getitem__(self, slice_):
+        """Gets a slice or slices from tensor"""
+        if not isinstance(slice_, abc.Iterable):
+            slice_ = [slice_]
+        slice_ = list(slice_)
+        with self._lock:
+            if isinstance(slice_[0], int):
+                row = self._index[self._normalize_index(slice_[0])]
+                return self._read_rows([row])[0][tuple(slice_[1:])]
+            rows = self._index[slice_[0]]
+            samples = [sample[tuple(slice_[1:])] for sample in self._read_rows(rows)]
+        if self.is_dynamic:
+            return samples
+        if not samples:
+            return np.zeros((0,) + self._empty_shape, dtype=self.dtype)[
+                tuple([slice(None)] + slice_[1:])
+            ]
+        return np.stack(samples)
+
+    def __setitem__(self, slice_, value):
+        """Sets a slice or slices with a value"""
+        if not isinstance(slice_, abc.Iterable):
+            slice_ = [slice_]
+        slice_ = list(slice_)
+        partial = any(item != slice(None) for item in slice_[1:])
+        with self._lock:
+            if isinstance(slice_[0], int):
+                indexes = [self._normalize_index(slice_[0])]
+                value = [value]
+            else:
+                indexes = range(*slice_[0].indices(self.shape[0]))
+                if len(value) != len(indexes):
+                    raise ValueShapeError((len(indexes),), (len(value),))
+            rows = []
+            for index, item in zip(indexes, value):
+                if partial:
+                    item = self._merge_sample(index, slice_[1:], item)
+                rows.append(self._append(self._check_sample(item)))
+            if not rows:
+                return
+            if isinstance(indexes, range) and indexes.step == 1:
+                self._index[indexes.start : indexes.stop] = np.array(rows)
+            else:
+                for index, row in zip(indexes, rows):
+                    self._index[index] = row
+
+    def get_shape_samples(self, samples):
+        """Gets full shape of samples"""
+        if isinstance(samples, int):
+            rows = self._index[self._normalize_index(samples)][np.newaxis]
+        elif isinstance(samples, list):
+            rows = self._index.get_orthogonal_selection(np.array(samples))
+        else:
+            rows = self._index[samples]
+        shapes = rows[:, 3:].copy()
+        shapes[rows[:, CHUNK] == 0] = self._empty_shape
+        return shapes[0] if isinstance(samples, int) else shapes
+
+    def get_shape(self, slice_):
+        """Gets the shape of the slice from tensor"""
+        if isinstance(slice_, (int, slice)):
+            slice_ = [slice_]
+        if not self.is_dynamic:
+            return self.combine_shape(np.array(self.shape), slice_)
+        return self.combine_shape(self.get_shape_samples(slice_[0]), slice_[1:])
+
+    def get_shape_from_value(self, slice_, value):
+        """Gets dynamic shapes of the samples in value"""
+        dims = [dim - 1 for dim in self._dynamic_dims]
+        if isinstance(slice_[0], int):
+            return np.array(np.shape(value))[dims]
+        return np.array([np.shape(item) for item in value])[:, dims]
+
+    def set_shape(self, slice_, value):
+        """Shapes are stored together with the samples, nothing to set"""
+
+    def set_dynamic_shape(self, slice_, shape):
+        """Shapes are stored together with the samples, nothing to set"""
+
+    def resize_shape(self, size: int) -> None:
+        """Changes the number of samples"""
+        self.shape = (size,) + self.shape[1:]
+        self.max_shape = (size,) + self.max_shape[1:]
+        self._index.resize(size, self._index.shape[1])
+        self._meta["shape"], self._meta["max_shape"] = self.shape, self.max_shape
+        self._write_meta()
+
+    @property
+    def chunk_store(self):
+        """Store that holds the packed chunks"""
+        return self.fs_map
+
+    def chunk_keys(self, index: int):
+        """Returns keys of the packed chunks that hold the sample at index"""
+        row = self._index[self._normalize_index(index)]
+        if row[CHUNK] == 0:
+            return []
+        return [self._chunk_key(int(row[CHUNK]) - 1)]
+
+    @property
+    def chunksize(self):
+        return self.chunks
+
+    @property
+    def is_dynamic(self):
+        return bool(self._dynamic_dims)
+
+    def flush(self):
+        with self._lock:
+            self._store_tail()
+            # Chunks might change on checkout, so the tail and decoded chunks are read again
+            self._tail, self._tail_id, self._decoded = None, None, {}
+        self.fs_map.flush()
+
+    def close(self):
+        self.flush()
+        self.fs_map.close()
@@ -0,0 +1,155 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from hub.defaults import (
+    DEFAULT_PREFETCH_DEPTH,
+    DEFAULT_PREFETCH_SIZE,
+    DEFAULT_PREFETCH_WORKERS,
+)
+from hub.store.store_utils import getitems
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        tensors,
+        indexes,
+        depth: int = DEFAULT_PREFETCH_DEPTH,
+        max_size: int = DEFAULT_PREFETCH_SIZE,
+        workers: int = DEFAULT_PREFETCH_WORKERS,
+    ):
+        """Reads chunks of upcoming samples in background threads
+
+        Fetched chunks land in the caches of the tensor storage (LRUCache, DiskCache),
+        so the sample reads that follow are served locally instead of waiting for the network.
+        The reader reports its progress with consume(position), at most depth chunk groups
+        or max_size bytes of chunks ahead of that position are kept in flight.
+        Without tensors nothing is read ahead and no threads are started.
+
+        Parameters
+        ----------
+        tensors: list of DynamicTensor
+            Tensors whose chunks are prefetched
+        indexes: iterable of int
+            Access plan, sample indexes in the order they are going to be read
+        depth: int, optional
+            Maximum number of sample chunk groups read ahead
+        max_size: int, optional
+            Maximum number of bytes read ahead, should be well below the size of the memory cache
+        workers: int, optional
+            Number of threads reading in parallel
+        """
+        self._tensors = list(tensors)
+        self._indexes = list(indexes)
+        self._depth = depth
+        self._max_size = max_size
+        self._cond = threading.Condition()
+        self._ahead = deque()  # (position, size) of the groups read ahead of the reader
+        self._consumed = 0
+        self._next = 0
+        self._stopped = False
+        self._pool = self._thread = None
+        if self._tensors:
+            self._pool = ThreadPoolExecutor(max_workers=workers)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        """Iterates over the access plan marking each index as consumed"""
+        for position, index in enumerate(self._indexes):
+            self.consume(position)
+            yield index
+
+    def consume(self, position: int):
+        """Reports that the reader is at position of the access plan
+        Jumping to a position that was not prefetched restarts the prefetching from there
+        """
+        with self._cond:
+            if position < self._consumed or position > self._next:
+                self._next = position
+                self._ahead.clear()
+            self._consumed = position
+            while self._ahead and self._ahead[0][0] < position:
+                self._ahead.popleft()
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._pool.shutdown(wait=True)
+
+    def _run(self):
+        last_keys = None
+        while True:
+            with self._cond:
+                # At the end of the plan the reader might still jump back
+                while not self._stopped and self._next >= len(self._indexes):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                position = self._next
+                self._next += 1
+            keys = self._chunk_keys(self._indexes[position])
+            if keys == last_keys:
+                continue
+            last_keys = keys
+            size = sum(self._chunk_size(tensor) * len(k) for tensor, k in keys)
+            with self._cond:
+                while (
+                    not self._stopped
+                    and self._ahead
+                    and (
+                        len(self._ahead) >= self._depth
+                        or sum(s for _, s in self._ahead) + size > self._max_size
+                    )
+                ):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                if position < self._consumed or self._next != position + 1:
+                    # Reader moved meanwhile, the group is useless now
+                    continue
+                self._ahead.append((position, size))
+            for tensor, k in keys:
+                self._pool.submit(self._fetch, tensor, k)
+
+    def _chunk_keys(self, index):
+        """Returns (tensor, chunk keys) pairs of all chunks holding the sample"""
+        keys = []
+        for tensor in self._tensors:
+            try:
+                keys.append((tensor, tuple(tensor.chunk_keys(index))))
+            except Exception:
+                # Sample is out of bounds, the read itself will report it
+                pass
+        return keys
+
+    @staticmethod
+    def _chunk_size(tensor):
+        return int(np.prod(tensor.chunks)) * tensor.dtype.itemsize
+
+    @staticmethod
+    def _fetch(tensor, keys):
+        try:
+            getitems(tensor.chunk_store, keys)
+        except Exception:
+            # Prefetching is best effort, failures surface when the sample is read
+            pass
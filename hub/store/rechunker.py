@@ -0,0 +1,170 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import itertools
+import json
+import re
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+
+import zarr
+
+from hub import defaults
+
+LAYOUT_META = ".hub.layout"
+_CHUNK_KEY = re.compile(r"^\d+(\.\d+)*$")
+_LAYOUT_KEY = re.compile(r"^--layout-(\w+)--/(.*)$")
+
+
+class _VersionView(MutableMapping):
+    """Zarr store over the chunks of a single version, array metadata is served from memory"""
+
+    def __init__(self, storage: MutableMapping, meta: dict, resolve):
+        self._storage = storage
+        self._meta = meta
+        self._resolve = resolve
+
+    def __getitem__(self, k):
+        if k == ".zarray":
+            return bytes(json.dumps(self._meta), "utf-8")
+        key = None if k.startswith(".") else self._resolve(k)
+        if key is None:
+            raise KeyError(k)
+        return self._storage[key]
+
+    def __setitem__(self, k, v):
+        if k.startswith("."):
+            raise KeyError(k)
+        self._storage[self._resolve(k)] = v
+
+    def __delitem__(self, k):
+        raise KeyError(k)
+
+    def __iter__(self):
+        yield ".zarray"
+
+    def __len__(self):
+        return 1
+
+
+def chunk_region(coords, chunks, shape):
+    """Slices of the array covered by the chunk at coords"""
+    return tuple(
+        slice(c * ch, min((c + 1) * ch, s)) for c, ch, s in zip(coords, chunks, shape)
+    )
+
+
+def overlapping_chunks(region, chunks):
+    """Coords of all chunks of the chunks grid that overlap region"""
+    ranges = [
+        range(sl.start // ch, (sl.stop - 1) // ch + 1) if sl.stop > sl.start else []
+        for sl, ch in zip(region, chunks)
+    ]
+    return itertools.product(*ranges)
+
+
+def is_chunk_key(key: str) -> bool:
+    """True if key is a chunk of the storage tensor (not metadata or dynamic shapes)"""
+    return _CHUNK_KEY.match(key) is not None
+
+
+def layout_key(layout, key: str) -> str:
+    """Name of the chunk at key in the chunk layout, chunks of the initial layout (None) keep their keys"""
+    return f"--layout-{layout}--/{key}" if layout else key
+
+
+def split_layout_key(name: str):
+    """Returns (layout, key) of a chunk name created by layout_key"""
+    match = _LAYOUT_KEY.match(name)
+    return (match.group(1), match.group(2)) if match else (None, name)
+
+
+def chunk_coords(key: str):
+    return tuple(int(c) for c in key.split("."))
+
+
+def chunk_key(coords) -> str:
+    return ".".join(str(c) for c in coords)
+
+
+def rechunk(
+    storage: MutableMapping,
+    meta: dict,
+    chunks,
+    versions: dict,
+    layout: str,
+    workers: int = defaults.DEFAULT_RECHUNK_WORKERS,
+):
+    """Writes chunks of the zarr array stored in storage with a new chunk shape to a new chunk layout
+
+    Parameters
+    ----------
+    storage: MutableMapping
+        Storage holding the chunks, keys are chunk names followed by a version suffix
+    meta: dict
+        Zarr metadata (.zarray) of the array
+    chunks: tuple
+        New chunk shape
+    versions: dict
+        Maps version suffix (":commit_id", "" for unversioned arrays) to tuple of
+        chunk keys stored by the version and resolve(key) function returning storage key
+        of the chunk visible from the version or None
+    layout: str
+        Token of the new layout, new chunks are stored under layout_key(layout, key)
+    workers: int
+        Number of new chunks written in parallel, bounds the memory used
+
+    Each new chunk that overlaps chunks stored by a version is written for that version with data visible from it,
+    so resolving new chunks through the closest ancestor gives the same data as resolving the old ones.
+    Chunks of the old layout are left untouched, the caller switches to the new layout by updating metadata.
+    Returns dict mapping version suffix to sorted chunk keys written for the version
+    """
+    chunks, shape = tuple(chunks), tuple(meta["shape"])
+    new_meta = dict(meta, chunks=list(chunks))
+    tasks, result = [], {}
+    for suffix, (keys, resolve) in versions.items():
+        new_coords = set()
+        for key in keys:
+            region = chunk_region(chunk_coords(key), meta["chunks"], shape)
+            new_coords.update(overlapping_chunks(region, chunks))
+        result[suffix] = sorted(chunk_key(coords) for coords in new_coords)
+        source = zarr.Array(_VersionView(storage, meta, resolve), read_only=True)
+        target = zarr.Array(
+            _VersionView(
+                storage,
+                new_meta,
+                lambda k, suffix=suffix: f"{layout_key(layout, k)}{suffix}",
+            )
+        )
+        tasks += [(source, target, coords) for coords in sorted(new_coords)]
+
+    def write_chunk(task):
+        source, target, coords = task
+        region = chunk_region(coords, chunks, shape)
+        target[region] = source[region]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(write_chunk, tasks))
+    if hasattr(storage, "flush"):
+        storage.flush()
+    return result
+
+
+def remove_chunks(
+    storage: MutableMapping, keys, workers: int = defaults.DEFAULT_RECHUNK_WORKERS
+):
+    """Removes chunks of a layout that is no longer used, missing chunks are ignored"""
+
+    def remove_chunk(key):
+        try:
+            del storage[key]
+        except KeyError:
+            pass
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(remove_chunk, keys))
+    if hasattr(storage, "flush"):
+        storage.flush()
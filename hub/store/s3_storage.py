@@ -5,6 +5,7 @@ If a copy of the MPL was not distributed with this file, You can obtain one at h
 """
 
 from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 import posixpath
 
 import boto3
@@ -132,6 +133,38 @@ class S3Storage(MutableMapping):
             logger.error(err)
             raise S3Exception(err)
 
+    def _map_parallel(self, fn, items):
+        """Applies fn to every item using up to `parallel` threads, so that requests share the client connection pool"""
+        items = list(items)
+        if len(items) <= 1:
+            return [_call_safe(fn, item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.parallel, len(items))) as pool:
+            return list(pool.map(lambda item: _call_safe(fn, item), items))
+
+    def getitems(self, keys, on_error="omit"):
+        """Gets multiple keys concurrently
+        Keys that do not exist are left out of the result if on_error is "omit", otherwise KeyError is raised
+        """
+        keys = list(keys)
+        self.check_update_creds()
+        result = {}
+        for key, (value, err) in zip(keys, self._map_parallel(self.__getitem__, keys)):
+            if err is None:
+                result[key] = value
+            elif not isinstance(err, KeyError) or on_error == "raise":
+                raise err
+        return result
+
+    def setitems(self, mapping):
+        """Sets multiple keys concurrently"""
+        self.check_update_creds()
+        results = self._map_parallel(
+            lambda item: self.__setitem__(*item), list(mapping.items())
+        )
+        for _, err in results:
+            if err is not None:
+                raise err
+
     def __delitem__(self, path):
         self.check_update_creds()
         try:
@@ -149,3 +182,11 @@ class S3Storage(MutableMapping):
         self.check_update_creds()
         items = self.s3fs.ls(self.bucketpath, detail=False, refresh=True)
         yield from [item[len(self.bucketpath) + 1 :] for item in items]
+
+
+def _call_safe(fn, item):
+    """Calls fn(item) and returns (result, exception) instead of raising"""
+    try:
+        return fn(item), None
+    except Exception as err:
+        return None, err
@@ -10,7 +10,13 @@ import math
 
 import numpy as np
 
-from hub.defaults import CHUNK_DEFAULT_SIZE, OBJECT_CHUNK, DEFAULT_COMPRESSOR
+from hub.defaults import (
+    CHUNK_DEFAULT_SIZE,
+    CHUNK_MAX_UNCOMPRESSED_SIZE,
+    CHUNK_RANDOM_ACCESS_SIZE,
+    OBJECT_CHUNK,
+    DEFAULT_COMPRESSOR,
+)
 from hub.exceptions import HubException
 
 
@@ -183,3 +189,86 @@ class ShapeDetector:
     @property
     def chunksize(self):
         return self._chunksize
+
+
+ACCESS_PATTERNS = ("sequential", "random", "spatial")
+
+
+def estimate_compression_ratio(samples, compressor) -> float:
+    """Ratio between raw and compressed size of samples encoded with compressor"""
+    raw_size, compressed_size = 0, 0
+    for sample in samples:
+        sample = np.ascontiguousarray(sample)
+        try:
+            encoded = compressor.encode(sample) if compressor else sample
+        except Exception:
+            encoded = sample
+        raw_size += sample.nbytes
+        compressed_size += len(memoryview(encoded).cast("B"))
+    return raw_size / compressed_size if compressed_size else 1.0
+
+
+def get_adaptive_chunks(
+    max_shape,
+    dtype,
+    sample_shapes,
+    compression_ratio=1.0,
+    access_pattern="sequential",
+    chunksize=CHUNK_DEFAULT_SIZE,
+):
+    """
+    Chooses chunks of a tensor from real shapes and compression ratio of its samples,
+    so that compressed chunks are about chunksize bytes
+
+    Parameters
+    ----------
+    max_shape: tuple
+        the max shape of the whole array
+    dtype: type
+        the type of the element (int, float)
+    sample_shapes: list of tuples
+        shapes of samples observed so far
+    compression_ratio: float
+        raw size divided by compressed size of the observed samples
+    access_pattern: str
+        "sequential" (default) packs whole samples into chunks,
+        "random" keeps chunks around CHUNK_RANDOM_ACCESS_SIZE so reading one sample fetches little else,
+        "spatial" splits samples into tiles for reading crops
+    chunksize: int (optional)
+        target compressed size of chunks for sequential and spatial access
+    """
+    if access_pattern not in ACCESS_PATTERNS:
+        raise ValueError(
+            f"access_pattern {access_pattern} is not supported, use one of {ACCESS_PATTERNS}"
+        )
+    if access_pattern == "random":
+        chunksize = min(chunksize, CHUNK_RANDOM_ACCESS_SIZE)
+    itemsize = np.dtype(dtype).itemsize
+    max_shape = tuple(max_shape)
+    sample_shapes = np.array(sample_shapes, dtype="int64")
+    if sample_shapes.ndim != 2 or len(sample_shapes) == 0:
+        sample_shapes = np.array([max_shape[1:]], dtype="int64")
+    real_size = np.prod(sample_shapes, axis=1).mean() * itemsize
+    compressed_size = max(real_size / max(compression_ratio, 1e-6), 1)
+
+    if access_pattern != "spatial" or len(max_shape) == 1:
+        padded_size = _tuple_product(max_shape[1:]) * itemsize
+        count = min(
+            int(chunksize // compressed_size),
+            CHUNK_MAX_UNCOMPRESSED_SIZE // max(padded_size, 1),
+        )
+        if count > 1:
+            return count
+
+    # Samples are split into tiles, trailing channel dim is kept whole
+    base = np.maximum(sample_shapes.max(axis=0), 1)
+    split = len(base) - 1 if len(base) > 1 and base[-1] <= 4 else len(base)
+    if split == 0:
+        return (1,) + max_shape[1:]
+    elements = chunksize * compression_ratio / itemsize
+    scale = min((elements / np.prod(base)) ** (1 / split), 1.0)
+    tiles = [
+        int(min(max_dim, max(1, math.ceil(dim * scale) if i < split else dim)))
+        for i, (dim, max_dim) in enumerate(zip(base, max_shape[1:]))
+    ]
+    return (1,) + tuple(tiles)
@@ -13,10 +13,14 @@ from time import sleep
 
 import re
 import fsspec
+from fsspec.mapping import FSMap
 import gcsfs
 import zarr
 
 from hub.store.lru_cache import LRUCache
+from hub.store.disk_cache import DiskCache
+from hub.store.mmap_store import MMapStore
+from hub.store.store_utils import getitems, setitems
 from hub.client.hub_control import HubControlClient
 from hub.store.azure_fs import AzureBlobFileSystem
 from hub.store.s3_file_system_replacement import S3FileSystemReplacement
@@ -140,10 +144,38 @@ def get_cache_path(path, cache_folder="~/.activeloop/cache/"):
     return os.path.expanduser(posixpath.join(cache_folder, path))
 
 
-def get_storage_map(fs, path, memcache=2 ** 26, lock=True, storage_cache=2 ** 28):
+def _is_remote(fs) -> bool:
+    protocols = fs.protocol if isinstance(fs.protocol, (tuple, list)) else [fs.protocol]
+    return not any(p in ("file", "memory") for p in protocols)
+
+
+def _is_local(fs) -> bool:
+    protocols = fs.protocol if isinstance(fs.protocol, (tuple, list)) else [fs.protocol]
+    return "file" in protocols
+
+
+def get_storage_map(
+    fs,
+    path,
+    memcache=2 ** 26,
+    lock=True,
+    storage_cache=2 ** 28,
+    mmap=False,
+    cacheable=None,
+):
+    """Returns storage map of path, wrapped in memory cache and for remote file systems in disk cache
+    If mmap is set and the file system is local, files are memory mapped instead,
+    which suits reading uncompressed chunks since they can be used as arrays without copies
+    cacheable(key) tells which items don't change while opened and can be kept in the disk cache
+    """
+    if mmap and _is_local(fs):
+        return MMapStore(path)
     store = _get_storage_map(fs, path)
+    remote = _is_remote(fs)
+    if storage_cache and storage_cache > 0 and remote:
+        store = DiskCache(store, get_cache_path(path), storage_cache, cacheable)
     if memcache and memcache > 0:
-        store = LRUCache(zarr.MemoryStore(), store, memcache)
+        store = LRUCache(zarr.MemoryStore(), store, memcache, write_behind=remote)
     return store
 
 
@@ -161,6 +193,17 @@ class StorageMapWrapperWithCommit(MutableMapping):
     def __delitem__(self, slice_):
         del self._map[slice_]
 
+    def getitems(self, keys, on_error="omit"):
+        return getitems(self._map, keys, on_error=on_error)
+
+    def setitems(self, mapping):
+        if isinstance(self._map, FSMap):
+            # FSMap.setitems doesn't create parent directories the way __setitem__ does
+            for key, value in mapping.items():
+                self._map[key] = value
+        else:
+            setitems(self._map, mapping)
+
     def __len__(self):
         return len(self._map)
 
@@ -0,0 +1,48 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+from collections.abc import MutableMapping
+
+
+def getitems(storage: MutableMapping, keys, on_error="omit"):
+    """Gets multiple keys from storage at once
+    Uses storage.getitems if the storage supports bulk reads, otherwise reads the keys one by one
+
+    Parameters
+    ----------
+    storage: MutableMapping
+        Storage to read from
+    keys: list of str
+        Keys that should be read
+    on_error: str, optional
+        If "omit" (default) missing keys are left out of the result, if "raise" KeyError is raised
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    if hasattr(storage, "getitems"):
+        return storage.getitems(keys, on_error=on_error)
+    result = {}
+    for key in keys:
+        try:
+            result[key] = storage[key]
+        except KeyError:
+            if on_error == "raise":
+                raise
+    return result
+
+
+def setitems(storage: MutableMapping, mapping):
+    """Sets multiple keys in storage at once
+    Uses storage.setitems if the storage supports bulk writes, otherwise writes the keys one by one
+    """
+    if not mapping:
+        return
+    if hasattr(storage, "setitems"):
+        storage.setitems(mapping)
+    else:
+        for key, value in mapping.items():
+            storage[key] = value
@@ -0,0 +1,103 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import posixpath
+
+import fsspec
+from fsspec.implementations.memory import MemoryFileSystem
+import pytest
+
+from hub.store.copier import MANIFEST_DIR, copy_tree, is_copy_in_progress
+
+
+def create_tree(fs, root):
+    if fs.exists(root):
+        fs.rm(root, recursive=True)
+    files = {"meta.json": b"{}", "a/0.0": b"chunk 0", "a/--dynamic--/0": b"dyn"}
+    for key, value in files.items():
+        fs.makedirs(posixpath.dirname(posixpath.join(root, key)), exist_ok=True)
+        fs.pipe_file(posixpath.join(root, key), value)
+    return files
+
+
+def test_copy_tree():
+    fs = fsspec.filesystem("file")
+    src = posixpath.abspath("./data/test_copier/src")
+    files = create_tree(fs, src)
+    mem = fsspec.filesystem("memory")
+    for dst_fs, dst in (
+        (fs, posixpath.abspath("./data/test_copier/dst")),
+        (mem, "/dst"),
+    ):
+        if dst_fs.exists(dst):
+            dst_fs.rm(dst, recursive=True)
+        copy_tree(fs, src, dst_fs, dst)
+        for key, value in files.items():
+            assert dst_fs.cat_file(posixpath.join(dst, key)) == value
+        assert not is_copy_in_progress(dst_fs, dst)
+
+
+class FailingFileSystem(MemoryFileSystem):
+    fail = True
+
+    def pipe_file(self, path, value, **kwargs):
+        if self.fail and path.endswith("meta.json"):
+            raise OSError("interrupted")
+        super().pipe_file(path, value, **kwargs)
+
+
+def test_copy_tree_resume():
+    fs = fsspec.filesystem("file")
+    src = posixpath.abspath("./data/test_copier/src_resume")
+    files = create_tree(fs, src)
+    dst_fs = FailingFileSystem()
+    with pytest.raises(OSError):
+        copy_tree(fs, src, dst_fs, "/resume")
+    assert is_copy_in_progress(dst_fs, "/resume")
+    assert not dst_fs.exists("/resume/meta.json")
+
+    dst_fs.pipe_file("/resume/a/0.0", b"kept")
+    FailingFileSystem.fail = False
+    copy_tree(fs, src, dst_fs, "/resume")
+    assert dst_fs.cat_file("/resume/a/0.0") == b"kept"
+    assert dst_fs.cat_file("/resume/meta.json") == files["meta.json"]
+    assert not dst_fs.exists(posixpath.join("/resume", MANIFEST_DIR))
+
+
+class ManagedCopyFileSystem(MemoryFileSystem):
+    """Like s3fs and gcsfs, copies server side with copy() but doesn't implement cp_file"""
+
+    copies = 0
+
+    def cp_file(self, path1, path2, **kwargs):
+        raise NotImplementedError
+
+    def copy(self, path1, path2, **kwargs):
+        ManagedCopyFileSystem.copies += 1
+        self.pipe_file(path2, self.cat_file(path1))
+
+
+class NoCopyFileSystem(MemoryFileSystem):
+    def cp_file(self, path1, path2, **kwargs):
+        raise NotImplementedError
+
+
+def test_copy_tree_same_backend():
+    for fs_class in (ManagedCopyFileSystem, NoCopyFileSystem):
+        src_fs, dst_fs = fs_class(), fs_class()
+        files = create_tree(src_fs, "/same_backend_src")
+        if dst_fs.exists("/same_backend_dst"):
+            dst_fs.rm("/same_backend_dst", recursive=True)
+        copy_tree(src_fs, "/same_backend_src", dst_fs, "/same_backend_dst")
+        for key, value in files.items():
+            assert dst_fs.cat_file(posixpath.join("/same_backend_dst", key)) == value
+    assert ManagedCopyFileSystem.copies == len(files)
+
+
+if __name__ == "__main__":
+    test_copy_tree()
+    test_copy_tree_resume()
+    test_copy_tree_same_backend()
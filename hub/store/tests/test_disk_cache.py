@@ -0,0 +1,93 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import os
+
+import zarr
+
+import hub
+from hub import defaults
+from hub.api import versioning
+from hub.store.disk_cache import DiskCache
+
+
+class CountingStore(zarr.MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return super().__getitem__(key)
+
+
+def test_disk_cache(tmp_path):
+    actual = CountingStore()
+    actual["0.0:abc"] = bytes(10)
+    actual["--dynamic--/0:abc"] = bytes(5)
+    actual["0.0:head"] = bytes(3)
+    actual[defaults.META_FILE] = b"{}"
+    cache = DiskCache(actual, str(tmp_path), 1000, lambda key: key.endswith(":abc"))
+
+    assert cache["0.0:abc"] == bytes(10)
+    assert cache["0.0:abc"] == bytes(10)
+    assert actual.reads == 1
+    assert cache.getitems(["0.0:abc", "--dynamic--/0:abc", "missing"]) == {
+        "0.0:abc": bytes(10),
+        "--dynamic--/0:abc": bytes(5),
+    }
+    assert actual.reads == 3  # "0.0:abc" is served from disk
+    cache[defaults.META_FILE]
+    cache["0.0:head"]
+    assert sorted(cache.cached_keys()) == ["--dynamic--/0:abc", "0.0:abc"]
+
+    # Another instance (process) reuses the cached items, items that can change are always read
+    other = DiskCache(actual, str(tmp_path), 1000, lambda key: key.endswith(":abc"))
+    assert other["0.0:abc"] == bytes(10)
+    actual["0.0:head"] = bytes(4)
+    assert other["0.0:head"] == bytes(4)
+    assert actual.reads == 6
+
+    cache["1.0:abc"] = bytes(20)
+    assert actual["1.0:abc"] == bytes(20)
+    del cache["0.0:abc"]
+    assert "0.0:abc" not in cache.cached_keys()
+    assert not any(name.startswith(".tmp") for name in os.listdir(tmp_path))
+
+
+def test_disk_cache_eviction(tmp_path):
+    actual = zarr.MemoryStore()
+    cache = DiskCache(actual, str(tmp_path), 100, lambda key: True)
+    for i in range(10):
+        cache[str(i)] = bytes(30)
+        os.utime(os.path.join(str(tmp_path), str(i)), (i, i))
+    cached = cache.cached_keys()
+    assert len(cached) <= 3
+    assert "9" in cached
+    assert sum(os.path.getsize(os.path.join(str(tmp_path), k)) for k in cached) <= 100
+    assert len(actual) == 10
+
+
+def test_dataset_frozen_chunks(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    ds = hub.Dataset(
+        "./data/test/test_dataset_frozen_chunks",
+        shape=(4,),
+        schema={"label": "int32"},
+        mode="w",
+    )
+    ds["label", 0] = 1
+    first = ds._commit_id
+    assert not ds._is_frozen_chunk(f"0:{first}")
+    ds.commit("first")
+    assert ds._is_frozen_chunk(f"0:{first}")
+    assert not ds._is_frozen_chunk(f"0:{ds._commit_id}")
+    assert not ds._is_frozen_chunk("0")
+    ds.flush()
+    ds = hub.Dataset("./data/test/test_dataset_frozen_chunks", mode="r")
+    assert ds._is_frozen_chunk(f"0:{first}")
+    assert ds._is_frozen_chunk(f"0:{ds._commit_id}")
+    assert not ds._is_frozen_chunk("0")
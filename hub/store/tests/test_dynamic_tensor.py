@@ -129,6 +129,93 @@ def test_dynamic_tensor_4():
     assert (t[0, 6:8] == np.ones((2, 20, 10), dtype="int32")).all()
 
 
+class CountingArray:
+    def __init__(self, array):
+        self.array = array
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return self.array[key]
+
+    def __getattr__(self, name):
+        if name == "get_orthogonal_selection":
+            self.reads += 1
+        return getattr(self.array, name)
+
+
+def test_dynamic_tensor_batched_shapes():
+    t = DynamicTensor(
+        create_store("./data/test/test_dynamic_tensor_7"),
+        mode="w",
+        shape=(5, None, 4),
+        max_shape=(5, 10, 4),
+        dtype="int32",
+    )
+    for i in range(5):
+        t[i] = np.ones((i + 1, 4), dtype="int32")
+    assert t.get_shape(slice(1, 4)).tolist() == [[2, 4], [3, 4], [4, 4]]
+    assert t.get_shape([[4, 0, 2]]).tolist() == [[5, 4], [1, 4], [3, 4]]
+    assert [len(sample) for sample in t[1:4]] == [2, 3, 4]
+
+    t._dynamic_tensor = CountingArray(t._dynamic_tensor)
+    t[0:5]
+    t.get_shape([[3, 1]])
+    assert t._dynamic_tensor.reads == 2
+
+
+def test_dynamic_tensor_ragged_read():
+    t = DynamicTensor(
+        create_store("./data/test/test_dynamic_tensor_8"),
+        mode="w",
+        shape=(6, None, None),
+        max_shape=(6, 10, 10),
+        chunks=3,
+        dtype="int32",
+    )
+    values = [
+        np.arange((i + 2) * (7 - i), dtype="int32").reshape(i + 2, 7 - i)
+        for i in range(6)
+    ]
+    for i, value in enumerate(values):
+        t[i] = value
+    t._storage_tensor = CountingArray(t._storage_tensor)
+    samples = t[0:6]
+    assert t._storage_tensor.reads == 1
+    for sample, value in zip(samples, values):
+        assert (sample == value).all()
+    for sample, value in zip(t[1:5, 1:, -1], values[1:5]):
+        assert (sample == value[1:, -1]).all()
+    for sample, value in zip(t[2:4, 0], values[2:4]):
+        assert (sample == value[0]).all()
+
+
+def test_dynamic_tensor_ragged_write():
+    t = DynamicTensor(
+        create_store("./data/test/test_dynamic_tensor_9"),
+        mode="w",
+        shape=(6, None, 3),
+        max_shape=(6, 10, 3),
+        chunks=3,
+        dtype="int32",
+    )
+    values = [np.full((i + 1, 3), i, dtype="int32") for i in range(4)]
+    t[1:5] = values
+    assert [value.shape[0] for value in values] == [1, 2, 3, 4]
+    assert t.get_shape(slice(0, 6)).tolist() == [
+        [0, 3],
+        [1, 3],
+        [2, 3],
+        [3, 3],
+        [4, 3],
+        [0, 3],
+    ]
+    for sample, value in zip(t[1:5], values):
+        assert (sample == value).all()
+    t[0:2] = np.ones((2, 5, 3), dtype="int32")
+    assert t.get_shape(slice(0, 2)).tolist() == [[5, 3], [5, 3]]
+
+
 if __name__ == "__main__":
     test_read_and_append_modes()
     # test_chunk_iterator()
@@ -4,6 +4,10 @@ This Source Code Form is subject to the terms of the Mozilla Public License, v.
 If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
 from hub.store.lru_cache import LRUCache
 
 import zarr
@@ -43,5 +47,120 @@ def test_lru_cache():
     cache.commit()
 
 
+class CountingStore(zarr.MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.bulk_reads = 0
+
+    def getitems(self, keys, on_error="omit"):
+        self.bulk_reads += 1
+        return {key: self[key] for key in keys if key in self}
+
+
+def test_lru_cache_getitems():
+    actual = CountingStore()
+    for i in range(5):
+        actual[str(i)] = bytes(f"value {i}", "utf-8")
+    cache = LRUCache(zarr.MemoryStore(), actual, 1000)
+    cache["5"] = bytes("value 5", "utf-8")
+    items = cache.getitems(["0", "1", "5", "missing"])
+    assert actual.bulk_reads == 1
+    assert items == {
+        "0": bytes("value 0", "utf-8"),
+        "1": bytes("value 1", "utf-8"),
+        "5": bytes("value 5", "utf-8"),
+    }
+    assert "0" in cache.cache_storage
+    cache.getitems(["0", "1"])
+    assert actual.bulk_reads == 1
+
+    cache.setitems({"6": bytes("value 6", "utf-8"), "7": bytes("value 7", "utf-8")})
+    assert "6" not in actual
+    cache.flush()
+    assert actual["6"] == bytes("value 6", "utf-8")
+    assert actual["7"] == bytes("value 7", "utf-8")
+
+
+class SlowStore(zarr.MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self._reads_lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._reads_lock:
+            self.reads += 1
+        time.sleep(0.05)
+        return super().__getitem__(key)
+
+
+def test_lru_cache_concurrent_misses():
+    actual = SlowStore()
+    for i in range(32):
+        actual[str(i)] = bytes(100)
+    cache = LRUCache(zarr.MemoryStore(), actual, 1000, shards=4)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda i: cache[str(i % 4)], range(64)))
+    assert all(result == bytes(100) for result in results)
+    assert actual.reads == 4
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda i: cache[str(i)], range(32)))
+    assert cache._total_cached == sum(cache._cached_items.values())
+    assert cache._total_cached <= 1000
+
+
+class BlockingStore(zarr.MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.fail = False
+
+    def __setitem__(self, key, value):
+        self.release.wait()
+        if self.fail:
+            raise OSError("upload failed")
+        super().__setitem__(key, value)
+
+
+def test_lru_cache_write_behind():
+    actual = BlockingStore()
+    cache = LRUCache(zarr.MemoryStore(), actual, 100, shards=1, write_behind=True)
+    cache["a"] = bytes(60)
+    cache["b"] = bytes(60)
+    assert "a" not in cache.cache_storage
+    assert "a" not in actual
+    assert cache["a"] == bytes(60)
+
+    actual.release.set()
+    cache.flush()
+    assert actual["a"] == bytes(60)
+    assert actual["b"] == bytes(60)
+
+    actual.fail = True
+    cache["c"] = bytes(60)
+    cache["d"] = bytes(60)
+    try:
+        cache.flush()
+        assert False, "upload error should be raised"
+    except OSError:
+        pass
+
+    # Closing stops the upload threads, writes after it start them again
+    actual.fail = False
+    cache["e"] = bytes(60)
+    cache["f"] = bytes(60)
+    cache.close()
+    assert cache._write_behind._pool is None
+    assert actual["e"] == bytes(60)
+    cache["g"] = bytes(60)
+    cache["h"] = bytes(60)
+    cache.close()
+    assert actual["g"] == bytes(60)
+
+
 if __name__ == "__main__":
     test_lru_cache()
+    test_lru_cache_getitems()
+    test_lru_cache_concurrent_misses()
+    test_lru_cache_write_behind()
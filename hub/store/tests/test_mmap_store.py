@@ -0,0 +1,76 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import mmap
+import shutil
+
+import numpy as np
+import pytest
+
+import hub
+from hub.api import versioning
+from hub.schema import Tensor
+from hub.store.mmap_store import MMapStore
+
+
+def test_mmap_store():
+    shutil.rmtree("./data/test/test_mmap_store", ignore_errors=True)
+    store = MMapStore("./data/test/test_mmap_store")
+    store["a/0.0"] = b"hello"
+    store["empty"] = b""
+    assert isinstance(store["a/0.0"], mmap.mmap)
+    assert bytes(store["a/0.0"]) == b"hello"
+    assert store["empty"] == b""
+    assert "a/0.0" in store and "a/1.0" not in store
+    assert sorted(store) == ["a/0.0", "empty"]
+    assert list(store.getitems(["a/0.0", "a/1.0"])) == ["a/0.0"]
+    old = store["a/0.0"]
+    store["a/0.0"] = b"world"
+    assert bytes(old) == b"hello"
+    assert bytes(store["a/0.0"]) == b"world"
+    del store["a/0.0"]
+    with pytest.raises(KeyError):
+        store["a/0.0"]
+
+
+def test_mmap_dataset(monkeypatch):
+    monkeypatch.setattr(versioning, "get_user_name", lambda: "public")
+    schema = {
+        "image": Tensor((32, 32, 3), dtype="uint8", chunks=1, compressor=None),
+        "label": "int32",
+    }
+    ds = hub.Dataset(
+        "./data/test/test_mmap_dataset", shape=(10,), schema=schema, mode="w"
+    )
+    # Writes go through the memory cache
+    assert not isinstance(ds._tensors["/image"].fs_map._fs_map, MMapStore)
+    for i in range(10):
+        ds["image", i] = np.full((32, 32, 3), i, dtype="uint8")
+    ds.commit("first")
+    ds["image", 3] = np.full((32, 32, 3), 33, dtype="uint8")
+    ds.close()
+
+    ds = hub.Dataset("./data/test/test_mmap_dataset")
+    assert not isinstance(ds._tensors["/image"].fs_map._fs_map, MMapStore)
+    ds = hub.Dataset("./data/test/test_mmap_dataset", mode="r")
+    assert isinstance(ds._tensors["/image"].fs_map._fs_map, MMapStore)
+    assert not isinstance(ds._tensors["/label"].fs_map._fs_map, MMapStore)
+    image = ds["image", 5].compute()
+    base = image
+    while isinstance(base, np.ndarray):
+        base = base.base
+    assert isinstance(base.obj, mmap.mmap)
+    assert (image == 5).all()
+    assert image[0, 0, 1] == 5
+    assert (ds["image", 3, 0:2].compute() == 33).all()
+    image[:] = 0
+    assert (ds["image", 5].compute() == 5).all()
+    assert ds["image", 2:4].compute()[:, 0, 0, 0].tolist() == [2, 33]
+
+
+if __name__ == "__main__":
+    test_mmap_store()
+    test_mmap_dataset()
@@ -25,5 +25,12 @@ def test_nested_store():
         assert "object has no attribute 'close'" in str(ex)
 
 
+def test_nested_store_getitems():
+    store = NestedStore(zarr.MemoryStore(), "hello")
+    store.setitems({"item1": b"1", "item2": b"2"})
+    assert store.getitems(["item1", "item2", "item3"]) == {"item1": b"1", "item2": b"2"}
+
+
 if __name__ == "__main__":
     test_nested_store()
+    test_nested_store_getitems()
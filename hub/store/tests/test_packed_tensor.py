@@ -0,0 +1,85 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import numpy as np
+import pytest
+
+import hub
+from hub.exceptions import ValueShapeError
+from hub.schema import Tensor
+from hub.store.packed_tensor import PackedTensor
+from hub.store.tests.test_dynamic_tensor import create_store
+
+
+def test_packed_tensor():
+    t = PackedTensor(
+        create_store("./data/test/test_packed_tensor"),
+        mode="w",
+        shape=(5, None, None),
+        max_shape=(5, 100, 100),
+        dtype="int32",
+        chunk_size=200,
+    )
+    t[0] = np.ones((10, 5), dtype="int32")
+    t[1:3] = [np.full((2, 3), 2, dtype="int32"), np.full((4, 4), 3, dtype="int32")]
+    t[3, 2:4, 1:3] = np.full((2, 2), 4, dtype="int32")
+    assert t[0].shape == (10, 5)
+    assert t[0, -1, 1:3].tolist() == [1, 1]
+    assert [sample.shape for sample in t[0:5]] == [
+        (10, 5),
+        (2, 3),
+        (4, 4),
+        (4, 3),
+        (0, 0),
+    ]
+    assert t[3].tolist() == [[0, 0, 0], [0, 0, 0], [0, 4, 4], [0, 4, 4]]
+    assert t.get_shape(slice(0, 3)).tolist() == [[10, 5], [2, 3], [4, 4]]
+    assert t.get_shape_samples([2, 0]).tolist() == [[4, 4], [10, 5]]
+    with pytest.raises(ValueShapeError):
+        t[4] = np.ones((200, 1), dtype="int32")
+    t.flush()
+    t.close()
+
+    t = PackedTensor(
+        create_store("./data/test/test_packed_tensor", overwrite=False), mode="a"
+    )
+    assert t.get_shape(2).tolist() == [4, 4]
+    assert t[2].tolist() == [[3] * 4] * 4
+    t[2] = np.full((1, 2), 5, dtype="int32")
+    assert t[2].tolist() == [[5, 5]]
+    assert t[0].sum() == 50
+    assert len(t.chunk_keys(0)) == 1
+    t.resize_shape(8)
+    assert t[7].shape == (0, 0)
+    t.close()
+
+
+def test_packed_dataset():
+    schema = {
+        "image": Tensor(
+            (None, None, 3), dtype="uint8", max_shape=(640, 640, 3), layout="packed"
+        ),
+        "label": "int32",
+    }
+    ds = hub.Dataset(
+        "./data/test/test_packed_dataset", shape=(10,), schema=schema, mode="w"
+    )
+    for i in range(10):
+        ds["image", i] = np.full((i + 1, 2 * i + 1, 3), i, dtype="uint8")
+    ds.close()
+
+    ds = hub.Dataset("./data/test/test_packed_dataset")
+    assert ds.schema.dict_["image"].layout == "packed"
+    for i, sample in enumerate(ds):
+        image = sample["image"].compute()
+        assert image.shape == (i + 1, 2 * i + 1, 3)
+        assert (image == i).all()
+    assert ds["image", 2:4].shape.tolist() == [[3, 5, 3], [4, 7, 3]]
+
+
+if __name__ == "__main__":
+    test_packed_tensor()
+    test_packed_dataset()
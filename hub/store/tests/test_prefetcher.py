@@ -0,0 +1,87 @@
+"""
+License:
+This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+import threading
+import time
+
+import numpy as np
+import zarr
+
+import hub
+from hub.schema import Tensor
+from hub.store.dynamic_tensor import DynamicTensor
+from hub.store.lru_cache import LRUCache
+from hub.store.prefetcher import Prefetcher
+
+
+class SlowStore(zarr.MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+        self._reads_lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._reads_lock:
+            self.reads.append(key)
+        time.sleep(0.01)
+        return super().__getitem__(key)
+
+
+def test_prefetcher():
+    actual = SlowStore()
+    t = DynamicTensor(
+        LRUCache(zarr.MemoryStore(), actual, 2 ** 20),
+        mode="w",
+        shape=(20, 10),
+        max_shape=(20, 10),
+        chunks=2,
+        dtype="int32",
+    )
+    t[:] = np.arange(200, dtype="int32").reshape(20, 10)
+    t.fs_map.flush()
+    t = DynamicTensor(LRUCache(zarr.MemoryStore(), actual, 2 ** 20), mode="r")
+    assert t.chunk_keys(5) == ["2.0"]
+
+    indexes = [7, 6, 1, 0, 19, 18]
+    actual.reads.clear()
+    with Prefetcher([t], indexes, depth=2) as prefetcher:
+        for i in prefetcher:
+            if i == 7:
+                time.sleep(0.1)
+                assert "0.0" in actual.reads
+                assert "9.0" not in actual.reads
+            assert t[i].tolist() == list(range(10 * i, 10 * i + 10))
+    chunk_reads = [key for key in actual.reads if not key.startswith(".")]
+    assert chunk_reads == ["3.0", "0.0", "9.0"]
+
+
+def test_dataset_prefetch():
+    schema = {
+        "image": Tensor((4, 4), "int32", chunks=2),
+        "raw": Tensor((4, 4), "int32", chunks=2, compressor=None),
+    }
+    url = "./data/test/test_dataset_prefetch"
+    ds = hub.Dataset(url, shape=(10,), schema=schema, mode="w")
+    with ds.prefetch(range(10)) as prefetcher:
+        assert len(prefetcher._tensors) == 2
+        assert list(prefetcher) == list(range(10))
+    ds.close()
+
+    ds = hub.Dataset(url, mode="r")
+    with ds.prefetch(range(10)) as prefetcher:
+        # Memory mapped tensors have no cache to keep prefetched chunks in
+        assert prefetcher._tensors == [ds._tensors["/image"]]
+        assert list(prefetcher) == list(range(10))
+
+    ds = hub.Dataset(url, cache=False)
+    with ds.prefetch(range(10)) as prefetcher:
+        assert prefetcher._thread is None
+        assert list(prefetcher) == list(range(10))
+
+
+if __name__ == "__main__":
+    test_prefetcher()
+    test_dataset_prefetch()
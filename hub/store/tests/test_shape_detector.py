@@ -5,7 +5,13 @@ If a copy of the MPL was not distributed with this file, You can obtain one at h
 """
 
 from hub.exceptions import HubException
-from hub.store.shape_detector import ShapeDetector
+from hub.store.shape_detector import (
+    ShapeDetector,
+    estimate_compression_ratio,
+    get_adaptive_chunks,
+)
+import numcodecs
+import numpy as np
 import pytest
 
 
@@ -44,3 +50,21 @@ def test_shape_detector_wrong_chunk_shape():
 def test_shape_detector_wrong_chunk_value():
     with pytest.raises(Exception):
         ShapeDetector((10, 10, 10), (10, 10, 10), (2, 10, 10))
+
+
+def test_adaptive_chunks():
+    shapes = [(480, 640, 3), (640, 420, 3)]
+    chunks = get_adaptive_chunks((100, 640, 640, 3), "uint8", shapes, 2.0)
+    assert chunks == 38
+    assert get_adaptive_chunks((100, 640, 640, 3), "uint8", shapes, 2.0, "random") == 2
+    assert get_adaptive_chunks(
+        (10, 4000, 4000, 3), "uint8", [(4000, 4000, 3)], 1.0, "spatial"
+    ) == (1, 2365, 2365, 3)
+    with pytest.raises(ValueError):
+        get_adaptive_chunks((100, 10), "uint8", [(10,)], access_pattern="diagonal")
+
+
+def test_estimate_compression_ratio():
+    samples = [np.zeros((100, 100), dtype="int32")]
+    assert estimate_compression_ratio(samples, None) == 1.0
+    assert estimate_compression_ratio(samples, numcodecs.LZ4()) > 10